@@ -0,0 +1,13 @@
+from xiangqi.ai.limits import SearchLimits
+from xiangqi.tools import analyze
+
+MATED_FEN = "3k5/3R5/3R5/9/9/9/9/9/9/4K4 b"
+
+
+def test_mated_position_reports_null_bestmove():
+    analyze._init_worker(SearchLimits(depth=2), 1, None)
+    first = analyze.analyze_position((1, "startpos"))
+    assert first["bestmove"] is not None
+    # 同一个工作进程接着分析下一行，不能带出上一行的走法
+    mated = analyze.analyze_position((2, MATED_FEN))
+    assert mated["bestmove"] is None and mated["depth"] == 0
@@ -0,0 +1,79 @@
+import random
+import subprocess
+import sys
+
+from xiangqi.core.board import Board
+from xiangqi.core.const import START_FEN, Piece, Side
+from xiangqi.core.move import MOVE_CAPTURED_MASK, parse_iccs
+from xiangqi.core.movegen import gen_legal_codes, validate_move
+from xiangqi.core.zobrist import calc_zobrist_key
+
+
+def _play(board: Board, moves: str) -> Board:
+    for text in moves.split():
+        board.make_move(validate_move(board, parse_iccs(text), board.side_to_move))
+    return board
+
+
+def test_core_does_not_import_ai():
+    code = ("import sys, xiangqi.core.board, xiangqi.core.movegen, xiangqi.core.rules, xiangqi.core.packed; "
+            "sys.exit(any(m.startswith('xiangqi.ai') for m in sys.modules))")
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
+
+
+def test_fen_round_trip():
+    assert Board.from_fen(START_FEN).to_fen() == START_FEN
+
+
+def test_board_with_history_can_unmake():
+    played = _play(Board.from_fen(START_FEN), "h2e2 h9g7 e2e6 g7e6")  # 炮打中卒，马吃炮
+    board = Board(list(played.squares), played.side_to_move, list(played.move_codes))
+    assert board.zobrist_key == played.zobrist_key and board.pst_score == played.pst_score
+    while board.move_codes:
+        board.unmake()
+        played.unmake()
+        assert board.zobrist_key == played.zobrist_key and board.pst_score == played.pst_score
+    assert board.to_fen() == START_FEN
+
+
+def test_incremental_zobrist_key():
+    rng = random.Random(5)
+    board = Board.initial()
+    keys = [board.zobrist_key]
+    for _ in range(80):
+        moves = gen_legal_codes(board, board.side_to_move)
+        if not moves:
+            break
+        board.make(rng.choice(moves))
+        assert board.zobrist_key == calc_zobrist_key(board)
+        keys.append(board.zobrist_key)
+    while board.move_codes:  # 撤回时逐步回到原来的 key
+        board.unmake()
+        keys.pop()
+        assert board.zobrist_key == keys[-1]
+    board.make_null_move()
+    assert board.zobrist_key == calc_zobrist_key(board) != keys[0]  # 走子方不同 key 不同
+    board.undo_null_move()
+    assert board.zobrist_key == keys[0]
+    # 走法顺序不同、局面相同时 key 相同
+    assert (_play(Board.initial(), "h2e2 h9g7 b0c2").zobrist_key
+            == _play(Board.initial(), "b0c2 h9g7 h2e2").zobrist_key)
+
+
+def test_piece_lists_and_king_squares():
+    rng = random.Random(9)
+    board = Board.initial()
+    for _ in range(150):
+        moves = gen_legal_codes(board, board.side_to_move)
+        if not moves:
+            break
+        captures = [m for m in moves if m & MOVE_CAPTURED_MASK] if rng.random() < 0.7 else []
+        board.make(rng.choice(captures or moves))  # 多吃子，棋子列表变化更多
+        for side in (Side.RED, Side.BLACK):
+            expected = sorted((i, p) for i, p in enumerate(board.squares) if p * side > 0)
+            assert sorted(board.iter_pieces(side)) == expected
+            assert board.piece_count(side) == len(expected)
+            assert board.king_square(side) == board.squares.index(side * Piece.SHUAI)
+    while board.move_codes:
+        board.unmake()
+    board.verify_incremental()
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from xiangqi.ai.book import BOOK_MAGIC, BOOK_VERSION, HEADER, RECORD, OpeningBook
+from xiangqi.ai.tt import encode_move
+from xiangqi.core.board import Board
+from xiangqi.core.move import parse_iccs
+from xiangqi.tools.build_book import build
+
+
+def _build(tmp_path, text: str):
+    games = tmp_path / "games"
+    games.mkdir()
+    (games / "g.txt").write_text(text, encoding="utf-8")
+    out = tmp_path / "book.xqb"
+    build(games, out)
+    return OpeningBook(out)
+
+
+def _write(path, records):
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, len(records)))
+        for r in sorted(records):
+            f.write(RECORD.pack(*r))
+
+
+def test_moves_only_games_are_playable(tmp_path):
+    with _build(tmp_path, "h2e2 h9g7\nh2e2 b9c7\nb2e2 h9g7\n") as book:
+        board = Board.initial()
+        assert book.choose(board) is not None
+        assert book.choose(board, random.Random(1)) is not None
+        # 没有结果时按局数：h2e2 走过两局
+        weights = {code: weight for code, weight, _ in book.probe(board.zobrist_key)}
+        h2e2 = parse_iccs("h2e2")
+        assert weights[encode_move(h2e2.frm, h2e2.to)] == 2
+
+
+def test_only_losing_move_is_still_chosen(tmp_path):
+    with _build(tmp_path, "h2e2 h9g7 0-1\n") as book:
+        assert book.choose(Board.initial()) is not None
+
+
+def test_zero_weights_fall_back_to_games(tmp_path):
+    board = Board.initial()
+    mv = parse_iccs("h2e2")
+    _write(tmp_path / "b.xqb", [(board.zobrist_key, encode_move(mv.frm, mv.to), 0, 5)])
+    with OpeningBook(tmp_path / "b.xqb") as book:
+        assert book.choose(board) is not None
+
+
+def test_weights_do_not_saturate_at_16_bits(tmp_path):
+    board = Board.initial()
+    a, b = parse_iccs("h2e2"), parse_iccs("b2e2")
+    _write(tmp_path / "b.xqb", [(board.zobrist_key, encode_move(a.frm, a.to), 200000, 100000),
+                                (board.zobrist_key, encode_move(b.frm, b.to), 70000, 70000)])
+    with OpeningBook(tmp_path / "b.xqb") as book:
+        assert sorted(w for _, w, _ in book.probe(board.zobrist_key)) == [70000, 200000]
+        assert book.choose(board).frm == a.frm
+
+
+@pytest.mark.parametrize("content", [b"", HEADER.pack(BOOK_MAGIC, BOOK_VERSION, 0), b"XQBK"])
+def test_empty_book_is_rejected(tmp_path, content):
+    path = tmp_path / "b.xqb"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        OpeningBook(path)
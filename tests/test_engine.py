@@ -0,0 +1,38 @@
+import io
+
+import pytest
+
+from xiangqi.engine import UCCIEngine, parse_position
+
+MATED_FEN = "3k5/3R5/3R5/9/9/9/9/9/9/4K4 b"
+
+
+def _run(*commands: str) -> list[str]:
+    out = io.StringIO()
+    engine = UCCIEngine(out)
+    engine.engine.book = None
+    for line in commands:
+        engine.handle(line)
+    engine.stop()
+    return out.getvalue().splitlines()
+
+
+def test_go_on_mated_position_prints_nobestmove():
+    lines = _run("position startpos", "go depth 2", f"position fen {MATED_FEN}", "go depth 3")
+    replies = [line for line in lines if line.startswith(("bestmove", "nobestmove"))]
+    assert len(replies) == 2
+    assert replies[0].startswith("bestmove ")
+    assert replies[1] == "nobestmove"
+
+
+def test_position_rejects_illegal_move():
+    with pytest.raises(ValueError):
+        parse_position(["startpos", "moves", "a0a5"])
+
+
+def test_newgame_makes_search_repeatable():
+    lines = _run("position startpos", "go depth 3", "position startpos moves h2e2", "go depth 3",
+                 "ucinewgame", "position startpos", "go depth 3", "position startpos")  # position 等搜索结束
+    infos = [line for line in lines if line.startswith("info depth 3")]
+    first, last = infos[0].split(), infos[-1].split()
+    assert first[first.index("nodes") + 1] == last[last.index("nodes") + 1]
@@ -0,0 +1,32 @@
+import random
+import subprocess
+import sys
+
+from xiangqi.ai.eval import evaluate, evaluate_full
+from xiangqi.core.board import Board
+from xiangqi.core.movegen import gen_legal_codes
+
+
+def test_incremental_score_matches_full_recompute():
+    rng = random.Random(11)
+    for _ in range(20):
+        board = Board.initial()
+        for _ in range(rng.randrange(1, 120)):
+            moves = gen_legal_codes(board, board.side_to_move)
+            if not moves:
+                break
+            board.make(rng.choice(moves))
+            assert evaluate(board) == evaluate_full(board)
+            if rng.random() < 0.3:  # 不时撤回几步
+                for _ in range(rng.randrange(1, len(board.move_codes) + 1)):
+                    board.unmake()
+                    assert evaluate(board) == evaluate_full(board)
+
+
+def test_score_does_not_depend_on_import_order():
+    # 先只用 core 建棋盘、走棋，之后才导入 ai
+    code = ("from xiangqi.core.board import Board; from xiangqi.core.movegen import gen_legal_codes; "
+            "b = Board.initial(); b.make(gen_legal_codes(b, b.side_to_move)[0]); "
+            "from xiangqi.ai.eval import evaluate, evaluate_full; "
+            "raise SystemExit(evaluate(b) != evaluate_full(b))")
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
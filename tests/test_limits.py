@@ -0,0 +1,48 @@
+import threading
+import time
+
+from xiangqi.ai.limits import LimitChecker, SearchLimits, allocate_time
+from xiangqi.ai.search_v2 import SearchEngine
+from xiangqi.core.board import Board
+from xiangqi.core.const import START_FEN
+
+
+def _engine() -> SearchEngine:
+    engine = SearchEngine(1)
+    engine.log = lambda text: None
+    return engine
+
+
+def test_node_budget_is_respected():
+    limits = SearchLimits(nodes=5000)
+    engine = _engine()
+    assert engine.search(Board.from_fen(START_FEN), limits=limits) is not None
+    assert engine.nodes_count + engine.qnodes_count <= limits.nodes + limits.check_every
+    assert limits.deterministic
+
+
+def test_hard_time_stops_inside_the_tree():
+    engine = _engine()
+    start = time.perf_counter()
+    assert engine.search(Board.from_fen(START_FEN), limits=SearchLimits(hard_time=0.2)) is not None
+    assert time.perf_counter() - start < 1.5
+
+
+def test_stop_event_and_ponder_clock():
+    stop = threading.Event()
+    checker = LimitChecker(SearchLimits(hard_time=0), stop, ponder=True)
+    assert not checker.should_stop(0)  # 后台思考：还没开始计时
+    checker.start_clock()
+    assert checker.should_stop(0)
+    assert LimitChecker(SearchLimits(), stop).should_stop(0) is False
+    stop.set()
+    assert LimitChecker(SearchLimits(), stop).should_stop(0)
+
+
+def test_allocate_time():
+    limits = allocate_time(60, 1, movestogo=20)
+    assert 0 < limits.soft_time < limits.hard_time < 60
+    sudden_death = allocate_time(0.01)  # 几乎没时间也要给出正的硬上限
+    assert sudden_death.hard_time > 0 and sudden_death.soft_time <= sudden_death.hard_time
+    last_move = allocate_time(5, movestogo=1)
+    assert last_move.hard_time <= 5
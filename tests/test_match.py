@@ -0,0 +1,16 @@
+from xiangqi.ai.ai_config import SearchOptions
+from xiangqi.ai.limits import SearchLimits
+from xiangqi.core.const import START_FEN
+from xiangqi.tools.match import LocalPlayer, play_game
+
+
+def test_new_game_resets_local_player():
+    red, black = LocalPlayer(SearchOptions(), 1), LocalPlayer(SearchOptions(), 1)
+    limits = SearchLimits(nodes=3000)
+    first = play_game(red, black, START_FEN, limits, 12)
+    red.new_game()
+    engine = red.engine
+    assert engine.tt.used == 0 and engine.best_move is None
+    assert not any(engine.history) and not any(engine.counter_moves)
+    # 固定节点数下同一开局的对局一模一样
+    assert play_game(red, black, START_FEN, limits, 12) == first
@@ -0,0 +1,102 @@
+from xiangqi.core.board import Board
+from xiangqi.core.const import BOARD_COLS, BOARD_ROWS, Piece, Side, i_to_rc, rc_to_i
+from xiangqi.core.move import MOVE_PIECE_SHIFT, MOVE_TO_SHIFT, PIECE_OF_NIBBLE
+from xiangqi.core.movegen import gen_pseudo_legal_codes
+from xiangqi.tools.bench_movegen import sample_positions
+
+# 按坐标逐条规则写的参考走法生成（慢），与查表生成的结果比对
+_LEAPERS = (Piece.SHUAI, Piece.SHI, Piece.XIANG, Piece.MA, Piece.BING)
+_SLIDERS = (Piece.CHE, Piece.PAO)
+
+
+def _on_board(r: int, c: int) -> bool:
+    return 0 <= r < BOARD_ROWS and 0 <= c < BOARD_COLS
+
+
+def _in_palace(r: int, c: int, side: Side) -> bool:
+    return 3 <= c <= 5 and (7 <= r <= 9 if side == Side.RED else 0 <= r <= 2)
+
+
+def _leaper_targets(board: Board, r: int, c: int, piece: int, side: Side):
+    kind = abs(piece)
+    if kind == Piece.SHUAI:
+        for dr, dc in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            if _in_palace(r + dr, c + dc, side):
+                yield r + dr, c + dc
+    elif kind == Piece.SHI:
+        for dr, dc in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+            if _in_palace(r + dr, c + dc, side):
+                yield r + dr, c + dc
+    elif kind == Piece.XIANG:
+        for dr, dc in ((2, 2), (2, -2), (-2, 2), (-2, -2)):
+            tr, tc = r + dr, c + dc
+            own_half = tr >= 5 if side == Side.RED else tr <= 4  # 相不过河
+            if _on_board(tr, tc) and own_half and board.squares[rc_to_i(r + dr // 2, c + dc // 2)] == 0:
+                yield tr, tc
+    elif kind == Piece.MA:
+        for dr, dc in ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (-1, 2), (1, -2), (-1, -2)):
+            leg = (r + dr // 2, c) if abs(dr) == 2 else (r, c + dc // 2)  # 蹩马腿
+            if _on_board(r + dr, c + dc) and board.squares[rc_to_i(*leg)] == 0:
+                yield r + dr, c + dc
+    elif kind == Piece.BING:
+        forward = -1 if side == Side.RED else 1
+        crossed = r <= 4 if side == Side.RED else r >= 5
+        for dr, dc in ((forward, 0),) + (((0, 1), (0, -1)) if crossed else ()):
+            if _on_board(r + dr, c + dc):
+                yield r + dr, c + dc
+
+
+def _slider_targets(board: Board, r: int, c: int, piece: int):
+    for dr, dc in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        tr, tc = r + dr, c + dc
+        screens = 0  # 已经越过的子数
+        while _on_board(tr, tc):
+            occupied = board.squares[rc_to_i(tr, tc)] != 0
+            if abs(piece) == Piece.CHE:
+                yield tr, tc
+                if occupied:
+                    break
+            elif not occupied:
+                if not screens:
+                    yield tr, tc
+            else:
+                screens += 1
+                if screens == 2:  # 炮隔一子吃
+                    yield tr, tc
+                    break
+            tr, tc = tr + dr, tc + dc
+
+
+def _reference_moves(board: Board, side: Side, kinds) -> set[tuple[int, int]]:
+    moves = set()
+    for frm, piece in enumerate(board.squares):
+        if piece * side <= 0 or abs(piece) not in kinds:
+            continue
+        r, c = i_to_rc(frm)
+        if abs(piece) in _SLIDERS:
+            targets = _slider_targets(board, r, c, piece)
+        else:
+            targets = _leaper_targets(board, r, c, piece, side)
+        for tr, tc in targets:
+            to = rc_to_i(tr, tc)
+            if board.squares[to] * side <= 0:  # 空格或敌子
+                moves.add((frm, to))
+    return moves
+
+
+def _generated(board: Board, side: Side, kinds) -> set[tuple[int, int]]:
+    codes = gen_pseudo_legal_codes(board, side)
+    return {(code & 0x7F, code >> MOVE_TO_SHIFT & 0x7F) for code in codes
+            if abs(PIECE_OF_NIBBLE[code >> MOVE_PIECE_SHIFT & 0xF]) in kinds}
+
+
+def test_leaper_tables_match_reference():
+    for board in sample_positions(40, 13, max_plies=120):
+        for side in (Side.RED, Side.BLACK):
+            assert _generated(board, side, _LEAPERS) == _reference_moves(board, side, _LEAPERS), board.to_fen()
+
+
+def test_rank_file_slides_match_reference():
+    for board in sample_positions(40, 17, max_plies=120):
+        for side in (Side.RED, Side.BLACK):
+            assert _generated(board, side, _SLIDERS) == _reference_moves(board, side, _SLIDERS), board.to_fen()
@@ -0,0 +1,32 @@
+import pytest
+
+from xiangqi.core.board import Board
+from xiangqi.core.packed import PACKED_SIZE, pack, pack_many, unpack, unpack_many
+from xiangqi.tools.bench_movegen import sample_positions
+
+
+def _position(board: Board) -> list[str]:
+    return board.to_fen().split()[:2]  # 只编码盘面和走棋方，不含回合数
+
+
+def test_round_trip():
+    boards = sample_positions(30, 3, max_plies=80)
+    data = pack_many(boards)
+    assert len(data) == PACKED_SIZE * len(boards)
+    assert [pack(b) for b in boards] == [data[i:i + PACKED_SIZE] for i in range(0, len(data), PACKED_SIZE)]
+    for board, back in zip(boards, unpack_many(data)):
+        assert _position(back) == _position(board)
+        assert back.zobrist_key == board.zobrist_key
+        assert _position(Board.from_fen(board.to_fen())) == _position(board)  # FEN 往返
+    assert _position(unpack(pack(boards[0]))) == _position(boards[0])
+    assert pack_many([]) == b"" and unpack_many(b"") == []
+
+
+@pytest.mark.parametrize("data", [
+    b"\x00" * (PACKED_SIZE - 1),                        # 长度不对
+    b"\x00" * 45 + b"\x20",                             # 走棋方非法
+    b"\x80" + b"\x00" * (PACKED_SIZE - 1),              # 棋子代码 -8
+])
+def test_invalid_data_is_rejected(data):
+    with pytest.raises(ValueError):
+        unpack(data)
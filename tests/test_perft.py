@@ -0,0 +1,43 @@
+import pytest
+
+from xiangqi.core.board import Board
+from xiangqi.core.movegen import gen_legal_moves, gen_pseudo_legal_codes, gen_pseudo_legal_moves
+from xiangqi.tools.perft import REFERENCE_SUITE, divide, main, perft, play_moves, run_suite
+
+
+def test_reference_suite():
+    assert run_suite(max_depth=2)
+
+
+def test_initial_perft_3():
+    assert perft(Board.initial(), 3) == REFERENCE_SUITE[0][2][3]
+
+
+def test_divide_sums_to_perft():
+    board = play_moves(Board.initial(), REFERENCE_SUITE[1][1])
+    counts = divide(board, 2)
+    assert len(counts) == REFERENCE_SUITE[1][2][1]
+    assert sum(counts.values()) == REFERENCE_SUITE[1][2][2]
+    assert divide(board, 2, jobs=2) == counts  # 分给进程池结果不变
+    assert board.to_fen() == play_moves(Board.initial(), REFERENCE_SUITE[1][1]).to_fen()
+
+
+def test_command_line(capsys):
+    main(["--moves", "h2e2 h9g7", "--depth", "2", "--divide"])
+    out = capsys.readouterr().out.splitlines()
+    assert len(out) == REFERENCE_SUITE[1][2][1] + 1
+    assert out[-1].startswith(f"perft(2) = {REFERENCE_SUITE[1][2][2]} ")
+    with pytest.raises(SystemExit) as exc:
+        main(["--suite", "--depth", "1"])
+    assert exc.value.code == 0
+
+
+def test_move_wrappers_match_codes():
+    board = play_moves(Board.initial(), REFERENCE_SUITE[2][1])
+    codes = gen_pseudo_legal_codes(board, board.side_to_move)
+    moves = gen_pseudo_legal_moves(board, board.side_to_move)
+    assert [(c & 0x7F, c >> 7 & 0x7F) for c in codes] == [(m.frm, m.to) for m in moves]
+    # 追加到调用方给的列表
+    buf = [0]
+    assert gen_pseudo_legal_codes(board, board.side_to_move, buf) is buf and buf[1:] == codes
+    assert len(gen_legal_moves(board, board.side_to_move)) == REFERENCE_SUITE[2][2][1]
@@ -0,0 +1,7 @@
+from xiangqi.tools.perft import verify_in_check
+
+
+def test_in_check_matches_slow_implementation():
+    checked, mismatches = verify_in_check(games=2, seed=7)
+    assert checked > 1000
+    assert mismatches == []
@@ -0,0 +1,129 @@
+from xiangqi.ai.ai_config import INF, MATE_VALUE, MAX_PLY, SearchOptions
+from xiangqi.ai.eval import evaluate
+from xiangqi.ai.limits import SearchLimits
+from xiangqi.ai.search_v2 import SearchEngine
+from xiangqi.core.board import Board
+from xiangqi.core.const import START_FEN
+from xiangqi.core.move import MOVE_CAPTURED_MASK, MOVE_PIECE_SHIFT, MOVE_SQUARES_MASK, PIECE_OF_NIBBLE, parse_iccs
+from xiangqi.core.movegen import gen_legal_codes, gen_pseudo_legal_codes, validate_move
+from xiangqi.tools.bench_movegen import sample_positions
+
+MATED_FEN = "3k5/3R5/3R5/9/9/9/9/9/9/4K4 b"      # 黑方被将死
+STALEMATED_FEN = "3k5/8R/9/9/9/9/9/9/9/4K4 b"   # 黑方困毙
+MATE_IN_ONE_FEN = "3k5/R8/9/9/9/9/9/9/9/1R2K4 w"  # 红方一步杀
+
+
+def _engine(**options) -> SearchEngine:
+    engine = SearchEngine(1, options=SearchOptions(**options))
+    engine.log = lambda text: None
+    return engine
+
+
+def test_no_legal_moves_returns_none():
+    engine = _engine()
+    assert engine.search(Board.from_fen(START_FEN), limits=SearchLimits(depth=2)) is not None
+    # 上一次搜索的最佳走法不能被当作这个局面的结果
+    for fen in (MATED_FEN, STALEMATED_FEN):
+        assert engine.search(Board.from_fen(fen), limits=SearchLimits(depth=3)) is None
+        assert engine.best_move is None
+
+
+def test_quiescence_resolves_captures():
+    engine = _engine()
+    quiet = Board.from_fen("3k5/9/9/9/9/9/9/9/9/R3K4 w")
+    assert engine._quiesce(quiet, -INF, INF) == evaluate(quiet)  # 没有吃子：就是静态估值
+    hanging = Board.from_fen("r2k5/9/9/9/9/9/9/9/9/R3K4 w")     # 黑车无根
+    assert engine._quiesce(hanging, -INF, INF) > evaluate(hanging) + 100
+    assert engine._quiesce(Board.from_fen(MATED_FEN), -INF, INF) == -MATE_VALUE + 10
+    assert hanging.to_fen() == Board.from_fen("r2k5/9/9/9/9/9/9/9/9/R3K4 w").to_fen()
+
+
+def test_node_limited_search_is_deterministic():
+    results = []
+    for _ in range(2):
+        engine = _engine()
+        best = engine.search(Board.from_fen(START_FEN), limits=SearchLimits(nodes=3000))
+        results.append((best, engine.nodes_count, engine.qnodes_count))
+    assert results[0] == results[1]
+
+
+def test_search_stops_at_max_ply():
+    engine = _engine()
+    board = Board.from_fen(START_FEN)
+    # 最深一层直接静态搜索，不再使用（也不越界）每层的走法列表
+    assert engine._negamax(board, 3, -INF, INF, MAX_PLY - 1) == engine._quiesce(board, -INF, INF)
+    engine._negamax(board, 3, -INF, INF, MAX_PLY - 3)
+    assert board.to_fen() == Board.from_fen(START_FEN).to_fen()
+
+
+def test_new_game_resets_search_state():
+    fresh = _engine()
+    expected = fresh.search(Board.from_fen(START_FEN), limits=SearchLimits(depth=3))
+    engine = _engine()
+    engine.search(Board.from_fen("rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C4/9/RNBAKABNR b"),
+                  limits=SearchLimits(depth=3))
+    engine.new_game()
+    assert not any(engine.history) and not any(engine.counter_moves) and engine.tt.used == 0
+    # 和全新的引擎搜得一模一样
+    assert engine.search(Board.from_fen(START_FEN), limits=SearchLimits(depth=3)) == expected
+    assert engine.nodes_count == fresh.nodes_count and engine.qnodes_count == fresh.qnodes_count
+
+
+def test_no_counter_move_after_null_move():
+    seen = []
+
+    class Probe(SearchEngine):
+        def _staged_moves(self, board, side, tt_move, ply, prev_move):
+            last = board.move_codes[-1]
+            after_null = PIECE_OF_NIBBLE[last >> MOVE_PIECE_SHIFT & 0xF] * side > 0  # 上一步是本方走的
+            seen.append(after_null)
+            assert prev_move == (0 if after_null else last)
+            return super()._staged_moves(board, side, tt_move, ply, prev_move)
+
+    engine = Probe(1)
+    engine.log = lambda text: None
+    engine.search(Board.from_fen(START_FEN), limits=SearchLimits(depth=5))
+    assert any(seen) and not all(seen)
+
+
+def test_null_move_and_lmr_prune_without_missing_mate():
+    nodes = []
+    for options in ({"null_move": False, "lmr": False}, {}):
+        engine = _engine(**options)
+        engine.search(Board.from_fen(START_FEN), limits=SearchLimits(depth=5))
+        nodes.append(engine.nodes_count + engine.qnodes_count)
+        board = Board.from_fen(MATE_IN_ONE_FEN)
+        info = {}
+        best = engine.search(board, limits=SearchLimits(depth=4), on_info=info.update)
+        assert info["score"] >= MATE_VALUE - 10
+        board.make_move(best)
+        assert not gen_legal_codes(board, board.side_to_move)
+    assert nodes[1] * 2 < nodes[0]
+
+
+def test_pvs_and_aspiration_keep_the_score():
+    # 不做剪枝时，PVS 和渴望窗口只改变搜索顺序和窗口，定深分数与普通 alpha-beta 相同
+    board = Board.from_fen(START_FEN)
+    for text in ("h2e2", "h9g7", "h0g2", "i9h9"):
+        board.make_move(validate_move(board, parse_iccs(text), board.side_to_move))
+    scores = set()
+    for pvs, aspiration in ((False, False), (True, False), (True, True)):
+        engine = _engine(null_move=False, lmr=False, pvs=pvs, aspiration=aspiration)
+        info = {}
+        engine.search(board.copy(), limits=SearchLimits(depth=4), on_info=info.update)
+        scores.add(info["score"])
+    assert len(scores) == 1
+
+
+def test_staged_moves_yield_every_move_once():
+    engine = _engine()
+    for board in sample_positions(20, 5, max_plies=60):
+        side = board.side_to_move
+        codes = gen_pseudo_legal_codes(board, side)
+        tt_move = codes[-1] & MOVE_SQUARES_MASK  # 置换表只存起止格
+        engine.killers[2] = [codes[0] & MOVE_SQUARES_MASK, 0]
+        staged = list(engine._staged_moves(board, side, tt_move, 2, board.move_codes[-1] if board.move_codes else 0))
+        assert staged[0] == codes[-1]
+        assert sorted(staged) == sorted(codes)
+        captures = [mv for mv in staged[1:] if mv & MOVE_CAPTURED_MASK]
+        assert staged[1:len(captures) + 1] == captures  # 吃子在不吃子之前
@@ -0,0 +1,78 @@
+import multiprocessing as mp
+import os
+import threading
+
+import pytest
+
+from xiangqi.ai import smp
+from xiangqi.ai.limits import SearchLimits
+from xiangqi.core.board import Board
+from xiangqi.core.const import START_FEN
+
+MATED_FEN = "3k5/3R5/3R5/9/9/9/9/9/9/4K4 b"
+
+
+def _search(workers: int = 2) -> smp.ParallelSearch:
+    search = smp.ParallelSearch(workers=workers, tt_size_mb=1)
+    search.log = lambda text: None
+    return search
+
+
+def test_parallel_search_finds_move():
+    with _search() as search:
+        info = []
+        best = search.search(Board.from_fen(START_FEN), limits=SearchLimits(depth=2), on_info=info.append)
+        assert best is not None
+        assert [d["depth"] for d in info] == [1, 2]
+        assert len(search.results) == 2 and not any("error" in r for r in search.results)
+
+
+def test_helpers_are_reused_between_searches():
+    with _search() as search:
+        pids = [h[0].pid for h in search._helpers[1:]]
+        for _ in range(3):
+            assert search.search(Board.from_fen(START_FEN), max_depth=2) is not None
+        assert [h[0].pid for h in search._helpers[1:]] == pids
+
+
+def test_new_game_resets_all_workers():
+    with _search() as search:
+        search.search(Board.from_fen(START_FEN), max_depth=2)
+        search.new_game()
+        assert search.tt.used == 0 and not any(search.engine.history)
+        assert search.search(Board.from_fen(START_FEN), max_depth=2) is not None
+        assert not any("error" in r for r in search.results)
+
+
+def test_no_legal_moves_returns_none():
+    with _search() as search:
+        search.search(Board.from_fen(START_FEN), max_depth=2)
+        assert search.search(Board.from_fen(MATED_FEN), max_depth=2) is None
+
+
+def test_stop_event_ends_search():
+    stop = threading.Event()
+    stop.set()
+    with _search() as search:
+        # 第一轮都没搜完就被取消：返回兜底走法，不会卡住
+        assert search.search(Board.from_fen(START_FEN), stop_event=stop, limits=SearchLimits()) is not None
+
+
+def _raise(*args, **kwargs):
+    raise RuntimeError("boom")
+
+
+def _die(*args, **kwargs):
+    os._exit(3)
+
+
+# 用 monkeypatch 让辅助进程出错，需要 fork 方式启动（子进程继承补丁）
+@pytest.mark.skipif(mp.get_start_method() != "fork", reason="需要 fork 启动方式")
+@pytest.mark.parametrize("failure", [_raise, _die])
+def test_failed_helpers_do_not_hang(monkeypatch, failure):
+    monkeypatch.setattr(smp, "unpack", failure)
+    with _search(3) as search:
+        for _ in range(2):  # 退出的辅助进程在下一次搜索前重启
+            assert search.search(Board.from_fen(START_FEN), max_depth=2) is not None
+            assert len(search.results) == 3
+            assert all("error" in r for r in search.results if r["worker"])
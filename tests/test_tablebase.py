@@ -0,0 +1,57 @@
+import pytest
+
+from xiangqi.ai.limits import SearchLimits
+from xiangqi.ai.search_v2 import SearchEngine
+from xiangqi.ai.tablebase import Tablebase
+from xiangqi.core.board import Board
+from xiangqi.core.movegen import gen_legal_codes
+from xiangqi.tools.gen_tablebase import generate
+
+
+@pytest.fixture(scope="module")
+def kr_k(tmp_path_factory):
+    out = tmp_path_factory.mktemp("tb")
+    generate("KR-K", out, log=lambda text: None)
+    return out
+
+
+@pytest.mark.parametrize("fen, value", [
+    ("3k5/9/9/9/9/9/9/9/9/3RK4 b", -1),  # 已被将死
+    ("3k5/9/9/9/9/9/9/9/9/R3K4 w", 2),   # 一步杀
+    ("3kr4/9/9/9/9/9/9/9/9/5K3 w", -5),  # 黑方有车：查同一张表的翻转局面
+])
+def test_probe(kr_k, fen, value):
+    assert Tablebase(kr_k).probe(Board.from_fen(fen)) == value
+
+
+def test_values_are_consistent(kr_k):
+    # 胜局 v 一定有一步走到对方 -(v-1) 的局面，负局的每一步都走到对方胜的局面
+    tb = Tablebase(kr_k)
+    board = Board.from_fen("4k4/9/9/9/9/9/9/9/9/R2K5 w")
+    v = tb.probe(board)
+    assert v > 0
+    while v != -1:
+        replies = []
+        for code in gen_legal_codes(board, board.side_to_move):
+            board.make(code)
+            replies.append((tb.probe(board), code))
+            board.unmake()
+        if v > 0:  # 胜方走最快的杀法，负方走最长的抵抗
+            best = max(r for r in replies if r[0] < 0)
+            assert best[0] == -(v - 1)
+        else:
+            assert all(r > 0 for r, _ in replies)
+            best = max(replies)
+            assert best[0] == -v - 1
+        v = best[0]
+        board.make(best[1])
+    assert not gen_legal_codes(board, board.side_to_move)
+
+
+def test_search_uses_tablebase(kr_k):
+    engine = SearchEngine(1, tablebase=Tablebase(kr_k))
+    engine.log = lambda text: None
+    board = Board.from_fen("3k5/9/9/9/9/9/9/9/9/R3K4 w")
+    board.make_move(engine.search(board.copy(), limits=SearchLimits(depth=2)))
+    assert engine.tb_hits > 0
+    assert not gen_legal_codes(board, board.side_to_move)
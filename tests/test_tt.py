@@ -0,0 +1,57 @@
+import random
+
+from xiangqi.ai.tt import (BUCKET_SIZE, ENTRY_BYTES, EXACT, LOWERBOUND, UPPERBOUND, TranspositionTable,
+                           encode_move, table_bytes)
+
+
+def _key(bucket: int, check: int, tt: TranspositionTable) -> int:
+    """落在第 bucket 组、校验位为 check 的局面哈希"""
+    return check << 48 | (bucket - (check << 48)) % tt.n_buckets
+
+
+def test_store_and_probe():
+    tt = TranspositionTable(0.01)
+    key = _key(3, 7, tt)
+    assert tt.probe(key) is None
+    tt.store(key, 5, -1234, LOWERBOUND, encode_move(10, 20))
+    assert tt.probe(key) == (5, -1234, LOWERBOUND, encode_move(10, 20))
+    assert tt.probe(_key(3, 8, tt)) is None  # 同一组、校验位不同
+    # 更浅的非精确结果不覆盖；不带走法的存储保留原来的走法
+    tt.store(key, 2, 0, UPPERBOUND, 0)
+    assert tt.probe(key) == (5, -1234, LOWERBOUND, encode_move(10, 20))
+    tt.store(key, 6, 99, EXACT, 0)
+    assert tt.probe(key) == (6, 99, EXACT, encode_move(10, 20))
+    assert tt.used == 1
+
+
+def test_size_is_fixed():
+    tt = TranspositionTable(0.05)
+    assert len(tt) * ENTRY_BYTES == table_bytes(0.05) <= 0.05 * 1024 * 1024
+    rng = random.Random(3)
+    for i in range(8 * len(tt)):
+        tt.store(rng.getrandbits(64), i % 20, i, EXACT, 0)
+    assert len(tt) * ENTRY_BYTES == table_bytes(0.05)
+    assert tt.hashfull() == 1000
+
+
+def test_replacement_prefers_shallow_and_old_entries():
+    tt = TranspositionTable(0.01)
+    keys = [_key(0, c, tt) for c in range(1, BUCKET_SIZE + 1)]
+    for depth, key in enumerate(keys, 1):
+        tt.store(key, depth * 2, 0, EXACT, 0)
+    tt.store(_key(0, 99, tt), 3, 0, EXACT, 0)  # 组满：替换最浅的
+    assert tt.probe(keys[0]) is None and tt.probe(_key(0, 99, tt)) is not None
+    for _ in range(3):
+        tt.new_search()
+    tt.store(_key(0, 100, tt), 1, 0, EXACT, 0)
+    tt.store(_key(0, 101, tt), 1, 0, EXACT, 0)  # 本代的浅条目保留，换掉旧代数的深条目
+    assert tt.probe(_key(0, 100, tt)) is not None and tt.probe(_key(0, 101, tt)) is not None
+    assert tt.probe(keys[1]) is None and tt.probe(keys[-1]) is not None
+
+
+def test_clear():
+    tt = TranspositionTable(0.01)
+    tt.new_search()
+    tt.store(_key(1, 1, tt), 4, 10, EXACT, 0)
+    tt.clear()
+    assert tt.probe(_key(1, 1, tt)) is None and tt.used == 0 and tt.age == 0
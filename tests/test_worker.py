@@ -0,0 +1,42 @@
+from xiangqi.ai.search_v2 import SearchEngine
+from xiangqi.ai.worker import SearchWorker
+from xiangqi.core.board import Board
+from xiangqi.core.const import START_FEN
+
+
+def _worker() -> SearchWorker:
+    engine = SearchEngine(1)
+    engine.log = lambda text: None
+    return SearchWorker(engine)
+
+
+def test_cancel_discards_finished_result():
+    worker = _worker()
+    worker.start(Board.from_fen(START_FEN), 2)
+    worker._thread.join()
+    assert worker.done and worker.result is not None
+    worker.cancel()
+    assert not worker.done and worker.result is None
+
+
+def test_cancel_discards_finished_ponder():
+    worker = _worker()
+    worker.ponder(Board.from_fen(START_FEN), 2, None)
+    worker._thread.join()
+    worker.cancel()  # 例如悔棋、终局
+    assert not worker.done and worker.result is None
+    assert not worker.pondering
+
+
+def test_ponder_ignores_time_limit_until_hit():
+    worker = _worker()
+    worker.engine.time_limit = 0.05
+    board = Board.from_fen(START_FEN)
+    guess = worker.engine.search(board.copy(), max_depth=1)
+    worker.ponder(board, 30, guess)
+    worker._thread.join(0.5)
+    assert worker._thread.is_alive()  # 后台思考不受时间限制
+    assert worker.ponder_hit(guess)
+    worker._thread.join(5)  # 猜中后开始计时，很快停下
+    assert not worker._thread.is_alive()
+    assert worker.done and worker.result is not None
@@ -1,130 +1,57 @@
-from ..core.const import Piece
+from dataclasses import dataclass
+from pathlib import Path
+from ..core.pst import PIECE_PER_VALUE, PIECE_VALUES_TABLE  # noqa: F401（数值见 core/pst.py）
 
 # =========================================================
-# 第一部分：棋子价值表 (Material Value)
+# 第一、二部分：棋子价值表、位置价值表 (PST)
 # =========================================================
-# 参考: ElephantEye 中的标准分值 + 象棋理论
-PIECE_PER_VALUE = {
-    Piece.SHUAI: 8888,   # 将帅：无法交换，用极大值表示游戏结束
-    Piece.CHE: 194,       # 车：最强棋子
-    Piece.PAO: 96,       # 炮：需要炮架才能发挥威力
-    Piece.MA: 85,        # 马：比车弱，受限于日字跳跃
-    Piece.XIANG: 20,      # 象/相：纯防御，不过河
-    Piece.SHI: 20,        # 士/仕：护卫将帅，限于九宫
-    Piece.BING: 7,       # 兵/卒：最弱单位
-    Piece.EMPTY: 0        # 空位
-}
+# 数值定义在 core/pst.py：Board 增量维护局面分要用，core 不能依赖 ai，本文件在开头重新导出
+
 
 # ==========================================================
-# 第二部分：位置价值表 (Piece-Square Tables, PST)
+# 第三部分：固定的值
 # ==========================================================
-# 编码思路：每个棋子在 10×9 棋盘的各位置有不同价值加成
-# 设计原则：
-#   - 都以红方视角编码（黑方镜像翻转）
-#   - 行序：0=黑底线，9=红底线
-#   - 列序：0=黑左，8=黑右（从黑方视角看）
-#
-# 参考引擎：Pikafish（NNUE神经网络）、ElephantEye（手工PST）
-# 数据来源：公开的象棋引擎配置和棋谱学习
 
-PIECE_VALUES_TABLE = {
-    Piece.BING: [
-        [ 9,  9,  9, 11, 13, 11,  9,  9,  9],
-		[19, 24, 34, 42, 44, 42, 34, 24, 19],
-		[19, 24, 32, 37, 37, 37, 32, 24, 19],
-		[19, 23, 27, 29, 30, 29, 27, 23, 19],
-		[14, 18, 20, 27, 29, 27, 20, 18, 14],
-
-		[ 7,  0, 13,  0, 16,  0, 13,  0,  7],
-		[ 7,  0,  7,  0, 15,  0,  7,  0,  7],
-		[ 0,  0,  0,  0,  0,  0,  0,  0,  0],
-		[ 0,  0,  0,  0,  0,  0,  0,  0,  0],
-		[ 0,  0,  0,  0,  0,  0,  0,  0,  0]
-    ],
-    Piece.MA: [
-        [90, 90, 90, 96, 90, 96, 90, 90, 90],
-		[90, 96,103, 97, 94, 97,103, 96, 90],
-		[92, 98, 99,103, 99,103, 99, 98, 92],
-		[93,108,100,107,100,107,100,108, 93],
-		[90,100, 99,103,104,103, 99,100, 90],
+INF = float('inf')  # 无穷大值
+MATE_VALUE = 200000
 
-		[90, 98,101,102,103,102,101, 98, 90],
-		[92, 94, 98, 95, 98, 95, 98, 94, 92],
-		[93, 92, 94, 95, 92, 95, 94, 92, 93],
-		[85, 90, 92, 93, 78, 93, 92, 90, 85],
-		[88, 85, 90, 88, 90, 88, 90, 85, 88]
-    ],
-    Piece.CHE: [
-        [206, 208, 207, 213, 214, 213, 207, 208, 206],
-		[206, 212, 209, 216, 233, 216, 209, 212, 206],
-		[206, 208, 207, 214, 216, 214, 207, 208, 206],
-		[206, 213, 213, 216, 216, 216, 213, 213, 206],
-		[208, 211, 211, 214, 215, 214, 211, 211, 208],
+# 置换表默认大小（MB）
+TT_SIZE_MB = 16
 
-		[208, 212, 212, 214, 215, 214, 212, 212, 208],
-		[204, 209, 204, 212, 214, 212, 204, 209, 204],
-		[198, 208, 204, 212, 212, 212, 204, 208, 198],
-		[200, 208, 206, 212, 200, 212, 206, 208, 200],
-		[194, 206, 204, 212, 200, 212, 204, 206, 194]
-    ],
-    Piece.SHI: [
-        [0, 0, 0,20, 0,20, 0, 0, 0],
-		[0, 0, 0, 0,23, 0, 0, 0, 0],
-		[0, 0, 0,20, 0,20, 0, 0, 0],
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+# 搜索最大层数（杀手走法表等按层分配）
+MAX_PLY = 64
 
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
-		[0, 0, 0,20, 0,20, 0, 0, 0],
-		[0, 0, 0, 0,23, 0, 0, 0, 0],
-		[0, 0, 0,20, 0,20, 0, 0, 0]
-    ],
-    Piece.PAO: [
-        [100, 100,  96, 91,  90, 91,  96, 100, 100],
-		[ 98,  98,  96, 92,  89, 92,  96,  98,  98],
-		[ 97,  97,  96, 91,  92, 91,  96,  97,  97],
-		[ 96,  99,  99, 98, 100, 98,  99,  99,  96],
-		[ 96,  96,  96, 96, 100, 96,  96,  96,  96],
+# 静态搜索 delta 剪枝余量：吃掉这个子后仍比 alpha 低这么多，就不再搜
+QS_DELTA_MARGIN = 100
 
-		[ 95,  96,  99, 96, 100, 96,  99,  96,  95],
-		[ 96,  96,  96, 96,  96, 96,  96,  96,  96],
-		[ 97,  96, 100, 99, 101, 99, 100,  96,  97],
-		[ 96,  97,  98, 98,  98, 98,  98,  97,  96],
-		[ 96,  96,  97, 99,  99, 99,  97,  96,  96]
-    ],
-    Piece.XIANG: [
-        [0, 0,20, 0, 0, 0,20, 0, 0],
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
-		[0, 0, 0, 0,23, 0, 0, 0, 0],
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
-		[0, 0,20, 0, 0, 0,20, 0, 0],
+# 默认开局库文件（python -m xiangqi.tools.build_book 生成），不存在时不使用开局库
+OPENING_BOOK_PATH = Path(__file__).parent.parent / "assets" / "book" / "opening.xqb"
 
-		[0, 0,20, 0, 0, 0,20, 0, 0],
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
-		[18,0, 0, 0,23, 0, 0, 0,18],
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
-		[0, 0,20, 0, 0, 0,20, 0, 0]
-    ],
-    Piece.SHUAI: [
-        [0, 0, 0, 8888, 8888, 8888, 0, 0, 0],
-		[0, 0, 0, 8888, 8888, 8888, 0, 0, 0],
-		[0, 0, 0, 8888, 8888, 8888, 0, 0, 0],
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+# 默认残局库目录（python -m xiangqi.tools.gen_tablebase 生成），不存在时不使用残局库
+TABLEBASE_DIR = Path(__file__).parent.parent / "assets" / "tablebase"
 
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
-		[0, 0, 0, 0, 0, 0, 0, 0, 0],
-		[0, 0, 0, 8888, 8888, 8888, 0, 0, 0],
-		[0, 0, 0, 8888, 8888, 8888, 0, 0, 0],
-		[0, 0, 0, 8888, 8888, 8888, 0, 0, 0]
-    ]
-}
+# 残局库必胜局面的分数：TB_WIN_VALUE - 杀棋步数（步数越少分越高），低于搜索中真正看到的杀棋分
+TB_WIN_VALUE = MATE_VALUE - 1000
 
 
 # ==========================================================
-# 第三部分：固定的值
+# 第四部分：搜索选项（各项剪枝可单独开关，便于对比效果）
 # ==========================================================
 
-INF = float('inf')  # 无穷大值
-MATE_VALUE = 200000
+@dataclass
+class SearchOptions:
+    # 空着剪枝：让对方连走两步仍 >= beta，则本节点直接剪掉
+    null_move: bool = True
+    null_move_reduction: int = 2      # 空着搜索的深度缩减 R
+    null_move_min_depth: int = 3
+    null_move_verify_pieces: int = 2  # 己方进攻子（车马炮兵）不多于此数时视为残局，空着成功后还要做验证搜索
+    # 后期走法缩减：排在后面的不吃子、不将军走法先用浅一层搜索，超过 alpha 再用全深度重搜
+    lmr: bool = True
+    lmr_min_depth: int = 3
+    lmr_min_moves: int = 4            # 前几个走法不缩减
+    # 主要变例搜索：第一个走法用完整窗口，其余先用零窗口证明"不比它好"，失败再重搜
+    pvs: bool = True
+    # 渴望窗口：以上一轮分数为中心的窄窗口搜索根节点，失败则逐步放宽
+    aspiration: bool = True
+    aspiration_window: int = 100
+    aspiration_max_window: int = 800  # 放宽到超过此值后直接改用无穷窗口
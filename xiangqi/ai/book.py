@@ -0,0 +1,113 @@
+from __future__ import annotations
+import mmap
+import os
+import random
+import struct
+
+from ..core.board import Board
+from ..core.move import Move
+from ..core.movegen import validate_move
+from ..core.rules import in_check
+from .tt import decode_move
+
+# 开局库文件格式（小端）：
+#   文件头 16 字节：魔数 b"XQBK"、版本号 u32、记录数 u64
+#   之后是按 (局面哈希, 走法) 升序排列的定长记录，每条 20 字节：
+#     局面哈希 u64（Board.zobrist_key）、走法 u16（tt.encode_move）、保留 u16、权重 u32、局数 u32
+# 权重 = 每局 1 分（只要走过就算）+ 该走法对走棋方的得分（胜 2、和 1、负 0；结果未知不加），
+# 所以只有走法没有结果的棋谱按局数（流行程度）选，只输过的走法也不会被完全排除；查询时按权重随机选择
+# 查询用 mmap + 二分查找，不把文件读进内存
+
+BOOK_MAGIC = b"XQBK"
+BOOK_VERSION = 2
+HEADER = struct.Struct("<4sIQ")
+RECORD = struct.Struct("<QHxxII")
+RECORD_BYTES = RECORD.size
+WEIGHT_MAX = 0xFFFFFFFF
+GAMES_MAX = 0xFFFFFFFF
+
+_KEY = struct.Struct("<Q")
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:  # 空文件无法 mmap，先给出明确的错误
+                raise ValueError(f"开局库文件为空或不完整: {path}")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self._mm, 0)
+        if magic != BOOK_MAGIC:
+            self._mm.close()
+            raise ValueError(f"不是开局库文件: {path}")
+        if version != BOOK_VERSION:
+            self._mm.close()
+            raise ValueError(f"开局库版本 {version} 不受支持（需要 {BOOK_VERSION}，请用 build_book 重新生成）: {path}")
+        if count == 0:
+            self._mm.close()
+            raise ValueError(f"开局库没有任何记录: {path}")
+        if HEADER.size + count * RECORD_BYTES > len(self._mm):
+            self._mm.close()
+            raise ValueError(f"开局库文件不完整: {path}")
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _key_at(self, i: int) -> int:
+        return _KEY.unpack_from(self._mm, HEADER.size + i * RECORD_BYTES)[0]
+
+    def probe(self, key: int) -> list[tuple[int, int, int]]:
+        """二分查找局面哈希，返回该局面所有的 (走法编码, 权重, 局数)"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        entries = []
+        mm = self._mm
+        for i in range(lo, self.count):
+            k, move_code, weight, games = RECORD.unpack_from(mm, HEADER.size + i * RECORD_BYTES)
+            if k != key:
+                break
+            entries.append((move_code, weight, games))
+        return entries
+
+    def choose(self, board: Board, rng: random.Random | None = None) -> Move | None:
+        """
+        为当前局面选一步库内走法（已在棋盘上校验合法），没有则返回 None
+        rng 为空时固定选权重最大的走法，否则按权重随机（权重全为 0 时改按局数）
+        """
+        side = board.side_to_move
+        entries = self.probe(board.zobrist_key)
+        use_games = not any(weight for _, weight, _ in entries)
+        candidates: list[tuple[Move, int]] = []
+        for move_code, weight, games in entries:
+            if use_games:
+                weight = games
+            if not weight:
+                continue
+            mv = validate_move(board, Move(*decode_move(move_code)), side)
+            if mv is None:
+                continue
+            board.make_move(mv)
+            legal = not in_check(board, side)
+            board.undo_move()
+            if legal:
+                candidates.append((mv, weight))
+        if not candidates:
+            return None
+        if rng is None:
+            return max(candidates, key=lambda c: c[1])[0]
+        return rng.choices([c[0] for c in candidates], weights=[c[1] for c in candidates])[0]
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -14,7 +14,19 @@ def _get_pst_value(piece_type: int, r: int, c: int) -> int:
 
 def evaluate(board: Board) -> int:
     """
-    静态估值函数
+    静态估值函数（O(1)：直接读取 Board 增量维护的 子力+位置 分）
+    返回分值: 正数代表红方优势，负数代表黑方优势
+    """
+    if board.king_square(Side.RED) is None:
+        return -MATE_VALUE  # 黑方胜
+    if board.king_square(Side.BLACK) is None:
+        return MATE_VALUE   # 红方胜
+    return board.pst_score
+
+
+def evaluate_full(board: Board) -> int:
+    """
+    全盘重算的静态估值（与 evaluate 结果一致，用于校验增量更新）
     返回分值: 正数代表红方优势，负数代表黑方优势
     """
     red_shuai = any(piece == Piece.SHUAI for piece in board.squares)
@@ -41,4 +53,4 @@ def evaluate(board: Board) -> int:
             score += base_value + pst_value
         else:
             score -= (base_value + pst_value)
-    return score
\ No newline at end of file
+    return score
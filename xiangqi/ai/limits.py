@@ -0,0 +1,96 @@
+from __future__ import annotations
+import time
+from dataclasses import dataclass
+
+from .ai_config import MAX_PLY
+
+# 搜索限制：深度、节点数、时间，在搜索树内部每隔 check_every 个节点检查一次，
+# 超限时抛出 SearchAborted，搜索返回最近一次完整迭代的最佳走法
+# 只限制深度/节点数（不设任何时间）时，同一个局面、同样初始状态的搜索结果完全确定，
+# 可用于按节点数规划每步的计算量
+
+
+class SearchAborted(Exception):
+    """搜索被取消或超出限制时在搜索树内部抛出，由搜索入口捕获"""
+
+
+# movetime 模式下软上限占总时间的比例：超过后不再开始新一轮迭代（新一轮通常比之前所有轮加起来还久）
+SOFT_TIME_RATIO = 0.5
+
+
+@dataclass
+class SearchLimits:
+    depth: int = MAX_PLY               # 最大迭代深度
+    nodes: int | None = None           # 节点预算（含静态搜索节点），到达即停
+    movetime: float | None = None      # 每步墙钟时间（秒）：硬上限，软上限取 SOFT_TIME_RATIO 倍
+    soft_time: float | None = None     # 软上限（秒）：超过后不再开始新一轮迭代
+    hard_time: float | None = None     # 硬上限（秒）：到点在搜索树内部立即停止
+    check_every: int = 256             # 每多少个节点检查一次节点数/时间/取消令牌（2 的幂）
+
+    @property
+    def deterministic(self) -> bool:
+        """不受时间影响（只限深度/节点数）"""
+        return self.movetime is None and self.soft_time is None and self.hard_time is None
+
+
+class LimitChecker:
+    """一次搜索的限制检查：开始时算好截止时刻，搜索中按节点数轮询"""
+
+    def __init__(self, limits: SearchLimits, stop_event=None, ponder: bool = False):
+        """ponder 为 True 时是后台思考：先不计时，等 start_clock()（对方走了猜中的棋）后才开始算时间限制"""
+        self.limits = limits
+        self.stop_event = stop_event
+        self.start = time.time()
+        self.soft_deadline = None
+        self.hard_deadline = None
+        if not ponder:
+            self.start_clock()
+        self.mask = max(1, limits.check_every) - 1
+        self.nodes = 0  # 由不自己计数的搜索（如 search.minimax）通过 tick() 累加
+
+    def start_clock(self) -> None:
+        """从现在起计算软/硬时间上限"""
+        limits = self.limits
+        soft, hard = limits.soft_time, limits.hard_time
+        if limits.movetime is not None:
+            hard = limits.movetime if hard is None else min(hard, limits.movetime)
+            if soft is None:
+                soft = limits.movetime * SOFT_TIME_RATIO
+        now = time.time()
+        self.soft_deadline = None if soft is None else now + soft
+        self.hard_deadline = None if hard is None else now + hard
+
+    def should_stop(self, nodes: int) -> bool:
+        """取消令牌被置位、节点数用完或过了硬上限"""
+        if self.stop_event is not None and self.stop_event.is_set():
+            return True
+        if self.limits.nodes is not None and nodes >= self.limits.nodes:
+            return True
+        return self.hard_deadline is not None and time.time() >= self.hard_deadline
+
+    def tick(self) -> None:
+        """计一个节点，每 check_every 个节点检查一次，超限抛出 SearchAborted"""
+        self.nodes += 1
+        if not self.nodes & self.mask and self.should_stop(self.nodes):
+            raise SearchAborted
+
+    def soft_expired(self) -> bool:
+        """是否过了软上限（迭代之间调用，决定是否开始下一轮）"""
+        return self.soft_deadline is not None and time.time() >= self.soft_deadline
+
+    def elapsed(self) -> float:
+        return time.time() - self.start
+
+
+# 按局时分配每步用时：没给剩余步数时按还要走 DEFAULT_MOVES_TO_GO 步估算
+DEFAULT_MOVES_TO_GO = 30
+TIME_MARGIN = 0.05  # 留给通信等开销的时间（秒）
+
+
+def allocate_time(remaining: float, increment: float = 0.0, movestogo: int | None = None) -> SearchLimits:
+    """由剩余时间、每步加秒和到下次加时的步数（单位秒）算出本步的软/硬时间上限"""
+    remaining = max(0.0, remaining - TIME_MARGIN)
+    mtg = movestogo if movestogo else DEFAULT_MOVES_TO_GO
+    soft = remaining / mtg + increment * 0.75
+    hard = min(soft * 4, remaining / 2 + increment * 0.75) if mtg > 1 else remaining
+    return SearchLimits(soft_time=min(soft, hard), hard_time=max(hard, 0.01))
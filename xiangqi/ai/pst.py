@@ -0,0 +1,4 @@
+# 子力+位置 分值表
+# - 实现已移至 core/pst.py（Board 需要增量维护局面分），此处保留旧的导入路径
+from __future__ import annotations
+from ..core.pst import PST, calc_pst_score
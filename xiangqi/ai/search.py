@@ -2,10 +2,12 @@ from .eval import evaluate
 from ..core.const import Side
 from ..core.rules import in_check
 from ..core.movegen import gen_legal_moves
-import time
 from .ai_config import INF
+from .limits import SearchAborted, SearchLimits, LimitChecker
 
-def minimax(board, depth, alpha, beta, is_red_turn):
+def minimax(board, depth, alpha, beta, is_red_turn, checker=None):
+    if checker is not None:
+        checker.tick()  # 每 check_every 个节点检查一次限制，超限抛出 SearchAborted
     if depth == 0:
         return evaluate(board)
 
@@ -13,7 +15,7 @@ def minimax(board, depth, alpha, beta, is_red_turn):
         max_eval = -INF
         for move in gen_legal_moves(board, Side.RED):
             board.make_move(move)
-            eval = minimax(board, depth - 1, alpha, beta, False)
+            eval = minimax(board, depth - 1, alpha, beta, False, checker)
             board.undo_move()
             max_eval = max(max_eval, eval)
             alpha = max(alpha, eval)
@@ -24,7 +26,7 @@ def minimax(board, depth, alpha, beta, is_red_turn):
         min_eval = INF
         for move in gen_legal_moves(board, Side.BLACK):
             board.make_move(move)
-            eval = minimax(board, depth - 1, alpha, beta, True)
+            eval = minimax(board, depth - 1, alpha, beta, True, checker)
             board.undo_move()
             min_eval = min(min_eval, eval)
             beta = min(beta, eval)
@@ -44,37 +46,49 @@ def order_moves(board, moves):
         return score
     return sorted(moves, key=move_score, reverse=True)
 
-def find_best_move(board, max_depth=3, time_limit=5.0):
+def find_best_move(board, max_depth=3, time_limit=5.0, limits=None):
+    """limits 为空时限制为 max_depth 层、time_limit 秒（搜索树内部检查），超限返回已完成迭代的最佳走法"""
+    if limits is None:
+        limits = SearchLimits(depth=max_depth, hard_time=time_limit)
+    checker = LimitChecker(limits)
     best_move = None
     is_red_turn = board.side_to_move == Side.RED
-    start_time = time.time()
+    root_len = len(board.move_codes)
 
-    for current_depth in range(1, max_depth + 1):
+    for current_depth in range(1, limits.depth + 1):
         current_iter_best_move = None
         alpha = -INF
         beta = INF
         moves = order_moves(board, gen_legal_moves(board, board.side_to_move))
+        if best_move is None and moves:
+            best_move = moves[0]
 
-        for move in moves:
-            if time.time() - start_time > time_limit:
-                break
-            board.make_move(move)
-            board_value = minimax(board, current_depth - 1, alpha, beta, not is_red_turn)
-            board.undo_move()
+        try:
+            for move in moves:
+                board.make_move(move)
+                board_value = minimax(board, current_depth - 1, alpha, beta, not is_red_turn, checker)
+                board.undo_move()
 
-            if is_red_turn:
-                if board_value > alpha:
-                    alpha = board_value
-                    current_iter_best_move = move
-            else:
-                if board_value < beta:
-                    beta = board_value
-                    current_iter_best_move = move
+                if is_red_turn:
+                    if board_value > alpha:
+                        alpha = board_value
+                        current_iter_best_move = move
+                else:
+                    if board_value < beta:
+                        beta = board_value
+                        current_iter_best_move = move
+        except SearchAborted:
+            while len(board.move_codes) > root_len:
+                board.undo_move()
+            print(f"深度 {current_depth} 中止 | 耗时: {checker.elapsed():.2f}s")
+            break
 
         if current_iter_best_move is not None:
             best_move = current_iter_best_move
         best_value = alpha if is_red_turn else beta
         print(
-                f"深度 {current_depth} 完成 | 分数: {best_value} | 最佳: {current_iter_best_move} | 耗时: {time.time() - start_time:.2f}s")
+                f"深度 {current_depth} 完成 | 分数: {best_value} | 最佳: {current_iter_best_move} | 耗时: {checker.elapsed():.2f}s")
+        if checker.soft_expired():
+            break
 
     return best_move
\ No newline at end of file
@@ -1,142 +1,467 @@
 from __future__ import annotations
-import time
+import random
+import threading
+from typing import Callable
 from ..core.board import Board
-from ..core.move import Move
-from ..core.movegen import gen_legal_moves
+from ..core.move import (Move, MOVE_TO_SHIFT, MOVE_CAPTURED_SHIFT, MOVE_SQUARES_MASK, MOVE_CAPTURED_MASK,
+                         PIECE_OF_NIBBLE, code_to_move)
+from ..core.movegen import gen_legal_codes, gen_capture_codes, gen_quiet_codes, validate_code
+from ..core.rules import in_check
 from ..core.const import Side, Piece
 from .eval import evaluate
-from .zobrist import calc_zobrist_key
-from .ai_config import INF, MATE_VALUE
+from .ai_config import INF, MATE_VALUE, PIECE_PER_VALUE, QS_DELTA_MARGIN, TT_SIZE_MB, MAX_PLY, TB_WIN_VALUE, SearchOptions
+from .pst import PST
+from .tt import TranspositionTable, EXACT, LOWERBOUND, UPPERBOUND
+from .book import OpeningBook
+from .tablebase import Tablebase
+from .limits import SearchAborted, SearchLimits, LimitChecker
+
+
+def _build_mvv_lva() -> tuple[int, ...]:
+    """
+    吃子排序分，按走法编码的第 14..21 位（被吃子、走动的子）查表：
+    先吃价值高的子（MVV），同样的被吃子用价值低的子去吃（LVA）
+    """
+    table = []
+    for i in range(256):
+        captured, piece = PIECE_OF_NIBBLE[i & 0xF], PIECE_OF_NIBBLE[i >> 4]
+        table.append(PIECE_PER_VALUE.get(abs(captured), 0) * 16 - PIECE_PER_VALUE.get(abs(piece), 0) // 16)
+    return tuple(table)
+
+
+_MVV_LVA = _build_mvv_lva()
+_HEURISTIC_SIZE = MOVE_SQUARES_MASK + 1  # 历史表、应对走法表按走法编码的低 14 位（起止格）索引
+
+
+def _mvv_lva(code: int) -> int:
+    return _MVV_LVA[code >> MOVE_CAPTURED_SHIFT]
 
 
 class SearchEngine:
-    def __init__(self):
+    def __init__(self, tt_size_mb: float = TT_SIZE_MB, options: SearchOptions | None = None,
+                 book: OpeningBook | None = None, tablebase: Tablebase | None = None):
+        self.options = options if options is not None else SearchOptions()
+        self.book = book  # 开局库，搜索前先查库
+        self.tablebase = tablebase  # 残局库，子数足够少时直接查库
+        self.tb_hits = 0
+        self.book_rng: random.Random | None = random.Random()  # 为 None 时固定走库内权重最大的走法
         self.nodes_count = 0
+        self.qnodes_count = 0  # 静态搜索节点数（不含在 nodes_count 中）
         self.best_move: Move | None = None  # 记录整次搜索的最佳走法
+        self.completed_depth = 0  # 最近一次搜索完整搜完的深度
         self.start_time = 0
-        self.time_limit = 10.0
-        self.tt = {}  # 置换表放入实例中
-
-    def _get_move_score(self, m: Move, pv_move: Move | None) -> int:
-
-        if pv_move and m.frm == pv_move.frm and m.to == pv_move.to:
+        self.time_limit = 10.0  # 未传 limits 时的默认硬时间上限（秒）
+        self.tt = TranspositionTable(tt_size_mb)  # 置换表放入实例中（定长，不会无限增长）
+        # 不吃子走法的排序启发（走法均用起止格编码，即整数走法编码的低 14 位）
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]   # 每层两个杀手走法
+        self.history = [0] * _HEURISTIC_SIZE              # 历史表 [走法起止格]
+        self.counter_moves = [0] * _HEURISTIC_SIZE        # 应对走法 [对方上一步的起止格]
+        self._move_buffers = [([], []) for _ in range(MAX_PLY)]  # 每层的 (吃子, 不吃子) 走法列表，反复使用
+        self._checker = LimitChecker(SearchLimits())  # 本次搜索的限制（节点数、时间、取消令牌）
+        self._check_mask = self._checker.mask
+        self.log: Callable[[str], None] = print  # 搜索过程的文字输出（无界面时可换掉，避免写乱标准输出）
+
+    def _get_move_score(self, code: int, pv_code: int) -> int:
+
+        if pv_code and code & MOVE_SQUARES_MASK == pv_code & MOVE_SQUARES_MASK:
             return 1000000
-        if m.captured:
-            return abs(m.captured) * 10
+        if code & MOVE_CAPTURED_MASK:
+            return abs(PIECE_OF_NIBBLE[code >> MOVE_CAPTURED_SHIFT & 0xF]) * 10
         return 0
 
-    def search(self, board: Board, max_depth: int = 4) -> Move | None:
-
+    def search(self, board: Board, max_depth: int = 4, stop_event: threading.Event | None = None,
+               on_info: Callable[[dict], None] | None = None, limits: SearchLimits | None = None,
+               ponder: bool = False) -> Move | None:
+        """
+        迭代加深搜索，返回最佳走法
+        - stop_event: 取消令牌，被置位后搜索尽快停止，返回已完成迭代的最佳走法
+        - on_info: 每完成一层调用一次，参数为 {depth, score, move, nodes, time}
+        - limits: 深度/节点数/时间限制；为空时限制为 max_depth 层、time_limit 秒
+        - ponder: 后台思考，时间限制等调用 ponderhit() 后才开始计算
+        超出节点数或硬时间上限时在搜索树内部停止，同样返回已完成迭代的最佳走法
+        """
+        if limits is None:
+            limits = SearchLimits(depth=max_depth, hard_time=self.time_limit)
+        self._checker = LimitChecker(limits, stop_event, ponder)
+        self._check_mask = self._checker.mask
         self.nodes_count = 0
-        self.start_time = time.time()
-        # self.best_move = None
+        self.qnodes_count = 0
+        self.tb_hits = 0
+        self.start_time = self._checker.start
+        self.tt.new_search()
+        self._age_heuristics()
+        self.completed_depth = 0
+        prev_best_move = self.best_move  # 上次搜索的最佳走法只用来给根走法排序
+        self.best_move = None
         # self.tt.clear()
-
-        for current_depth in range(1, max_depth + 1):
-            # 1. 生成根节点走法
-            moves = gen_legal_moves(board, board.side_to_move)
-            if not moves:
-                break
-
-            # 2. 根节点排序
-            # 优化：利用上一轮迭代找到的 self.best_move 来优化这一轮的排序
-            moves.sort(key=lambda m: self._get_move_score(m, self.best_move), reverse=True)
-
-            alpha = -INF
-            beta = INF
-            global_best_val = -INF
-            current_iter_best_move = None
-
-            # 3. 根节点搜索
-            for mv in moves:
-                board.make_move(mv)
-
-                # 窗口反转: -beta, -alpha
-                val = -self._negamax(board, current_depth - 1, -beta, -alpha)
-
-                board.undo_move()
-
-                # 找到更好的走法
-                if val > global_best_val:
-                    global_best_val = val
-                    current_iter_best_move = mv
-
-                # 更新 Alpha
-                if global_best_val > alpha:
-                    alpha = global_best_val
-
-                # 超时检测
-                if time.time() - self.start_time > self.time_limit:
+        opts = self.options
+
+        # 0. 开局库命中直接走库内走法，不搜索
+        if self.book is not None:
+            book_move = self.book.choose(board, self.book_rng)
+            if book_move is not None:
+                self.log(f"开局库: {book_move}")
+                self.best_move = book_move
+                return book_move
+
+        # 1. 生成根节点走法（整个迭代加深过程只生成一次）
+        board.rebuild_piece_sets()  # 走法生成顺序只取决于局面，节点数限制下的搜索结果可复现
+        moves = gen_legal_codes(board, board.side_to_move)
+        if not moves:  # 被将死或困毙
+            return None
+        # 2. 根节点初始排序：上次搜索的最佳走法、吃子优先
+        prev_best = prev_best_move.frm | prev_best_move.to << MOVE_TO_SHIFT if prev_best_move else 0
+        moves.sort(key=lambda m: self._get_move_score(m, prev_best), reverse=True)
+        best_code = moves[0]  # 第一轮都没搜完就停止时的兜底走法
+        self.best_move = code_to_move(best_code)
+        root_nodes: dict[int, int] = {}  # 每个根走法（起止格）上一轮子树的节点数
+        prev_score = None
+
+        for current_depth in range(1, limits.depth + 1):
+            # 根节点重排：上一轮最佳走法在前，其余按上一轮子树节点数从多到少
+            # （子树越大说明越难被驳倒，越可能是好棋）
+            if root_nodes:
+                best = best_code
+                moves.sort(key=lambda m: (m == best, root_nodes.get(m & MOVE_SQUARES_MASK, 0)), reverse=True)
+
+            # 3. 渴望窗口：以上一轮分数为中心搜索，失败高/失败低时逐步放宽窗口重搜
+            delta = opts.aspiration_window
+            if opts.aspiration and prev_score is not None and abs(prev_score) < MATE_VALUE - 1000:
+                alpha, beta = prev_score - delta, prev_score + delta
+            else:
+                alpha, beta = -INF, INF
+
+            root_len = len(board.move_codes)
+            while True:
+                try:
+                    global_best_val, current_iter_best_move = self._search_root(
+                        board, moves, current_depth, alpha, beta, root_nodes)
+                except SearchAborted:
+                    # 被取消或超限：把搜索树里走了一半的棋全部撤回，本轮结果作废
+                    while len(board.move_codes) > root_len:
+                        board.unmake()
+                    self.log(f"深度 {current_depth} 中止 | 节点: {self.nodes_count}+{self.qnodes_count}q | "
+                          f"耗时: {self._checker.elapsed():.2f}s")
+                    return self.best_move
+                if global_best_val <= alpha and alpha != -INF:
+                    delta *= 2
+                    alpha = -INF if delta > opts.aspiration_max_window else prev_score - delta
+                elif global_best_val >= beta and beta != INF:
+                    delta *= 2
+                    beta = INF if delta > opts.aspiration_max_window else prev_score + delta
+                else:
                     break
 
-            # 4. 打印本层结果
-            elapsed = time.time() - self.start_time
-            print(
-                f"深度 {current_depth} 完成 | 分数: {global_best_val} | 最佳: {current_iter_best_move} | 耗时: {elapsed:.2f}s")
-
-            # 5. 更新最终结果
+            # 4. 更新最终结果
             if current_iter_best_move:
-                self.best_move = current_iter_best_move
-
-            # 超时跳出迭代
-            if elapsed > self.time_limit:
+                best_code = current_iter_best_move
+                self.best_move = code_to_move(best_code)
+
+            # 5. 打印本层结果
+            elapsed = self._checker.elapsed()
+            self.completed_depth = current_depth
+            prev_score = global_best_val
+            self.log(
+                f"深度 {current_depth} 完成 | 分数: {global_best_val} | 最佳: {self.best_move} | "
+                f"节点: {self.nodes_count}+{self.qnodes_count}q | TT: {self.tt.hashfull()}‰ | 耗时: {elapsed:.2f}s")
+
+            if on_info is not None:
+                on_info({"depth": current_depth, "score": global_best_val, "move": self.best_move,
+                         "nodes": self.nodes_count + self.qnodes_count, "time": elapsed})
+
+            # 过了软时间上限就不再开始新一轮
+            if self._checker.soft_expired():
                 break
 
         return self.best_move
 
-    def _negamax(self, board: Board, depth: int, alpha: int, beta: int) -> int:
+    def ponderhit(self) -> None:
+        """后台思考猜中：搜索继续，从现在开始计时（可在其他线程调用）"""
+        self._checker.start_clock()
+
+    def new_game(self) -> None:
+        """新对局：清空置换表和走法排序启发，上一局的信息不再影响搜索"""
+        self.tt.clear()
+        self._reset_heuristics()
+        self.best_move = None
+
+    def ponder_move(self, board: Board) -> Move | None:
+        """置换表中记录的当前局面最佳走法（本方走完后，即对方最可能的应着），用于后台思考"""
+        entry = self.tt.probe(board.zobrist_key)
+        if entry is None or not entry[3]:
+            return None
+        side = board.side_to_move
+        code = validate_code(board, entry[3], side)
+        if not code:
+            return None
+        board.make(code)
+        legal = not in_check(board, side)
+        board.unmake()
+        return code_to_move(code) if legal else None
+
+    def _search_root(self, board: Board, moves: list[int], depth: int, alpha, beta,
+                     root_nodes: dict[int, int]) -> tuple[float, int]:
+        """搜索根节点一轮，返回 (最佳分, 最佳走法编码)；同时记录每个根走法的子树节点数"""
+        pvs = self.options.pvs
+        best_val = -INF
+        best_move = 0
+        for i, mv in enumerate(moves):
+            before = self.nodes_count + self.qnodes_count
+            board.make(mv)
+
+            # 窗口反转: -beta, -alpha；PVS：第一个走法之后先用零窗口试探
+            if i == 0 or not pvs:
+                val = -self._negamax(board, depth - 1, -beta, -alpha, 1, mv)
+            else:
+                val = -self._negamax(board, depth - 1, -alpha - 1, -alpha, 1, mv)
+                if alpha < val < beta:
+                    val = -self._negamax(board, depth - 1, -beta, -alpha, 1, mv)
+
+            board.unmake()
+            root_nodes[mv & MOVE_SQUARES_MASK] = self.nodes_count + self.qnodes_count - before
+
+            # 找到更好的走法
+            if val > best_val:
+                best_val = val
+                best_move = mv
+
+            # 更新 Alpha
+            if val > alpha:
+                alpha = val
+            if alpha >= beta:
+                break
+        return best_val, best_move
+
+    def _age_heuristics(self) -> None:
+        """两次搜索之间：杀手走法清空，历史分减半（老信息逐渐失效）"""
+        for slot in self.killers:
+            slot[0] = slot[1] = 0
+        history = self.history
+        for i in range(len(history)):
+            if history[i]:
+                history[i] >>= 1
+
+    def _reset_heuristics(self) -> None:
+        """杀手走法、历史表、应对走法表全部清零"""
+        for slot in self.killers:
+            slot[0] = slot[1] = 0
+        self.history[:] = [0] * _HEURISTIC_SIZE
+        self.counter_moves[:] = [0] * _HEURISTIC_SIZE
+
+    def _update_quiet_heuristics(self, mv: int, depth: int, ply: int, prev_move: int) -> None:
+        """不吃子走法导致 beta 剪枝：记为杀手走法、加历史分、记为对方上一步 prev_move 的应对走法（空着之后为 0，不记）"""
+        code = mv & MOVE_SQUARES_MASK
+        killers = self.killers[ply]
+        if killers[0] != code:
+            killers[1] = killers[0]
+            killers[0] = code
+        self.history[code] += depth * depth
+        if prev_move:
+            self.counter_moves[prev_move & MOVE_SQUARES_MASK] = code
+
+    def _staged_moves(self, board: Board, side: Side, tt_move: int, ply: int, prev_move: int):
+        """
+        分阶段、惰性地产生走法编码（伪合法，合法性由调用方在真正搜索前检查）：
+        1. 置换表走法：只校验该子能否这样走，不生成全部走法
+        2. 吃子走法：按 MVV/LVA 排序
+        3. 杀手走法、应对走法（对方上一步 prev_move 的应对，空着之后没有）：同样只校验不生成
+        4. 其余不吃子走法：按历史分排序
+        在前面阶段发生 beta 剪枝时，后面阶段的走法根本不会生成
+        吃子、不吃子走法写进本层预先分配的列表（每层一组，子节点用下一层的，互不干扰）
+        """
+        captures, quiets = self._move_buffers[ply]
+        captures.clear()
+        quiets.clear()
+        done: list[int] = []  # 已产生过的走法（起止格），后面阶段跳过
+        if tt_move:
+            tt = validate_code(board, tt_move, side)
+            if tt:
+                done.append(tt & MOVE_SQUARES_MASK)
+                yield tt
+
+        gen_capture_codes(board, side, captures)
+        captures.sort(key=_mvv_lva, reverse=True)
+        for mv in captures:
+            if mv & MOVE_SQUARES_MASK not in done:
+                yield mv
+
+        refutations = list(self.killers[ply])
+        if prev_move:
+            refutations.append(self.counter_moves[prev_move & MOVE_SQUARES_MASK])
+        for code in refutations:
+            if not code or code in done:
+                continue
+            mv = validate_code(board, code, side)
+            if mv and not mv & MOVE_CAPTURED_MASK:
+                done.append(code)
+                yield mv
+
+        gen_quiet_codes(board, side, quiets)
+        history = self.history
+        quiets.sort(key=lambda m: history[m & MOVE_SQUARES_MASK], reverse=True)
+        for mv in quiets:
+            if mv & MOVE_SQUARES_MASK not in done:
+                yield mv
+
+    def _quiesce(self, board: Board, alpha: int, beta: int) -> int:
+        """
+        静态搜索（只搜吃子，缓解水平线效应）
+        - 不被将军时可以"站着不动"（stand pat）：用静态估值作为下限
+        - 被将军时必须应将，搜索全部走法
+        - delta 剪枝：吃掉目标子后仍远低于 alpha 的吃子不搜
+        """
+        self.qnodes_count += 1
+        side = board.side_to_move
+        checked = in_check(board, side)
+
+        if checked:
+            best = -INF
+            moves = gen_quiet_codes(board, side, gen_capture_codes(board, side, []))
+        else:
+            stand_pat = evaluate(board)
+            if side == Side.BLACK:
+                stand_pat = -stand_pat
+            if stand_pat >= beta:
+                return stand_pat
+            if stand_pat > alpha:
+                alpha = stand_pat
+            best = stand_pat
+            moves = gen_capture_codes(board, side, [])
+            moves.sort(key=_mvv_lva, reverse=True)
+
+        legal_count = 0
+        for mv in moves:
+            if not checked and stand_pat + abs(PST[PIECE_OF_NIBBLE[mv >> MOVE_CAPTURED_SHIFT & 0xF] + 7][
+                    mv >> MOVE_TO_SHIFT & 0x7F]) + QS_DELTA_MARGIN <= alpha:
+                continue
+            board.make(mv)
+            if in_check(board, side):
+                board.unmake()
+                continue
+            legal_count += 1
+            val = -self._quiesce(board, -beta, -alpha)
+            board.unmake()
+
+            if val > best:
+                best = val
+            if val > alpha:
+                alpha = val
+            if alpha >= beta:
+                break
+
+        # 被将军且无法应将：绝杀
+        if checked and legal_count == 0:
+            return -MATE_VALUE + 10
+        return best
+
+    def _attacker_count(self, board: Board, side: Side) -> int:
+        """进攻子（车、马、炮、兵）数量，用于判断是否进入容易出现"等着"（zugzwang）的残局"""
+        n = 0
+        for _, p in board.iter_pieces(side):
+            if abs(p) >= Piece.CHE:
+                n += 1
+        return n
+
+    def _negamax(self, board: Board, depth: int, alpha: int, beta: int, ply: int = 1, prev_move: int = 0,
+                 allow_null: bool = True) -> int:
+        """prev_move 为走到本局面的那步棋的编码（对方上一步），空着之后为 0"""
         self.nodes_count += 1
+        # 每 check_every 个节点检查一次节点数、硬时间上限和取消令牌
+        if not self.nodes_count & self._check_mask and self._checker.should_stop(self.nodes_count + self.qnodes_count):
+            raise SearchAborted
+
+        # 残局库命中：直接返回库中的胜负，不再往下搜
+        tb = self.tablebase
+        if tb is not None and board.piece_count(Side.RED) + board.piece_count(Side.BLACK) <= tb.max_pieces:
+            v = tb.probe(board)
+            if v is not None:
+                self.tb_hits += 1
+                if v > 0:
+                    return TB_WIN_VALUE - v
+                if v < 0:
+                    return -TB_WIN_VALUE - v
+                return 0
 
         # 1. 查置换表
-        zobrist_key = calc_zobrist_key(board)
-        tt_move = None
+        zobrist_key = board.zobrist_key
+        tt_move = 0
 
-        if zobrist_key in self.tt:
-            t_depth, t_score, t_flag, t_move = self.tt[zobrist_key]
-            tt_move = t_move  # 提取出来用于排序
+        entry = self.tt.probe(zobrist_key)
+        if entry is not None:
+            t_depth, t_score, t_flag, t_move = entry
+            tt_move = t_move  # 起止格编码，用于排序
 
             # 如果以前算的深度够深，可以直接用结果
             if t_depth >= depth:
-                if t_flag == 0:
+                if t_flag == EXACT:
                     return t_score
-                elif t_flag == 1:
+                elif t_flag == LOWERBOUND:
                     alpha = max(alpha, t_score)
-                elif t_flag == 2:
+                elif t_flag == UPPERBOUND:
                     beta = min(beta, t_score)
 
                 # 如果调整后的窗口失效，说明命中剪枝
                 if alpha >= beta:
                     return t_score
 
-        # 2. 叶子节点估值
-        if depth <= 0:
-            val = evaluate(board)
-            if board.side_to_move == Side.BLACK:
-                val = -val
-            return val
-
-        # 3. 生成走法
-        moves = gen_legal_moves(board, board.side_to_move)
-
-        # 输棋/绝杀判定
-        # 返回一个负的极大值，加上深度修正（死得越慢分越高）
-        if not moves:
-            return -MATE_VALUE + (10 - depth)
-
-        # 4. 走法排序
-        moves.sort(key=lambda m: self._get_move_score(m, tt_move), reverse=True)
-
-        # 5. 递归搜索
+        # 2. 叶子节点：进入静态搜索，直到局面没有吃子为止
+        # 到了 MAX_PLY - 1 层也不再往下搜（每层的走法列表、杀手走法只有 MAX_PLY 组，层数不能越界）
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self._quiesce(board, alpha, beta)
+
+        side = board.side_to_move
+        opponent = Side.BLACK if side == Side.RED else Side.RED
+        checked = in_check(board, side)
+        opts = self.options
+
+        # 空着剪枝：不被将军时让对方连走两步，若仍 >= beta，说明本局面足够好，直接剪掉
+        # 残局进攻子少时可能是"等着"局面（不走反而更好），空着成功后再做一次降深度的正常搜索验证
+        if (opts.null_move and allow_null and not checked and depth >= opts.null_move_min_depth
+                and beta < MATE_VALUE - 1000):
+            r = opts.null_move_reduction
+            board.make_null_move()
+            try:
+                null_val = -self._negamax(board, depth - 1 - r, -beta, -beta + 1, ply + 1, 0, False)
+            finally:
+                board.undo_null_move()  # 取消时也要先撤销空着，保证棋盘可以按走子栈复原
+            if null_val >= beta:
+                if self._attacker_count(board, side) > opts.null_move_verify_pieces:
+                    return beta
+                if self._negamax(board, depth - r, beta - 1, beta, ply, prev_move, False) >= beta:
+                    return beta
+
+        # 3. 分阶段生成走法 + 4. 递归搜索（走之前才检查合法性）
         local_best_val = -INF
-        local_best_move = None
+        local_best_move = 0
         original_alpha = alpha
-
-        for mv in moves:
-            board.make_move(mv)
-
-            val = -self._negamax(board, depth - 1, -beta, -alpha)
-
-            board.undo_move()
+        legal_count = 0
+
+        for mv in self._staged_moves(board, side, tt_move, ply, prev_move):
+            board.make(mv)
+            if in_check(board, side):
+                board.unmake()
+                continue
+            legal_count += 1
+
+            # 后期走法缩减：排在后面的不吃子、不将军走法先浅搜一层，超过 alpha 再全深度重搜
+            reduced = (opts.lmr and depth >= opts.lmr_min_depth and legal_count > opts.lmr_min_moves
+                       and not checked and not mv & MOVE_CAPTURED_MASK and not in_check(board, opponent))
+            if legal_count == 1 or not opts.pvs:
+                if reduced:
+                    val = -self._negamax(board, depth - 2, -beta, -alpha, ply + 1, mv)
+                    if val > alpha:
+                        val = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1, mv)
+                else:
+                    val = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1, mv)
+            else:
+                # PVS：零窗口证明该走法不比当前最好的好；失败（落在窗口内）时用完整窗口重搜
+                val = -self._negamax(board, depth - 2 if reduced else depth - 1, -alpha - 1, -alpha, ply + 1, mv)
+                if reduced and val > alpha:
+                    val = -self._negamax(board, depth - 1, -alpha - 1, -alpha, ply + 1, mv)
+                if alpha < val < beta:
+                    val = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1, mv)
+
+            board.unmake()
 
             # 更新当前层最佳值
             if val > local_best_val:
@@ -149,16 +474,23 @@ class SearchEngine:
 
             # Beta 剪枝
             if alpha >= beta:
+                if not mv & MOVE_CAPTURED_MASK:
+                    self._update_quiet_heuristics(mv, depth, ply, prev_move)
                 break
 
+        # 输棋/绝杀判定（没有任何合法走法）
+        # 返回一个负的极大值，加上深度修正（死得越慢分越高）
+        if legal_count == 0:
+            return -MATE_VALUE + (10 - depth)
+
                 #  6. 存入置换表
-        tt_flag = 0  # EXACT
+        tt_flag = EXACT
         if local_best_val <= original_alpha:
-            tt_flag = 2  # UPPERBOUND (Fail Low): 这一层所有走法都没超过我的底线，这是一个很烂的局面
+            tt_flag = UPPERBOUND  # UPPERBOUND (Fail Low): 这一层所有走法都没超过我的底线，这是一个很烂的局面
         elif local_best_val >= beta:
-            tt_flag = 1  # LOWERBOUND (Fail High): 这一层有一步太好了，被剪枝了，真实值可能比这个还大
+            tt_flag = LOWERBOUND  # LOWERBOUND (Fail High): 这一层有一步太好了，被剪枝了，真实值可能比这个还大
 
-        self.tt[zobrist_key] = (depth, local_best_val, tt_flag, local_best_move)
+        self.tt.store(zobrist_key, depth, local_best_val, tt_flag, local_best_move & MOVE_SQUARES_MASK)
 
         return local_best_val
 
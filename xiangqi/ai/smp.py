@@ -0,0 +1,272 @@
+from __future__ import annotations
+import contextlib
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable
+
+from ..core.board import Board
+from ..core.move import Move
+from ..core.movegen import validate_move
+from ..core.packed import pack, unpack
+from ..core.rules import in_check
+from .ai_config import TT_SIZE_MB, SearchOptions
+from .limits import SearchLimits
+from .search_v2 import SearchEngine
+from .tt import TranspositionTable, table_bytes
+
+# Lazy SMP 并行搜索：
+# 主进程（0 号）和 N-1 个辅助进程对同一个根局面各自做迭代加深，通过共享内存里的置换表交换结果。
+# 各进程之间不做任何同步，只让搜索"错开"：
+# - 奇数号辅助进程每一轮多搜一层，提前把更深的结果写进置换表
+# - 辅助进程的根走法（除第一个外）按编号轮转，先搜不同的子树
+# 辅助进程常驻：创建 ParallelSearch 时启动，之后每次搜索只通过队列发一个 46 字节的局面，
+# 进程启动和建引擎的开销不算进每步的用时。
+# 主进程的搜索就在调用线程里跑，时间/节点限制、取消令牌、后台思考都由它负责；
+# 它结束后通知辅助进程停下，取完成深度最深的结果（同深度优先 0 号）
+
+_POLL_INTERVAL = 0.1  # 主进程等结果时每隔多久检查一次辅助进程是否还活着（秒）
+
+
+class _HelperEngine(SearchEngine):
+    """辅助进程用的搜索引擎：根节点深度偏移 + 根走法轮转"""
+
+    def __init__(self, worker_id: int, depth_offset: int, **kwargs):
+        super().__init__(**kwargs)
+        self.worker_id = worker_id
+        self.depth_offset = depth_offset
+
+    def _search_root(self, board, moves, depth, alpha, beta, root_nodes):
+        if self.worker_id and len(moves) > 2:
+            k = self.worker_id % (len(moves) - 1)
+            moves = moves[:1] + moves[1 + k:] + moves[1:1 + k]
+        return super()._search_root(board, moves, depth + self.depth_offset, alpha, beta, root_nodes)
+
+
+def _empty_result(worker_id: int, search_id: int, error: str) -> dict:
+    return {"worker": worker_id, "search": search_id, "depth": 0, "score": None, "move": None, "nodes": 0,
+            "error": error}
+
+
+def _helper(worker_id: int, shm_name: str, options: SearchOptions, tasks, stop_event, results) -> None:
+    """
+    辅助进程主循环：从 tasks 取 (搜索编号, 置换表代数, 局面, 深度, 是否新对局)，搜到深度上限或 stop_event 被置位，
+    结果放进 results；取到 None 时退出。每个任务无论是否出错都要报一条结果，否则主进程会一直等
+    """
+    shm = shared_memory.SharedMemory(name=shm_name, track=False)
+    depth_offset = worker_id & 1
+    engine = _HelperEngine(worker_id, depth_offset, tt_size_mb=0, options=options)
+    engine.tt = TranspositionTable(buffer=shm.buf)
+    engine.log = lambda text: None
+    try:
+        while (task := tasks.get()) is not None:
+            search_id, age, position, depth, new_game = task
+            result = _empty_result(worker_id, search_id, "helper exited without a result")
+            try:
+                board = unpack(position)
+                if new_game:  # 共享置换表已由主进程清空，这里只清本进程的启发
+                    engine._reset_heuristics()
+                engine.tt.age = age  # search() 里的 new_search 之后与主进程同一代
+                last: dict = {}
+                move = engine.search(board, stop_event=stop_event, on_info=last.update,
+                                     limits=SearchLimits(depth=max(1, depth - depth_offset)))
+                result = {
+                    "worker": worker_id,
+                    "search": search_id,
+                    "depth": engine.completed_depth + depth_offset if engine.completed_depth else 0,
+                    "score": last.get("score"),
+                    "move": move,
+                    "nodes": engine.nodes_count + engine.qnodes_count,
+                }
+            except Exception as e:
+                result["error"] = repr(e)
+            results.put(result)
+    finally:
+        engine.tt.table.release()  # 先释放对共享内存的引用才能 close
+        shm.close()
+
+
+class ParallelSearch:
+    """
+    多进程 Lazy SMP 搜索，search() 的参数与 SearchEngine.search 相同，也有 ponderhit()、ponder_move()、new_game()
+    置换表放在 multiprocessing.shared_memory 中、辅助进程常驻，多次搜索之间保留；用完调用 close() 释放
+    """
+
+    def __init__(self, workers: int = 0, tt_size_mb: float = TT_SIZE_MB, options: SearchOptions | None = None,
+                 **engine_kwargs):
+        """workers 为总进程数（含主进程）；engine_kwargs（book、tablebase）只给主进程的引擎"""
+        self.workers = workers if workers > 0 else (mp.cpu_count() or 1)
+        self.options = options if options is not None else SearchOptions()
+        self.best_move: Move | None = None
+        self.completed_depth = 0
+        self.nodes_count = 0
+        self.results: list[dict] = []  # 最近一次搜索各进程的结果
+        self.log: Callable[[str], None] = print  # 与 SearchEngine.log 相同，主进程引擎的输出也经过它
+        self._shm = shared_memory.SharedMemory(create=True, size=table_bytes(tt_size_mb))
+        self.engine = SearchEngine(0, options=self.options, **engine_kwargs)  # 0 号，在调用线程里搜索
+        self.engine.tt = TranspositionTable(buffer=self._shm.buf)
+        self.engine.log = lambda text: self.log(text)
+        self._ctx = mp.get_context()
+        self._stop = self._ctx.Event()
+        self._results = self._ctx.Queue()
+        self._helpers: list[tuple[mp.Process, object] | None] = [None] * self.workers  # 0 号不用
+        self._search_id = 0
+        self._new_game = False  # 下一次搜索时通知辅助进程清空启发
+        self._start_helpers()
+
+    # 与 SearchEngine 相同的属性，便于替换使用
+    @property
+    def time_limit(self) -> float:
+        return self.engine.time_limit
+
+    @time_limit.setter
+    def time_limit(self, value: float) -> None:
+        self.engine.time_limit = value
+
+    @property
+    def tt(self) -> TranspositionTable:
+        return self.engine.tt
+
+    @property
+    def qnodes_count(self) -> int:
+        return 0  # nodes_count 已含所有进程的静态搜索节点
+
+    def _start_helpers(self) -> None:
+        """启动（或重启已退出的）辅助进程"""
+        for i in range(1, self.workers):
+            helper = self._helpers[i]
+            if helper is not None and helper[0].is_alive():
+                continue
+            tasks = self._ctx.Queue()
+            p = self._ctx.Process(target=_helper, daemon=True,
+                                  args=(i, self._shm.name, self.options, tasks, self._stop, self._results))
+            p.start()
+            self._helpers[i] = (p, tasks)
+
+    def search(self, board: Board, max_depth: int = 4, stop_event: threading.Event | None = None,
+               on_info: Callable[[dict], None] | None = None, limits: SearchLimits | None = None,
+               ponder: bool = False) -> Move | None:
+        """参数含义同 SearchEngine.search；深度、时间、节点数限制和后台思考都作用在主进程的搜索上"""
+        start = time.time()
+        if limits is None:
+            limits = SearchLimits(depth=max_depth, hard_time=self.time_limit)
+        self._start_helpers()
+        self._search_id += 1
+        self._stop.clear()
+        position = pack(board)  # 只传 46 字节的盘面，不序列化整个 Board
+        age = self.engine.tt.age  # 各进程 search() 开始时都 new_search 一次，代数保持一致
+        for i in range(1, self.workers):
+            self._helpers[i][1].put((self._search_id, age, position, limits.depth, self._new_game))
+        self._new_game = False
+
+        try:
+            last: dict = {}
+
+            def info(d: dict) -> None:
+                last.update(d)
+                if on_info is not None:
+                    on_info(d)
+
+            move = self.engine.search(board, stop_event=stop_event, on_info=info, limits=limits, ponder=ponder)
+            main = {"worker": 0, "search": self._search_id, "depth": self.engine.completed_depth,
+                    "score": last.get("score"), "move": move,
+                    "nodes": self.engine.nodes_count + self.engine.qnodes_count}
+        except Exception as e:
+            main = _empty_result(0, self._search_id, repr(e))
+        finally:
+            self._stop.set()  # 主进程结束（搜完、超时或被取消）后通知辅助进程停下
+
+        self.results = [main]
+        while len(self.results) < self.workers:
+            self.results.extend(self._receive())
+
+        self.nodes_count = sum(r["nodes"] for r in self.results)
+        self.best_move = None
+        self.completed_depth = 0
+        for r in self.results:
+            if "error" in r:
+                self.log(f"并行搜索 {r['worker']} 号进程出错: {r['error']}")
+        side = board.side_to_move
+        for r in sorted((r for r in self.results if r["move"] is not None),
+                        key=lambda r: (r["depth"], r["worker"] == 0), reverse=True):
+            mv = validate_move(board, r["move"], side)
+            if mv is None:
+                continue
+            board.make_move(mv)
+            legal = not in_check(board, side)
+            board.undo_move()
+            if legal:
+                self.best_move = mv
+                self.completed_depth = r["depth"]
+                self.log(f"并行搜索 {self.workers} 进程 | 深度 {r['depth']} | 分数: {r['score']} | "
+                         f"最佳: {mv} | 节点: {self.nodes_count} | 耗时: {time.time() - start:.2f}s")
+                break
+        return self.best_move
+
+    def _receive(self) -> list[dict]:
+        """
+        等到至少一条本次搜索的新结果；等待期间有辅助进程没报结果就退出了（被杀死等），给它补一条空结果，
+        不会因为某个进程异常而永远等下去
+        """
+        sid = self._search_id
+        reported = {r["worker"] for r in self.results}
+        while True:
+            try:
+                r = self._results.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+            else:
+                if r["search"] == sid:
+                    return [r]
+                continue  # 之前某次搜索迟到的结果
+            dead = [i for i in range(1, self.workers) if i not in reported and not self._helpers[i][0].is_alive()]
+            if not dead:
+                continue
+            # 进程退出前已经把队列里的数据写完，先取走已到的结果，剩下的才是真没报的
+            got = []
+            with contextlib.suppress(queue.Empty):
+                while True:
+                    r = self._results.get_nowait()
+                    if r["search"] == sid:
+                        got.append(r)
+            got_ids = {r["worker"] for r in got}
+            got += [_empty_result(i, sid, f"exit code {self._helpers[i][0].exitcode}")
+                    for i in dead if i not in got_ids]
+            return got
+
+    def ponderhit(self) -> None:
+        self.engine.ponderhit()
+
+    def ponder_move(self, board: Board) -> Move | None:
+        return self.engine.ponder_move(board)
+
+    def new_game(self) -> None:
+        """新对局：清空共享置换表和各进程的走法排序启发（辅助进程在下一次搜索开始时清）"""
+        self.engine.new_game()
+        self.best_move = None
+        self._new_game = True
+
+    def close(self) -> None:
+        self._stop.set()
+        for helper in self._helpers[1:]:
+            if helper is not None and helper[0].is_alive():
+                helper[1].put(None)
+        for helper in self._helpers[1:]:
+            if helper is None:
+                continue
+            helper[0].join(timeout=5)
+            if helper[0].is_alive():
+                helper[0].terminate()
+                helper[0].join()
+        self._helpers = [None] * self.workers
+        self.engine.tt.table.release()
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "ParallelSearch":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,189 @@
+from __future__ import annotations
+import mmap
+import struct
+from math import prod
+from pathlib import Path
+
+from ..core.board import Board
+from ..core.const import BOARD_COLS, BOARD_SIZE, Piece, Side, rc_to_i
+from ..core.movegen import _BING_MOVES, _SHI_MOVES, _SHUAI_MOVES, _XIANG_MOVES
+from .ai_config import PIECE_PER_VALUE
+
+# 残局库：对给定的子力组合（如 KR-KA：红帅车 对 黑将士），记录每个局面的杀棋步数
+# 子力组合写法："红方-黑方"，字母 K 帅 A 仕 B 相 R 车 N 马 C 炮 P 兵，每方以 K 开头
+# 只生成"规范方向"（子力强的一方为红方）的表，另一方向的局面上下翻转、红黑互换后查同一张表
+#
+# 局面编号：每个子在它可能出现的格子列表中的序号，按 红方各子、黑方各子 的顺序混合进制拼起来，
+# 黑方走棋时再加上一半的表长。同类的子（如双士）按格子升序排列，其余排列及重叠的组合是无效局面
+#
+# 文件格式（小端）：文件头 24 字节：魔数 b"XQTB"、版本号 u16、子力组合 10 字节、局面数 u64，
+# 之后每个局面一个 int16，以走棋方视角：
+#   0   和棋（或无效局面）
+#   > 0 走棋方胜，v - 1 步（半回合）后将死/困毙对方
+#   < 0 走棋方负，-v - 1 步后被将死/困毙（-1 表示已经被将死或无子可走）
+# 不考虑长将、长捉等循环判负规则
+
+TB_MAGIC = b"XQTB"
+TB_VERSION = 1
+HEADER = struct.Struct("<4sH10sQ")
+TB_SUFFIX = ".xqtb"
+
+PIECE_LETTERS = {"K": Piece.SHUAI, "A": Piece.SHI, "B": Piece.XIANG, "R": Piece.CHE,
+                 "N": Piece.MA, "C": Piece.PAO, "P": Piece.BING}
+_LETTER_OF = {p: ch for ch, p in PIECE_LETTERS.items()}
+_LETTER_ORDER = "KABRNCP"
+
+
+def _reachable_squares(piece: Piece, side: Side) -> tuple[int, ...]:
+    """该子在合法对局中可能出现的格子（从初始位置出发按走法表扩展）"""
+    steps = {
+        Piece.SHUAI: lambda sq: _SHUAI_MOVES[side][sq],
+        Piece.SHI: lambda sq: _SHI_MOVES[side][sq],
+        Piece.XIANG: lambda sq: [to for to, _ in _XIANG_MOVES[side][sq]],
+        Piece.BING: lambda sq: _BING_MOVES[side][sq],
+    }.get(piece)
+    if steps is None:
+        return tuple(range(BOARD_SIZE))
+    code = side * piece
+    todo = [i for i, p in enumerate(Board.initial().squares) if p == code]
+    seen = set(todo)
+    while todo:
+        for to in steps(todo.pop()):
+            if to not in seen:
+                seen.add(to)
+                todo.append(to)
+    return tuple(sorted(seen))
+
+
+PIECE_SQUARES = {(side, piece): _reachable_squares(piece, side) for side in Side for piece in PIECE_LETTERS.values()}
+_SQUARE_INDEX = {k: {sq: i for i, sq in enumerate(v)} for k, v in PIECE_SQUARES.items()}
+MIRROR = tuple(rc_to_i(9 - i // BOARD_COLS, i % BOARD_COLS) for i in range(BOARD_SIZE))  # 上下翻转
+
+
+def _side_letters(pieces) -> str:
+    return "".join(sorted((_LETTER_OF[abs(p)] for p in pieces), key=_LETTER_ORDER.index))
+
+
+def _strength(letters: str) -> int:
+    return sum(PIECE_PER_VALUE[PIECE_LETTERS[ch]] for ch in letters if ch != "K")
+
+
+def canonical(signature: str) -> tuple[str, bool]:
+    """返回 (规范方向的子力组合, 是否需要翻转)"""
+    red, black = signature.split("-")
+    if (_strength(red), red) >= (_strength(black), black):
+        return signature, False
+    return f"{black}-{red}", True
+
+
+def board_signature(board: Board) -> str:
+    squares = board.squares
+    red = _side_letters(squares[i] for i, _ in board.iter_pieces(Side.RED))
+    black = _side_letters(squares[i] for i, _ in board.iter_pieces(Side.BLACK))
+    return f"{red}-{black}"
+
+
+class Layout:
+    """某个子力组合的局面编号方式"""
+
+    def __init__(self, signature: str):
+        red, black = signature.split("-")
+        if not red.startswith("K") or not black.startswith("K") or any(
+                ch not in PIECE_LETTERS for ch in red + black):
+            raise ValueError(f"非法子力组合: {signature!r}")
+        red, black = _side_letters(PIECE_LETTERS[ch] for ch in red), _side_letters(PIECE_LETTERS[ch] for ch in black)
+        self.signature = f"{red}-{black}"
+        # 每个子一格：(棋子代码, 可能的格子, 格子 -> 序号)
+        self.slots = [(side * PIECE_LETTERS[ch], PIECE_SQUARES[(side, PIECE_LETTERS[ch])],
+                       _SQUARE_INDEX[(side, PIECE_LETTERS[ch])])
+                      for side, letters in ((Side.RED, red), (Side.BLACK, black)) for ch in letters]
+        self.radix = [len(sqs) for _, sqs, _ in self.slots]
+        self.half = prod(self.radix)
+        self.size = 2 * self.half
+        self.n_pieces = len(self.slots)
+
+    def decode(self, idx: int) -> tuple[list[int], Side]:
+        """局面编号 -> (各子所在格子, 走棋方)"""
+        side = Side.BLACK if idx >= self.half else Side.RED
+        idx %= self.half
+        squares = [0] * self.n_pieces
+        for i in range(self.n_pieces - 1, -1, -1):
+            idx, r = divmod(idx, self.radix[i])
+            squares[i] = self.slots[i][1][r]
+        return squares, side
+
+    def encode(self, board: Board, flip: bool = False) -> int | None:
+        """棋盘 -> 局面编号（flip 时先上下翻转、红黑互换）；子力不符或有子不在可能的格子上返回 None"""
+        by_code: dict[int, list[int]] = {}
+        for side in Side:
+            for sq, p in board.iter_pieces(side):
+                if flip:
+                    sq, p = MIRROR[sq], -p
+                by_code.setdefault(p, []).append(sq)
+        for sqs in by_code.values():
+            sqs.sort()
+        idx = 0
+        for code, _, index in self.slots:
+            sqs = by_code.get(code)
+            if not sqs:
+                return None
+            r = index.get(sqs.pop(0))
+            if r is None:
+                return None
+            idx = idx * len(index) + r
+        stm = -board.side_to_move if flip else board.side_to_move
+        return idx + (self.half if stm == Side.BLACK else 0)
+
+
+class Tablebase:
+    """加载目录下所有残局库文件（mmap，只读），按子力组合查询"""
+
+    def __init__(self, directory: str | Path | None = None):
+        self.tables: dict[str, tuple[Layout, mmap.mmap | None, memoryview]] = {}
+        self.max_pieces = 0
+        if directory is None:
+            return
+        for path in sorted(Path(directory).glob("*" + TB_SUFFIX)):
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, sig, count = HEADER.unpack_from(mm, 0)
+            layout = Layout(sig.rstrip(b"\0").decode("ascii"))
+            if magic != TB_MAGIC or version != TB_VERSION or count != layout.size \
+                    or HEADER.size + 2 * count > len(mm):
+                mm.close()
+                raise ValueError(f"不是有效的残局库文件: {path}")
+            values = memoryview(mm)[HEADER.size:HEADER.size + 2 * count].cast("h")
+            self.tables[layout.signature] = (layout, mm, values)
+            self.max_pieces = max(self.max_pieces, layout.n_pieces)
+
+    def add(self, layout: Layout, values) -> None:
+        """加入内存中的表（生成残局库时，已生成的小表供大表查询吃子后的结果）"""
+        self.tables[layout.signature] = (layout, None, memoryview(values))
+        self.max_pieces = max(self.max_pieces, layout.n_pieces)
+
+    def __contains__(self, signature: str) -> bool:
+        return canonical(signature)[0] in self.tables
+
+    def probe(self, board: Board) -> int | None:
+        """查询当前局面，返回走棋方视角的库值（格式见文件开头），没有对应的库返回 None"""
+        sig, flip = canonical(board_signature(board))
+        table = self.tables.get(sig)
+        if table is None:
+            return None
+        layout, _, values = table
+        idx = layout.encode(board, flip)
+        return None if idx is None else values[idx]
+
+    def close(self) -> None:
+        for _, mm, values in self.tables.values():
+            values.release()
+            if mm is not None:
+                mm.close()
+        self.tables.clear()
+
+
+def write_table(path: str | Path, layout: Layout, values) -> None:
+    """把生成好的 int16 数组写成残局库文件"""
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(TB_MAGIC, TB_VERSION, layout.signature.encode("ascii"), layout.size))
+        f.write(memoryview(values).cast("B"))
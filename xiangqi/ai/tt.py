@@ -0,0 +1,154 @@
+from __future__ import annotations
+from array import array
+
+# 置换表：预分配的定长 array('Q')，每个条目压缩成一个 64 位整数
+#   bit  0-15  走法（frm | to << 7，0 表示无走法）
+#   bit 16-35  分数（加上偏移后的无符号 20 位）
+#   bit 36-41  深度
+#   bit 42-43  类型（0 EXACT / 1 LOWERBOUND / 2 UPPERBOUND）
+#   bit 44-47  搜索代数（age），用于淘汰旧条目
+#   bit 48-63  校验位（局面哈希的高 16 位）
+# 条目按 BUCKET_SIZE 个一组（bucket），同一 bucket 内按深度优先 + 代数淘汰替换
+# 整个条目为 0 表示空位（分数偏移保证真实条目不为 0）
+# 条目读写都是单个对齐的 64 位字，校验位和数据在同一个字里，因此多进程共享同一块内存时
+# 不需要加锁：读到的条目要么完整属于某个局面，要么校验位对不上被当作未命中
+
+BUCKET_SIZE = 4
+ENTRY_BYTES = 8
+
+_SCORE_BITS = 20
+_SCORE_OFFSET = 1 << (_SCORE_BITS - 1)
+_SCORE_MAX = _SCORE_OFFSET - 1
+_DEPTH_MAX = 63
+_AGE_MASK = 0xF
+
+EXACT = 0
+LOWERBOUND = 1
+UPPERBOUND = 2
+
+
+def encode_move(frm: int, to: int) -> int:
+    return frm | (to << 7)
+
+
+def decode_move(code: int) -> tuple[int, int]:
+    return code & 0x7F, (code >> 7) & 0x7F
+
+
+def table_bytes(size_mb: float) -> int:
+    """size_mb 对应的置换表实际字节数（整数个 bucket）"""
+    n_buckets = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE))
+    return n_buckets * BUCKET_SIZE * ENTRY_BYTES
+
+
+class TranspositionTable:
+    def __init__(self, size_mb: float = 16, buffer=None):
+        """buffer 不为空时直接在这块内存上建表（如 multiprocessing.shared_memory 的 buf），不另外分配"""
+        if buffer is None:
+            self.table = array('Q', bytes(table_bytes(size_mb)))
+        else:
+            self.table = memoryview(buffer).cast('Q')
+        self.n_buckets = len(self.table) // BUCKET_SIZE
+        self.age = 0
+        self.reset_stats()
+        self.used = 0
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def reset_stats(self) -> None:
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0  # 覆盖了另一个局面的条目
+
+    def clear(self) -> None:
+        if isinstance(self.table, array):
+            self.table = array('Q', bytes(len(self.table) * ENTRY_BYTES))
+        else:
+            self.table.cast('B')[:] = bytes(len(self.table) * ENTRY_BYTES)
+        self.used = 0
+        self.age = 0
+        self.reset_stats()
+
+    def new_search(self) -> None:
+        """每次根搜索开始时调用，旧代数的条目优先被替换"""
+        self.age = (self.age + 1) & _AGE_MASK
+
+    def probe(self, key: int) -> tuple[int, int, int, int] | None:
+        """查表，命中返回 (depth, score, flag, move_code)，否则返回 None"""
+        self.probes += 1
+        table = self.table
+        base = (key % self.n_buckets) * BUCKET_SIZE
+        check = key >> 48
+        for i in range(base, base + BUCKET_SIZE):
+            e = table[i]
+            if e and (e >> 48) == check:
+                self.hits += 1
+                return ((e >> 36) & _DEPTH_MAX,
+                        ((e >> 16) & 0xFFFFF) - _SCORE_OFFSET,
+                        (e >> 42) & 0x3,
+                        e & 0xFFFF)
+        return None
+
+    def store(self, key: int, depth: int, score: int, flag: int, move_code: int) -> None:
+        self.stores += 1
+        table = self.table
+        base = (key % self.n_buckets) * BUCKET_SIZE
+        check = key >> 48
+        age = self.age
+
+        # 选择替换位置：同一局面 > 空位 > (旧代数、浅深度) 的条目
+        victim = base
+        victim_worth = None
+        for i in range(base, base + BUCKET_SIZE):
+            e = table[i]
+            if not e:
+                victim, victim_worth = i, None
+                break
+            if (e >> 48) == check:
+                # 同一局面：更浅的非精确结果不覆盖更深的结果，但保留旧走法
+                old_depth = (e >> 36) & _DEPTH_MAX
+                if depth < old_depth and flag != EXACT and ((e >> 44) & _AGE_MASK) == age:
+                    return
+                if not move_code:
+                    move_code = e & 0xFFFF
+                victim, victim_worth = i, -1
+                break
+            worth = ((e >> 36) & _DEPTH_MAX) - 8 * ((age - ((e >> 44) & _AGE_MASK)) & _AGE_MASK)
+            if victim_worth is None or worth < victim_worth:
+                victim, victim_worth = i, worth
+
+        old = table[victim]
+        if not old:
+            self.used += 1
+        elif victim_worth != -1:
+            self.collisions += 1
+
+        if score > _SCORE_MAX:
+            score = _SCORE_MAX
+        elif score < -_SCORE_MAX:
+            score = -_SCORE_MAX
+        depth = 0 if depth < 0 else min(depth, _DEPTH_MAX)
+        table[victim] = (move_code
+                         | (score + _SCORE_OFFSET) << 16
+                         | depth << 36
+                         | flag << 42
+                         | age << 44
+                         | check << 48)
+
+    def hashfull(self) -> int:
+        """已使用条目的千分比"""
+        return self.used * 1000 // len(self.table)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "size_mb": len(self.table) * ENTRY_BYTES / (1024 * 1024),
+            "entries": len(self.table),
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+            "stores": self.stores,
+            "collisions": self.collisions,
+            "fill": self.used / len(self.table),
+        }
@@ -0,0 +1,101 @@
+from __future__ import annotations
+import threading
+
+from ..core.board import Board
+from ..core.move import Move
+from .search_v2 import SearchEngine
+
+
+class SearchWorker:
+    """
+    后台搜索：在棋盘副本上用单独的线程跑 SearchEngine.search，不阻塞界面
+    - start() 启动一次搜索，cancel() 通过取消令牌让搜索尽快结束
+    - info 为最近完成一层的搜索信息（深度、分数等），用于界面显示
+    - 搜索结束后 done 为 True，result 为最佳走法（基于副本，应用前需在真实棋盘上校验）
+    - ponder() 在对方思考时预先搜索：猜中对方走法（ponder_hit）就接着搜，猜错就取消，
+      两种情况下置换表都保留在同一个 engine 里
+    """
+
+    def __init__(self, engine: SearchEngine):
+        self.engine = engine
+        self.info: dict | None = None
+        self.result: Move | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._done = False
+        self.pondering = False
+        self.ponder_move: Move | None = None
+
+    def start(self, board: Board, max_depth: int, ponder: bool = False) -> None:
+        """ponder 为 True 时是后台思考，时间限制等 ponder_hit() 猜中后才开始计算"""
+        self.cancel()
+        self.info = None
+        self.result = None
+        self._done = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(board.copy(), max_depth, ponder, self._stop),
+                                        daemon=True)
+        self._thread.start()
+
+    def ponder(self, board: Board, max_depth: int, ponder_move: Move | None) -> None:
+        """
+        后台思考：ponder_move 为猜测的对方走法，在走完它的局面上搜索；
+        为 None 时直接搜索当前局面（对方走棋），只为预热置换表
+        """
+        board = board.copy()
+        if ponder_move is not None:
+            board.make_move(ponder_move)
+        self.start(board, max_depth, ponder=True)
+        self.pondering = True
+        self.ponder_move = ponder_move
+
+    def ponder_hit(self, mv: Move) -> bool:
+        """对方走了 mv：猜中则后台思考转为正式搜索（继续跑，从现在开始计时）返回 True；否则取消后台思考返回 False"""
+        if not self.pondering:
+            return False
+        pm = self.ponder_move
+        if pm is not None and pm.frm == mv.frm and pm.to == mv.to:
+            self.pondering = False
+            self.engine.ponderhit()
+            return True
+        self.cancel()
+        return False
+
+    def _run(self, board: Board, max_depth: int, ponder: bool, stop: threading.Event) -> None:
+        result = self.engine.search(board, max_depth=max_depth, stop_event=stop, on_info=self._on_info,
+                                    ponder=ponder)
+        if not stop.is_set():  # 被取消的搜索结果直接丢弃
+            self.result = result
+            self._done = True
+
+    def _on_info(self, info: dict) -> None:
+        self.info = info
+
+    def cancel(self) -> None:
+        """取消当前搜索并等待线程退出（取消后搜索会在几百个节点内停下），已算完未取走的结果一并丢弃"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.result = None
+        self._done = False
+        self.pondering = False
+        self.ponder_move = None
+
+    @property
+    def thinking(self) -> bool:
+        """正式搜索进行中（不含后台思考）"""
+        return self._thread is not None and not self._done and not self.pondering
+
+    @property
+    def done(self) -> bool:
+        """正式搜索已出结果（后台思考的结果要等猜中后才算）"""
+        return self._done and not self.pondering
+
+    def take_result(self) -> Move | None:
+        """取走搜索结果，之后 done 变回 False"""
+        result = self.result
+        self.result = None
+        self._done = False
+        self._thread = None
+        return result
@@ -1,19 +1,48 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
+from typing import ClassVar
 import unicodedata
 
 from .const import (
     BOARD_SIZE, BOARD_ROWS, BOARD_COLS,
     Side, Piece, rc_to_i, i_to_rc,
-    char_of, side_of
+    char_of, side_of, FEN_CHAR, FEN_PIECE,
+    MAILBOX_SIZE, MAILBOX_OF, OFFBOARD,
 )
-from .move import Move
+from .move import Move, MOVE_TO_SHIFT, MOVE_CAPTURED_SHIFT, MOVE_PIECE_SHIFT, PIECE_OF_NIBBLE, code_to_move
+from .zobrist import ZOBRIST_TABLE, TURN_KEY, calc_zobrist_key
+from .pst import PST, calc_pst_score
+
+_ROW_OF = tuple(i // BOARD_COLS for i in range(BOARD_SIZE))
+_COL_OF = tuple(i % BOARD_COLS for i in range(BOARD_SIZE))
+_OPPONENT = {Side.RED: Side.BLACK, Side.BLACK: Side.RED}
 
 @dataclass
 class Board:
     squares: list[int] = field(default_factory=lambda: [0] * BOARD_SIZE)
     side_to_move: Side = Side.RED
-    move_stack: list[Move] = field(default_factory=list)
+    # 走子栈：每步的整数编码（含走动的子和被吃子，见 move.py），撤销时据此复原
+    move_codes: list[int] = field(default_factory=list)
+    # 增量维护的 Zobrist 哈希，及每步走之前的哈希（与 move_codes 对齐）
+    _key: int = field(default=0, repr=False)
+    _key_stack: list[int] = field(default_factory=list, repr=False)
+    # 增量维护的 子力+位置 分（红方视角），及每步走之前的分值
+    _score: int = field(default=0, repr=False)
+    _score_stack: list[int] = field(default_factory=list, repr=False)
+    # 双方棋子所在格子的集合，及双方将帅位置（被吃为 None）
+    _pieces: dict[Side, set[int]] = field(default_factory=lambda: {Side.RED: set(), Side.BLACK: set()}, repr=False)
+    _kings: dict[Side, int | None] = field(default_factory=lambda: {Side.RED: None, Side.BLACK: None}, repr=False)
+    # 行/列占位掩码：_rank_occ[r] 第 c 位、_file_occ[c] 第 r 位表示 (r, c) 有子（供车炮查表生成走法）
+    _rank_occ: list[int] = field(default_factory=lambda: [0] * BOARD_ROWS, repr=False)
+    _file_occ: list[int] = field(default_factory=lambda: [0] * BOARD_COLS, repr=False)
+    # 带哨兵边框的镜像棋盘（见 const.MAILBOX_OF），供攻击检测按整数增量步进
+    _mailbox: list[int] = field(default_factory=lambda: [OFFBOARD] * MAILBOX_SIZE, repr=False)
+
+    # 调试开关：每次 make/undo 后用全盘重算结果校验增量状态
+    debug_verify: ClassVar[bool] = False
+
+    def __post_init__(self) -> None:
+        self.refresh()
 
     @staticmethod
     def initial() -> "Board":
@@ -21,6 +50,61 @@ class Board:
         b._setup_initial_position()
         return b
 
+    @staticmethod
+    def from_fen(fen: str) -> "Board":
+        """
+        由 FEN 串建棋盘：第一段从黑方底线（r=0）到红方底线逐行，数字表示连续空格；
+        第二段 w/r 红方走、b 黑方走（缺省红方走），其余段忽略
+        """
+        parts = fen.split()
+        if not parts:
+            raise ValueError("空的 FEN")
+        rows = parts[0].split("/")
+        if len(rows) != BOARD_ROWS:
+            raise ValueError(f"FEN 行数应为 {BOARD_ROWS}: {fen!r}")
+        squares = [0] * BOARD_SIZE
+        for r, row in enumerate(rows):
+            c = 0
+            for ch in row:
+                if ch.isdigit():
+                    c += int(ch)
+                elif ch in FEN_PIECE and c < BOARD_COLS:
+                    squares[rc_to_i(r, c)] = FEN_PIECE[ch]
+                    c += 1
+                else:
+                    raise ValueError(f"FEN 第 {r + 1} 行非法: {row!r}")
+            if c != BOARD_COLS:
+                raise ValueError(f"FEN 第 {r + 1} 行应为 {BOARD_COLS} 列: {row!r}")
+        turn = parts[1].lower() if len(parts) > 1 else "w"
+        if turn not in ("w", "r", "b"):
+            raise ValueError(f"FEN 走棋方非法: {parts[1]!r}")
+        return Board(squares, Side.BLACK if turn == "b" else Side.RED)
+
+    def to_fen(self) -> str:
+        """导出 FEN 串（回合数按走子历史计算，不记录吃子步数）"""
+        rows = []
+        for r in range(BOARD_ROWS):
+            row, empty = "", 0
+            for c in range(BOARD_COLS):
+                p = self.squares[rc_to_i(r, c)]
+                if p == 0:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += FEN_CHAR[p]
+            rows.append(row + (str(empty) if empty else ""))
+        turn = "w" if self.side_to_move == Side.RED else "b"
+        return f"{'/'.join(rows)} {turn} - - 0 {len(self.move_codes) // 2 + 1}"
+
+    def copy(self) -> "Board":
+        """复制棋盘（含走子历史，可继续悔棋），副本与原棋盘互不影响，供后台搜索使用"""
+        b = Board(list(self.squares), self.side_to_move, list(self.move_codes))
+        b._key_stack = list(self._key_stack)
+        b._score_stack = list(self._score_stack)
+        return b
+
     def _setup_initial_position(self) -> None:
         """标准象棋初始局面（红在下 r=9，黑在上 r=0）"""
         s = self.squares
@@ -59,32 +143,209 @@ class Board:
             s[rc_to_i(6, c)] = +Piece.BING
 
         self.side_to_move = Side.RED
-        self.move_stack.clear()
+        self.move_codes.clear()
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        根据 squares / side_to_move 重新计算增量状态（直接修改 squares 后需调用）
+        move_codes 中已有的历史保留，按它倒推每步之前的哈希和局面分，使各栈仍然对齐、可以 unmake
+        """
+        self._key = calc_zobrist_key(self)
+        self._score = calc_pst_score(self)
+        self._rebuild_history_stacks()
+        self._pieces, self._kings = self._scan_pieces()
+        self._rank_occ, self._file_occ = self._scan_occupancy()
+        self._mailbox = self._build_mailbox()
+
+    def _rebuild_history_stacks(self) -> None:
+        """从当前局面沿 move_codes 倒推，重建每步走之前的哈希和局面分"""
+        key, score = self._key, self._score
+        keys, scores = [], []
+        for code in reversed(self.move_codes):
+            frm = code & 0x7F
+            to = code >> MOVE_TO_SHIFT & 0x7F
+            piece = PIECE_OF_NIBBLE[code >> MOVE_PIECE_SHIFT & 0xF]
+            captured = PIECE_OF_NIBBLE[code >> MOVE_CAPTURED_SHIFT & 0xF]
+            z = ZOBRIST_TABLE[piece + 7]
+            pst = PST[piece + 7]
+            key ^= z[frm] ^ z[to] ^ TURN_KEY
+            score += pst[frm] - pst[to]
+            if captured:
+                key ^= ZOBRIST_TABLE[captured + 7][to]
+                score += PST[captured + 7][to]
+            keys.append(key)
+            scores.append(score)
+        keys.reverse()
+        scores.reverse()
+        self._key_stack[:] = keys
+        self._score_stack[:] = scores
+
+    def rebuild_piece_sets(self) -> None:
+        """按格子顺序重建棋子集合，使其遍历顺序只取决于局面、与走子历史无关（确定性搜索用）"""
+        self._pieces, self._kings = self._scan_pieces()
+
+    def _scan_pieces(self) -> tuple[dict[Side, set[int]], dict[Side, int | None]]:
+        pieces = {Side.RED: set(), Side.BLACK: set()}
+        kings = {Side.RED: None, Side.BLACK: None}
+        for i, p in enumerate(self.squares):
+            if p == 0:
+                continue
+            side = Side.RED if p > 0 else Side.BLACK
+            pieces[side].add(i)
+            if p == side * Piece.SHUAI:
+                kings[side] = i
+        return pieces, kings
+
+    @property
+    def zobrist_key(self) -> int:
+        return self._key
+
+    @property
+    def pst_score(self) -> int:
+        """子力+位置 分（红方视角，正数红优）"""
+        return self._score
+
+    def _scan_occupancy(self) -> tuple[list[int], list[int]]:
+        rank_occ = [0] * BOARD_ROWS
+        file_occ = [0] * BOARD_COLS
+        for i, p in enumerate(self.squares):
+            if p != 0:
+                r, c = i_to_rc(i)
+                rank_occ[r] |= 1 << c
+                file_occ[c] |= 1 << r
+        return rank_occ, file_occ
+
+    def _build_mailbox(self) -> list[int]:
+        mailbox = [OFFBOARD] * MAILBOX_SIZE
+        for i, p in enumerate(self.squares):
+            mailbox[MAILBOX_OF[i]] = p
+        return mailbox
+
+    def verify_incremental(self) -> None:
+        """校验增量维护的状态与全盘重算一致"""
+        assert self._key == calc_zobrist_key(self), "zobrist key 增量更新错误"
+        assert self._score == calc_pst_score(self), "局面分增量更新错误"
+        assert (self._pieces, self._kings) == self._scan_pieces(), "棋子列表增量更新错误"
+        assert (self._rank_occ, self._file_occ) == self._scan_occupancy(), "行列掩码增量更新错误"
+        assert self._mailbox == self._build_mailbox(), "mailbox 增量更新错误"
 
     def piece_at(self, idx: int) -> int:
         return self.squares[idx]
 
+    @property
+    def move_stack(self) -> list[Move]:
+        """走子历史（Move 列表，供界面等外部使用；搜索直接读 move_codes）"""
+        return [code_to_move(code) for code in self.move_codes]
+
     def make_move(self, mv: Move) -> None:
         """执行走法（不检查合法性）"""
-        piece = self.squares[mv.frm]
-        captured = self.squares[mv.to]
-        # push 带 captured 的 move（便于 undo）
-        real_mv = Move(mv.frm, mv.to, captured=captured)
-        self.move_stack.append(real_mv)
+        self.make(mv.frm | mv.to << MOVE_TO_SHIFT)
+
+    def make(self, code: int) -> None:
+        """执行整数编码的走法（只用起止格，走动的子和被吃子从棋盘读出；不检查合法性）"""
+        frm = code & 0x7F
+        to = code >> MOVE_TO_SHIFT & 0x7F
+        squares = self.squares
+        piece = squares[frm]
+        captured = squares[to]
+        # 压栈的编码带上 captured（便于 undo）
+        self.move_codes.append(frm | to << MOVE_TO_SHIFT | (captured & 0xF) << MOVE_CAPTURED_SHIFT
+                               | (piece & 0xF) << MOVE_PIECE_SHIFT)
+        self._key_stack.append(self._key)
+        self._score_stack.append(self._score)
+
+        z = ZOBRIST_TABLE[piece + 7]
+        pst = PST[piece + 7]
+        key = self._key ^ z[frm] ^ z[to] ^ TURN_KEY
+        score = self._score - pst[frm] + pst[to]
+        if captured:
+            key ^= ZOBRIST_TABLE[captured + 7][to]
+            score -= PST[captured + 7][to]
+        self._key = key
+        self._score = score
+
+        if piece > 0:
+            own, opp = self._pieces[Side.RED], self._pieces[Side.BLACK]
+        else:
+            own, opp = self._pieces[Side.BLACK], self._pieces[Side.RED]
+        own.remove(frm)
+        own.add(to)
+        if captured:
+            opp.remove(to)
+            if captured == Piece.SHUAI or captured == -Piece.SHUAI:
+                self._kings[Side.RED if captured > 0 else Side.BLACK] = None
+        if piece == Piece.SHUAI or piece == -Piece.SHUAI:
+            self._kings[Side.RED if piece > 0 else Side.BLACK] = to
+
+        fr, fc = _ROW_OF[frm], _COL_OF[frm]
+        self._rank_occ[fr] ^= 1 << fc
+        self._file_occ[fc] ^= 1 << fr
+        if not captured:
+            tr, tc = _ROW_OF[to], _COL_OF[to]
+            self._rank_occ[tr] |= 1 << tc
+            self._file_occ[tc] |= 1 << tr
+
+        squares[to] = piece
+        squares[frm] = 0
+        self._mailbox[MAILBOX_OF[to]] = piece
+        self._mailbox[MAILBOX_OF[frm]] = 0
+        self.side_to_move = _OPPONENT[self.side_to_move]
+        if Board.debug_verify:
+            self.verify_incremental()
 
-        self.squares[mv.to] = piece
-        self.squares[mv.frm] = 0
-        self.side_to_move = Side(-int(self.side_to_move))
+    def make_null_move(self) -> None:
+        """空着：只交换走子方，不动棋子（用于空着剪枝，须与 undo_null_move 配对）"""
+        self._key ^= TURN_KEY
+        self.side_to_move = _OPPONENT[self.side_to_move]
+
+    def undo_null_move(self) -> None:
+        self._key ^= TURN_KEY
+        self.side_to_move = _OPPONENT[self.side_to_move]
 
     def undo_move(self) -> None:
         """撤销一步"""
-        if not self.move_stack:
-            return
-        mv = self.move_stack.pop()
-        piece = self.squares[mv.to]
-        self.squares[mv.frm] = piece
-        self.squares[mv.to] = mv.captured
-        self.side_to_move = Side(-int(self.side_to_move))
+        if self.move_codes:
+            self.unmake()
+
+    def unmake(self) -> None:
+        """撤销一步（走子栈不能为空）"""
+        code = self.move_codes.pop()
+        frm = code & 0x7F
+        to = code >> MOVE_TO_SHIFT & 0x7F
+        captured = PIECE_OF_NIBBLE[code >> MOVE_CAPTURED_SHIFT & 0xF]
+        squares = self.squares
+        piece = squares[to]
+        squares[frm] = piece
+        squares[to] = captured
+        self._mailbox[MAILBOX_OF[frm]] = piece
+        self._mailbox[MAILBOX_OF[to]] = captured
+        self.side_to_move = _OPPONENT[self.side_to_move]
+        self._key = self._key_stack.pop()
+
+        if piece > 0:
+            own, opp = self._pieces[Side.RED], self._pieces[Side.BLACK]
+        else:
+            own, opp = self._pieces[Side.BLACK], self._pieces[Side.RED]
+        own.remove(to)
+        own.add(frm)
+        if captured:
+            opp.add(to)
+            if captured == Piece.SHUAI or captured == -Piece.SHUAI:
+                self._kings[Side.RED if captured > 0 else Side.BLACK] = to
+        if piece == Piece.SHUAI or piece == -Piece.SHUAI:
+            self._kings[Side.RED if piece > 0 else Side.BLACK] = frm
+
+        fr, fc = _ROW_OF[frm], _COL_OF[frm]
+        self._rank_occ[fr] |= 1 << fc
+        self._file_occ[fc] |= 1 << fr
+        if not captured:
+            tr, tc = _ROW_OF[to], _COL_OF[to]
+            self._rank_occ[tr] ^= 1 << tc
+            self._file_occ[tc] ^= 1 << tr
+        self._score = self._score_stack.pop()
+        if Board.debug_verify:
+            self.verify_incremental()
 
     def pretty(self) -> str:
         """文本棋盘显示"""
@@ -110,13 +371,27 @@ class Board:
         return "\n".join(lines) + f"\n回合: {turn}"
 
     def iter_pieces(self, side: Side):
-        for i, p in enumerate(self.squares):
-            if p != 0 and side_of(p) == side:
-                yield i, p
+        """遍历 side 方棋子 (格子, 棋子)，按棋子列表走，O(棋子数)"""
+        squares = self.squares
+        for i in tuple(self._pieces[side]):
+            yield i, squares[i]
+
+    def piece_count(self, side: Side) -> int:
+        return len(self._pieces[side])
+
+    def king_square(self, side: Side) -> int | None:
+        """side 方将帅所在格子，O(1)"""
+        return self._kings[side]
 
     def find_piece(self, piece_code: int) -> int | None:
-        for i, p in enumerate(self.squares):
-            if p == piece_code:
+        if piece_code == 0:
+            return next((i for i, p in enumerate(self.squares) if p == 0), None)
+        side = Side.RED if piece_code > 0 else Side.BLACK
+        if piece_code == side * Piece.SHUAI:
+            return self._kings[side]
+        squares = self.squares
+        for i in self._pieces[side]:
+            if squares[i] == piece_code:
                 return i
         return None
 
@@ -13,6 +13,22 @@ def rc_to_i(r: int, c: int) -> int:
 def i_to_rc(i: int) -> tuple[int, int]:
     return divmod(i, BOARD_COLS)
 
+# 带哨兵边框的内部棋盘（mailbox）：每行 16 格，上下左右各留 2 圈边框
+# 走子时按整数增量步进，碰到 OFFBOARD 即停，无需坐标换算和越界判断
+# 对外（PlayScene、Move）仍使用 0..89 的 90 格下标，内部经 MAILBOX_OF 转换
+MAILBOX_COLS = 16
+MAILBOX_ROWS = BOARD_ROWS + 4
+MAILBOX_SIZE = MAILBOX_ROWS * MAILBOX_COLS
+OFFBOARD = 99  # 哨兵：非 0，且不等于任何棋子编码
+
+# 方向增量
+DELTA_N = -MAILBOX_COLS
+DELTA_S = MAILBOX_COLS
+DELTA_W = -1
+DELTA_E = 1
+
+MAILBOX_OF = tuple((r + 2) * MAILBOX_COLS + (c + 2) for r in range(BOARD_ROWS) for c in range(BOARD_COLS))
+
 class Side(IntEnum):
     RED = 1
     BLACK = -1
@@ -57,3 +73,15 @@ PIECE_CHAR = {
 
 def char_of(piece_code: int) -> str:
     return PIECE_CHAR.get(piece_code, "?")
+
+# FEN 棋子字母：大写红方、小写黑方（帅 K 仕 A 相 B 马 N 车 R 炮 C 兵 P，读入时也接受 E 象 / H 马）
+FEN_CHAR = {
+    +Piece.SHUAI: "K", +Piece.SHI: "A", +Piece.XIANG: "B", +Piece.MA: "N",
+    +Piece.CHE: "R", +Piece.PAO: "C", +Piece.BING: "P",
+    -Piece.SHUAI: "k", -Piece.SHI: "a", -Piece.XIANG: "b", -Piece.MA: "n",
+    -Piece.CHE: "r", -Piece.PAO: "c", -Piece.BING: "p",
+}
+FEN_PIECE = {ch: code for code, ch in FEN_CHAR.items()}
+FEN_PIECE.update({"E": +Piece.XIANG, "e": -Piece.XIANG, "H": +Piece.MA, "h": -Piece.MA})
+
+START_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1"
@@ -15,3 +15,47 @@ class Move:
         return f"{char_of(self.moved_piece)} Move({i_to_rc(self.frm)}->{i_to_rc(self.to)}, cap={self.captured})"
 
 
+
+# 整数走法编码（搜索、走子的热路径用，不创建 Move 对象）：
+#   位 0..6 起点格，7..13 终点格，14..17 被吃子，18..21 走动的子
+#   （棋子代码取低 4 位：1..7 红方，9..15 黑方即 -7..-1 的补码，0 为无）
+# 低 14 位（起止格）与置换表 / 开局库里的走法编码（tt.encode_move）相同
+# Move 只在界面、工具等对外接口处与整数编码互相转换
+MOVE_TO_SHIFT = 7
+MOVE_CAPTURED_SHIFT = 14
+MOVE_PIECE_SHIFT = 18
+MOVE_SQUARES_MASK = (1 << MOVE_CAPTURED_SHIFT) - 1
+MOVE_CAPTURED_MASK = 0xF << MOVE_CAPTURED_SHIFT
+PIECE_OF_NIBBLE = tuple(n - 16 if n >= 8 else n for n in range(16))  # 半字节 -> 棋子代码
+
+def move_code(frm: int, to: int, moved_piece: int = 0, captured: int = 0) -> int:
+    return (frm | to << MOVE_TO_SHIFT | (captured & 0xF) << MOVE_CAPTURED_SHIFT
+            | (moved_piece & 0xF) << MOVE_PIECE_SHIFT)
+
+def move_to_code(mv: Move) -> int:
+    return move_code(mv.frm, mv.to, mv.moved_piece, mv.captured)
+
+def code_to_move(code: int) -> Move:
+    return Move(code & 0x7F, code >> MOVE_TO_SHIFT & 0x7F,
+                moved_piece=PIECE_OF_NIBBLE[code >> MOVE_PIECE_SHIFT & 0xF],
+                captured=PIECE_OF_NIBBLE[code >> MOVE_CAPTURED_SHIFT & 0xF])
+
+# ICCS 坐标记谱：列 a~i（红方从左到右），行 0~9（红方底线为 0），如 "h2e2" 表示炮二平五
+def square_to_iccs(sq: int) -> str:
+    r, c = i_to_rc(sq)
+    return "abcdefghi"[c] + str(9 - r)
+
+def iccs_to_square(text: str) -> int:
+    col = "abcdefghi".index(text[0].lower())
+    rank = int(text[1])
+    return rc_to_i(9 - rank, col)
+
+def to_iccs(mv: Move) -> str:
+    return square_to_iccs(mv.frm) + square_to_iccs(mv.to)
+
+def parse_iccs(text: str) -> Move:
+    """解析 ICCS 走法（只含起止格，moved_piece/captured 需在棋盘上匹配合法走法得到）"""
+    text = text.strip().replace("-", "")
+    if len(text) != 4:
+        raise ValueError(f"非法 ICCS 走法: {text!r}")
+    return Move(iccs_to_square(text[:2]), iccs_to_square(text[2:]))
@@ -1,39 +1,90 @@
 from __future__ import annotations
 from .board import Board
-from .move import Move
-from .const import Side, Piece, type_of, side_of, i_to_rc, rc_to_i, BOARD_ROWS, BOARD_COLS
+from .move import Move, MOVE_TO_SHIFT, MOVE_CAPTURED_SHIFT, MOVE_PIECE_SHIFT, MOVE_SQUARES_MASK, code_to_move
+from .const import Side, Piece, type_of, side_of, i_to_rc, rc_to_i, BOARD_ROWS, BOARD_COLS, BOARD_SIZE
 from . import rules
 
-def gen_pseudo_legal_moves(board: Board, side: Side) -> list[Move]:
-    moves: list[Move] = []
-    for pos, p in board.iter_pieces(side):
-        t = type_of(p)
-        if t == Piece.CHE:
-            moves.extend(_gen_che(board, pos, side))
-        elif t == Piece.MA:
-            moves.extend(_gen_ma(board, pos, side))
-        elif t == Piece.PAO:
-            moves.extend(_gen_pao(board, pos, side))
-        elif t == Piece.BING:
-            moves.extend(_gen_bing(board, pos, side))
-        elif t == Piece.SHUAI:
-            moves.extend(_gen_shuai(board, pos, side))
-        elif t == Piece.SHI:
-            moves.extend(_gen_shi(board, pos, side))
-        elif t == Piece.XIANG:
-            moves.extend(_gen_xiang(board, pos, side))
+# 走法生成在内部全部产生整数编码的走法（见 move.py），追加到调用方给的列表里；
+# gen_*_codes 供搜索使用，返回 Move 的 gen_*_moves / validate_move 供界面、工具等外部使用
+# 各棋子的生成函数都不创建中间列表/元组：直接遍历预计算表，走法追加到同一个 moves，
+# 棋子直接按 board._pieces 的集合遍历（生成期间不改动棋盘，不需要像 iter_pieces 那样先复制）
+
+def gen_pseudo_legal_codes(board: Board, side: Side, moves: list[int] | None = None) -> list[int]:
+    """生成 side 方的所有伪合法走法（整数编码），追加到 moves（为空时新建）"""
+    if moves is None:
+        moves = []
+    squares = board.squares
+    for pos in board._pieces[side]:
+        p = squares[pos]
+        _GENERATORS[p if p > 0 else -p](board, pos, side, moves)
     return moves
 
+def gen_legal_codes(board: Board, side: Side) -> list[int]:
+    """生成side方的所有合法走法（整数编码）"""
+    legal: list[int] = []
+    for code in gen_pseudo_legal_codes(board, side):
+        board.make(code)
+        # 检查"原side是否被将军"（in_check 已包含将帅照面）
+        if not rules.in_check(board, side):
+            legal.append(code)
+        board.unmake()
+    return legal
+
+def gen_capture_codes(board: Board, side: Side, moves: list[int]) -> list[int]:
+    """只生成 side 方的吃子走法（伪合法），追加到 moves"""
+    squares = board.squares
+    for pos in board._pieces[side]:
+        p = squares[pos]
+        _CAPTURE_GENERATORS[p if p > 0 else -p](board, pos, side, moves)
+    return moves
+
+def gen_quiet_codes(board: Board, side: Side, moves: list[int]) -> list[int]:
+    """只生成 side 方的不吃子走法（伪合法），追加到 moves"""
+    squares = board.squares
+    for pos in board._pieces[side]:
+        p = squares[pos]
+        _QUIET_GENERATORS[p if p > 0 else -p](board, pos, side, moves)
+    return moves
+
+def validate_code(board: Board, code: int, side: Side) -> int:
+    """
+    不生成全部走法，检查 code（只看起止格）在当前局面下是否为 side 方的伪合法走法（用于置换表走法）
+    合法时返回本局面生成的完整编码（含走动的子和被吃子），否则返回 0
+    """
+    frm = code & 0x7F
+    piece = board.squares[frm] if frm < BOARD_SIZE else 0
+    if piece == 0 or (piece > 0) != (side == Side.RED):
+        return 0
+    squares = code & MOVE_SQUARES_MASK
+    moves: list[int] = []  # 只生成这一个子的走法；可能在多个线程里调用，不共用缓冲区
+    _GENERATORS[piece if piece > 0 else -piece](board, frm, side, moves)
+    for m in moves:
+        if m & MOVE_SQUARES_MASK == squares:
+            return m
+    return 0
+
+def gen_pseudo_legal_moves(board: Board, side: Side) -> list[Move]:
+    return [code_to_move(code) for code in gen_pseudo_legal_codes(board, side)]
+
 def gen_legal_moves(board: Board, side: Side) -> list[Move]:
     """生成side方的所有合法走法"""
-    legal: list[Move] = []
-    for mv in gen_pseudo_legal_moves(board, side):
-        board.make_move(mv)
-        # 检查"原side是否被将军"
-        if (not rules.in_check(board, side)) and (not rules.is_face_to_face(board)):
-            legal.append(mv)
-        board.undo_move()
-    return legal
+    return [code_to_move(code) for code in gen_legal_codes(board, side)]
+
+def gen_captures(board: Board, side: Side) -> list[Move]:
+    """只生成 side 方的吃子走法（伪合法）"""
+    return [code_to_move(code) for code in gen_capture_codes(board, side, [])]
+
+def gen_quiets(board: Board, side: Side) -> list[Move]:
+    """只生成 side 方的不吃子走法（伪合法）"""
+    return [code_to_move(code) for code in gen_quiet_codes(board, side, [])]
+
+def validate_move(board: Board, mv: Move, side: Side) -> Move | None:
+    """
+    不生成全部走法，检查 mv 在当前局面下是否为 side 方的伪合法走法
+    合法时返回本局面生成的对应走法（含正确的 captured），否则返回 None
+    """
+    code = validate_code(board, mv.frm | mv.to << MOVE_TO_SHIFT, side)
+    return code_to_move(code) if code else None
 
 def _in_bounds(r: int, c: int) -> bool:
     return 0 <= r < BOARD_ROWS and 0 <= c < BOARD_COLS
@@ -53,123 +104,342 @@ def _has_crossed_river(r: int, side: Side) -> bool:
 def _in_own_side(r: int, side: Side) -> bool:
     return (r >= 5) if side == Side.RED else (r <= 4)
 
-def _try_add(board: Board, side: Side, frm: int, to: int, moved_piece: int, moves: list[Move]) -> bool:
-    target = board.piece_at(to)
-    if target == 0:
-        moves.append(Move(frm, to, moved_piece=moved_piece))
-        return True
-    else:
-        if side_of(target) != side:
-            moves.append(Move(frm, to, moved_piece=moved_piece, captured=target))
-        return False
+def _gen_slider(board: Board, pos: int, quiet, hits, moves: list[int]) -> None:
+    """车、炮沿一条线：quiet 为可走的空格偏移，hits 为可能吃到的子的偏移"""
+    squares = board.squares
+    piece = squares[pos]
+    base = pos | (piece & 0xF) << MOVE_PIECE_SHIFT
+    for d in quiet:
+        moves.append(base | (pos + d) << MOVE_TO_SHIFT)
+    for d in hits:
+        target = squares[pos + d]
+        if (target > 0) != (piece > 0):
+            moves.append(base | (pos + d) << MOVE_TO_SHIFT | (target & 0xF) << MOVE_CAPTURED_SHIFT)
 
-def _gen_che(board: Board, pos: int, side: Side) -> list[Move]:
-    moves: list[Move] = []
-    piece = board.piece_at(pos)
-    r, c = i_to_rc(pos)
-    # 四个方向直线
-    for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-        rr, cc = r + dr, c + dc
-        while _in_bounds(rr, cc):
-            to = rc_to_i(rr, cc)
-            if not _try_add(board, side, pos, to, piece, moves):
-                break
-            rr += dr
-            cc += dc
-    return moves
+def _gen_che(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    r, c = _ROW_OF[pos], _COL_OF[pos]
+    # 行、列各查一次表：空格直接走，第一个阻挡子若是敌子则可吃
+    quiet, hits = _RANK_SLIDES[c][board._rank_occ[r]]
+    _gen_slider(board, pos, quiet, hits, moves)
+    quiet, hits = _FILE_SLIDES[r][board._file_occ[c]]
+    _gen_slider(board, pos, quiet, hits, moves)
 
-def _gen_ma(board: Board, pos: int, side: Side) -> list[Move]:
-    moves: list[Move] = []
-    piece = board.piece_at(pos)
-    r, c = i_to_rc(pos)
-    for dr, dc, lr, lc in [(-2,-1,-1,0),(-2,1,-1,0),(2,-1,1,0),(2,1,1,0),
-                           (-1,-2,0,-1),(-1,2,0,1),(1,-2,0,-1),(1,2,0,1)]:
-        rr, cc = r + dr, c + dc
-        lr, lc = r + lr, c + lc
-        if _in_bounds(rr, cc) and board.piece_at(rc_to_i(lr, lc)) == 0:
-            to = rc_to_i(rr, cc)
-            _try_add(board, side, pos, to, piece, moves)
-    return moves
+def _gen_ma(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    squares = board.squares
+    piece = squares[pos]
+    base = pos | (piece & 0xF) << MOVE_PIECE_SHIFT
+    for to, leg in _MA_MOVES[pos]:
+        if squares[leg] == 0:
+            target = squares[to]
+            if target == 0:
+                moves.append(base | to << MOVE_TO_SHIFT)
+            elif (target > 0) != (piece > 0):
+                moves.append(base | to << MOVE_TO_SHIFT | (target & 0xF) << MOVE_CAPTURED_SHIFT)
 
-def _gen_pao(board: Board, pos: int, side: Side) -> list[Move]:
-    moves: list[Move] = []
-    piece = board.piece_at(pos)
-    r, c = i_to_rc(pos)
-    # 四个方向直线
-    for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-        rr, cc = r + dr, c + dc
-        screen_found = False
-        # 先照车那样走空格
-        while _in_bounds(rr, cc):
-            to = rc_to_i(rr, cc)
-            target = board.piece_at(to)
-
-            if not screen_found:
-                if target == 0:
-                    moves.append(Move(pos, to, moved_piece=piece))
-                else:
-                    screen_found = True # 找到炮架，准备吃子
-            else:
-                if target != 0:
-                    if side_of(target) != side:
-                        moves.append(Move(pos, to, moved_piece=piece, captured=target))
-                    break
-            rr += dr
-            cc += dc
-    return moves
+def _gen_pao(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    r, c = _ROW_OF[pos], _COL_OF[pos]
+    rank_occ = board._rank_occ[r]
+    file_occ = board._file_occ[c]
+    # 不吃子时与车相同；吃子目标为隔一个炮架后的第一个子
+    _gen_slider(board, pos, _RANK_SLIDES[c][rank_occ][0], _RANK_CANNON_HITS[c][rank_occ], moves)
+    _gen_slider(board, pos, _FILE_SLIDES[r][file_occ][0], _FILE_CANNON_HITS[r][file_occ], moves)
 
-def _gen_bing(board: Board, pos: int, side: Side) -> list[Move]:
-    moves: list[Move] = []
-    piece = board.piece_at(pos)
-    r, c = i_to_rc(pos)
-    forward = -1 if side == Side.RED else 1
-    # 未过河
-    rr, cc = r + forward, c
-    if _in_bounds(rr, cc):
-        to = rc_to_i(rr, cc)
-        _try_add(board, side, pos, to, piece, moves)
-
-    # 过河后可左右
-    if _has_crossed_river(r, side):
-        for dc in [-1, 1]:
-            rr, cc = r, c + dc
+def _gen_steps(board: Board, pos: int, targets: tuple[int, ...], moves: list[int]) -> None:
+    """无蹩腿的一步走法（兵、帅、士）：逐个目标格判断是否被己方占据"""
+    squares = board.squares
+    piece = squares[pos]
+    base = pos | (piece & 0xF) << MOVE_PIECE_SHIFT
+    for to in targets:
+        target = squares[to]
+        if target == 0:
+            moves.append(base | to << MOVE_TO_SHIFT)
+        elif (target > 0) != (piece > 0):
+            moves.append(base | to << MOVE_TO_SHIFT | (target & 0xF) << MOVE_CAPTURED_SHIFT)
+
+def _gen_bing(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    _gen_steps(board, pos, _BING_MOVES[side][pos], moves)
+
+def _gen_shuai(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    _gen_steps(board, pos, _SHUAI_MOVES[side][pos], moves)
+
+def _gen_shi(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    _gen_steps(board, pos, _SHI_MOVES[side][pos], moves)
+
+def _gen_xiang(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    squares = board.squares
+    piece = squares[pos]
+    base = pos | (piece & 0xF) << MOVE_PIECE_SHIFT
+    for to, eye in _XIANG_MOVES[side][pos]:
+        if squares[eye] == 0:
+            target = squares[to]
+            if target == 0:
+                moves.append(base | to << MOVE_TO_SHIFT)
+            elif (target > 0) != (piece > 0):
+                moves.append(base | to << MOVE_TO_SHIFT | (target & 0xF) << MOVE_CAPTURED_SHIFT)
+
+# ---------------------------------------------------------
+# 预计算走法表（导入时构建一次）
+# - _MA_MOVES[sq] = ((目标格, 马腿格), ...)
+# - _XIANG_MOVES[side][sq] = ((目标格, 象眼格), ...)
+# - _BING_MOVES / _SHUAI_MOVES / _SHI_MOVES[side][sq] = (目标格, ...)
+# ---------------------------------------------------------
+
+def _build_ma_moves() -> tuple:
+    table = []
+    for pos in range(BOARD_SIZE):
+        r, c = i_to_rc(pos)
+        entries = []
+        for dr, dc, lr, lc in [(-2,-1,-1,0),(-2,1,-1,0),(2,-1,1,0),(2,1,1,0),
+                               (-1,-2,0,-1),(-1,2,0,1),(1,-2,0,-1),(1,2,0,1)]:
+            rr, cc = r + dr, c + dc
             if _in_bounds(rr, cc):
-                to = rc_to_i(rr, cc)
-                _try_add(board, side, pos, to, piece, moves)
-    return moves
+                entries.append((rc_to_i(rr, cc), rc_to_i(r + lr, c + lc)))
+        table.append(tuple(entries))
+    return tuple(table)
 
-def _gen_shuai(board: Board, pos: int, side: Side) -> list[Move]:
-    moves: list[Move] = []
-    piece = board.piece_at(pos)
-    r, c = i_to_rc(pos)
-    for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-        rr, cc = r + dr, c + dc
-        if _in_bounds(rr, cc) and _in_palace(rr, cc, side):
-            to = rc_to_i(rr, cc)
-            _try_add(board, side, pos, to, piece,moves)
-    return moves
+def _build_xiang_moves(side: Side) -> tuple:
+    table = []
+    for pos in range(BOARD_SIZE):
+        r, c = i_to_rc(pos)
+        entries = []
+        for dr, dc in [(-2,-2),(-2,2),(2,-2),(2,2)]:
+            rr, cc = r + dr, c + dc
+            if _in_bounds(rr, cc) and _in_own_side(rr, side):
+                entries.append((rc_to_i(rr, cc), rc_to_i(r + dr // 2, c + dc // 2)))
+        table.append(tuple(entries))
+    return tuple(table)
+
+def _build_palace_moves(side: Side, deltas) -> tuple:
+    table = []
+    for pos in range(BOARD_SIZE):
+        r, c = i_to_rc(pos)
+        table.append(tuple(rc_to_i(r + dr, c + dc) for dr, dc in deltas
+                           if _in_bounds(r + dr, c + dc) and _in_palace(r + dr, c + dc, side)))
+    return tuple(table)
+
+def _build_bing_moves(side: Side) -> tuple:
+    table = []
+    forward = -1 if side == Side.RED else 1
+    for pos in range(BOARD_SIZE):
+        r, c = i_to_rc(pos)
+        deltas = [(forward, 0)]
+        # 过河后可左右
+        if _has_crossed_river(r, side):
+            deltas += [(0, -1), (0, 1)]
+        table.append(tuple(rc_to_i(r + dr, c + dc) for dr, dc in deltas if _in_bounds(r + dr, c + dc)))
+    return tuple(table)
+
+_MA_MOVES = _build_ma_moves()
+_XIANG_MOVES = {side: _build_xiang_moves(side) for side in Side}
+_SHUAI_MOVES = {side: _build_palace_moves(side, [(-1,0),(1,0),(0,-1),(0,1)]) for side in Side}
+_SHI_MOVES = {side: _build_palace_moves(side, [(-1,-1),(-1,1),(1,-1),(1,1)]) for side in Side}
+_BING_MOVES = {side: _build_bing_moves(side) for side in Side}
+
+def _build_slide_tables(length: int, stride: int) -> tuple[tuple, tuple]:
+    """
+    车炮的行/列滑动表，按 [线上位置][该线占位掩码] 索引：
+    - slides = (空格偏移, 第一个阻挡子偏移)
+    - cannon_hits = 隔一个炮架后第一个子的偏移
+    偏移为格子下标差（行方向 stride=1，列方向 stride=BOARD_COLS）
+    """
+    slides = []
+    cannon_hits = []
+    for pos in range(length):
+        pos_slides = []
+        pos_cannon = []
+        for occ in range(1 << length):
+            quiet, hits, cannon = [], [], []
+            for step in (-1, 1):
+                i = pos + step
+                while 0 <= i < length and not (occ >> i) & 1:
+                    quiet.append((i - pos) * stride)
+                    i += step
+                if 0 <= i < length:
+                    hits.append((i - pos) * stride)
+                    i += step
+                    while 0 <= i < length and not (occ >> i) & 1:
+                        i += step
+                    if 0 <= i < length:
+                        cannon.append((i - pos) * stride)
+            pos_slides.append((tuple(quiet), tuple(hits)))
+            pos_cannon.append(tuple(cannon))
+        slides.append(tuple(pos_slides))
+        cannon_hits.append(tuple(pos_cannon))
+    return tuple(slides), tuple(cannon_hits)
+
+_ROW_OF = tuple(i // BOARD_COLS for i in range(BOARD_SIZE))
+_COL_OF = tuple(i % BOARD_COLS for i in range(BOARD_SIZE))
+_RANK_SLIDES, _RANK_CANNON_HITS = _build_slide_tables(BOARD_COLS, 1)
+_FILE_SLIDES, _FILE_CANNON_HITS = _build_slide_tables(BOARD_ROWS, BOARD_COLS)
+
+# ---------------------------------------------------------
+# 分阶段生成：只吃子 / 只不吃子，结果追加到传入的 moves
+# ---------------------------------------------------------
+
+def _add_captures(squares: list[int], pos: int, piece: int, targets, moves: list[int]) -> None:
+    base = pos | (piece & 0xF) << MOVE_PIECE_SHIFT
+    for to in targets:
+        target = squares[to]
+        if target != 0 and (target > 0) != (piece > 0):
+            moves.append(base | to << MOVE_TO_SHIFT | (target & 0xF) << MOVE_CAPTURED_SHIFT)
+
+def _add_quiets(squares: list[int], pos: int, piece: int, targets, moves: list[int]) -> None:
+    base = pos | (piece & 0xF) << MOVE_PIECE_SHIFT
+    for to in targets:
+        if squares[to] == 0:
+            moves.append(base | to << MOVE_TO_SHIFT)
+
+def _cap_slider(squares: list[int], pos: int, rank_targets, file_targets, moves: list[int]) -> None:
+    """车、炮吃子：行、列上可能吃到的子的偏移分两组给出（不拼接，免得每次新建元组）"""
+    piece = squares[pos]
+    base = pos | (piece & 0xF) << MOVE_PIECE_SHIFT
+    for d in rank_targets:
+        target = squares[pos + d]
+        if (target > 0) != (piece > 0):
+            moves.append(base | (pos + d) << MOVE_TO_SHIFT | (target & 0xF) << MOVE_CAPTURED_SHIFT)
+    for d in file_targets:
+        target = squares[pos + d]
+        if (target > 0) != (piece > 0):
+            moves.append(base | (pos + d) << MOVE_TO_SHIFT | (target & 0xF) << MOVE_CAPTURED_SHIFT)
+
+def _cap_che(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    r, c = _ROW_OF[pos], _COL_OF[pos]
+    _cap_slider(board.squares, pos, _RANK_SLIDES[c][board._rank_occ[r]][1], _FILE_SLIDES[r][board._file_occ[c]][1],
+                moves)
+
+def _cap_pao(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    r, c = _ROW_OF[pos], _COL_OF[pos]
+    _cap_slider(board.squares, pos, _RANK_CANNON_HITS[c][board._rank_occ[r]],
+                _FILE_CANNON_HITS[r][board._file_occ[c]], moves)
+
+def _quiet_slider(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    """车、炮不吃子时走法相同"""
+    base = pos | (board.squares[pos] & 0xF) << MOVE_PIECE_SHIFT
+    r, c = _ROW_OF[pos], _COL_OF[pos]
+    for d in _RANK_SLIDES[c][board._rank_occ[r]][0]:
+        moves.append(base | (pos + d) << MOVE_TO_SHIFT)
+    for d in _FILE_SLIDES[r][board._file_occ[c]][0]:
+        moves.append(base | (pos + d) << MOVE_TO_SHIFT)
+
+def _cap_jump(squares: list[int], pos: int, table, moves: list[int]) -> None:
+    """马、象吃子：table 为 ((目标格, 马腿/象眼格), ...)"""
+    piece = squares[pos]
+    base = pos | (piece & 0xF) << MOVE_PIECE_SHIFT
+    for to, block in table:
+        if squares[block] == 0:
+            target = squares[to]
+            if target != 0 and (target > 0) != (piece > 0):
+                moves.append(base | to << MOVE_TO_SHIFT | (target & 0xF) << MOVE_CAPTURED_SHIFT)
+
+def _quiet_jump(squares: list[int], pos: int, table, moves: list[int]) -> None:
+    """马、象不吃子"""
+    base = pos | (squares[pos] & 0xF) << MOVE_PIECE_SHIFT
+    for to, block in table:
+        if squares[block] == 0 and squares[to] == 0:
+            moves.append(base | to << MOVE_TO_SHIFT)
+
+def _cap_ma(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    _cap_jump(board.squares, pos, _MA_MOVES[pos], moves)
 
-def _gen_shi(board: Board, pos: int, side: Side) -> list[Move]:
+def _quiet_ma(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    _quiet_jump(board.squares, pos, _MA_MOVES[pos], moves)
+
+def _cap_xiang(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    _cap_jump(board.squares, pos, _XIANG_MOVES[side][pos], moves)
+
+def _quiet_xiang(board: Board, pos: int, side: Side, moves: list[int]) -> None:
+    _quiet_jump(board.squares, pos, _XIANG_MOVES[side][pos], moves)
+
+def _step_stage(table, add):
+    def gen(board: Board, pos: int, side: Side, moves: list) -> None:
+        add(board.squares, pos, board.squares[pos], table[side][pos], moves)
+    return gen
+
+_CAPTURE_GENERATORS = [None] * 8
+_CAPTURE_GENERATORS[Piece.SHUAI] = _step_stage(_SHUAI_MOVES, _add_captures)
+_CAPTURE_GENERATORS[Piece.SHI] = _step_stage(_SHI_MOVES, _add_captures)
+_CAPTURE_GENERATORS[Piece.XIANG] = _cap_xiang
+_CAPTURE_GENERATORS[Piece.CHE] = _cap_che
+_CAPTURE_GENERATORS[Piece.MA] = _cap_ma
+_CAPTURE_GENERATORS[Piece.PAO] = _cap_pao
+_CAPTURE_GENERATORS[Piece.BING] = _step_stage(_BING_MOVES, _add_captures)
+
+_QUIET_GENERATORS = [None] * 8
+_QUIET_GENERATORS[Piece.SHUAI] = _step_stage(_SHUAI_MOVES, _add_quiets)
+_QUIET_GENERATORS[Piece.SHI] = _step_stage(_SHI_MOVES, _add_quiets)
+_QUIET_GENERATORS[Piece.XIANG] = _quiet_xiang
+_QUIET_GENERATORS[Piece.CHE] = _quiet_slider
+_QUIET_GENERATORS[Piece.MA] = _quiet_ma
+_QUIET_GENERATORS[Piece.PAO] = _quiet_slider
+_QUIET_GENERATORS[Piece.BING] = _step_stage(_BING_MOVES, _add_quiets)
+
+# 按棋子类型（绝对值）分派生成函数
+_GENERATORS = [None] * 8
+_GENERATORS[Piece.SHUAI] = _gen_shuai
+_GENERATORS[Piece.SHI] = _gen_shi
+_GENERATORS[Piece.XIANG] = _gen_xiang
+_GENERATORS[Piece.CHE] = _gen_che
+_GENERATORS[Piece.MA] = _gen_ma
+_GENERATORS[Piece.PAO] = _gen_pao
+_GENERATORS[Piece.BING] = _gen_bing
+
+# ---------------------------------------------------------
+# 逆向走法（残局库逆推用）：当前局面是 side 方刚走完一步不吃子的棋，
+# 列出它可能是怎么走过来的。Move(frm=原来的格, to=现在的格)，对 Move(to, frm) 调用
+# board.make_move 即退回到上一个局面。
+# 只保证该走法在上一个局面中伪合法，上一个局面是否合法（对方是否被将军）由调用方检查
+# ---------------------------------------------------------
+
+def gen_unmoves(board: Board, side: Side) -> list[Move]:
+    """生成 side 方所有不吃子的逆向走法"""
     moves: list[Move] = []
-    piece = board.piece_at(pos)
-    r, c = i_to_rc(pos)
-    for dr, dc in [(-1,-1),(-1,1),(1,-1),(1,1)]:
-        rr, cc = r + dr, c + dc
-        if _in_bounds(rr, cc) and _in_palace(rr, cc, side):
-            to = rc_to_i(rr, cc)
-            _try_add(board, side, pos, to, piece, moves)
+    for pos, p in board.iter_pieces(side):
+        _UNMOVE_GENERATORS[p if p > 0 else -p](board, pos, side, moves)
     return moves
 
-def _gen_xiang(board: Board, pos: int, side: Side) -> list[Move]:
-    moves: list[Move] = []
-    piece = board.piece_at(pos)
-    r, c = i_to_rc(pos)
+def _build_ma_unmoves() -> tuple:
+    """_MA_UNMOVES[sq] = ((起点格, 从起点跳到 sq 的马腿格), ...)：马腿靠近起点，正反向不对称"""
+    table = [[] for _ in range(BOARD_SIZE)]
+    for frm in range(BOARD_SIZE):
+        for to, leg in _MA_MOVES[frm]:
+            table[to].append((frm, leg))
+    return tuple(tuple(t) for t in table)
 
-    for dr, dc, lr, lc in [(-2,-2,-1,-1),(-2,2,-1,1),(2,-2,1,-1),(2,2,1,1)]:
-        rr, cc = r + dr, c + dc
-        lr, lc= r + lr, c + lc
-        if (_in_own_side(rr, side) and _in_bounds(rr, cc) and board.piece_at(rc_to_i(lr, lc)) == 0):
-            to = rc_to_i(rr, cc)
-            _try_add(board, side, pos, to, piece, moves)
+def _build_bing_unmoves(side: Side) -> tuple:
+    table = [[] for _ in range(BOARD_SIZE)]
+    for frm in range(BOARD_SIZE):
+        for to in _BING_MOVES[side][frm]:
+            table[to].append(frm)
+    return tuple(tuple(t) for t in table)
 
-    return moves
+_MA_UNMOVES = _build_ma_unmoves()
+_BING_UNMOVES = {side: _build_bing_unmoves(side) for side in Side}
+
+def _add_unmoves(squares: list[int], pos: int, piece: int, sources, moves: list[Move]) -> None:
+    for frm in sources:
+        if squares[frm] == 0:
+            moves.append(Move(frm, pos, moved_piece=piece))
+
+def _unmove_slider(board: Board, pos: int, side: Side, moves: list[Move]) -> None:
+    """车、炮不吃子的滑动是对称的：能从 pos 滑到的空格，也能从那里滑回 pos"""
+    piece = board.squares[pos]
+    r, c = _ROW_OF[pos], _COL_OF[pos]
+    for d in _RANK_SLIDES[c][board._rank_occ[r]][0] + _FILE_SLIDES[r][board._file_occ[c]][0]:
+        moves.append(Move(pos + d, pos, moved_piece=piece))
+
+def _unmove_ma(board: Board, pos: int, side: Side, moves: list[Move]) -> None:
+    squares = board.squares
+    _add_unmoves(squares, pos, squares[pos], [frm for frm, leg in _MA_UNMOVES[pos] if squares[leg] == 0], moves)
+
+def _unmove_xiang(board: Board, pos: int, side: Side, moves: list[Move]) -> None:
+    squares = board.squares
+    _add_unmoves(squares, pos, squares[pos], [frm for frm, eye in _XIANG_MOVES[side][pos] if squares[eye] == 0], moves)
+
+_UNMOVE_GENERATORS = [None] * 8
+_UNMOVE_GENERATORS[Piece.SHUAI] = _step_stage(_SHUAI_MOVES, _add_unmoves)
+_UNMOVE_GENERATORS[Piece.SHI] = _step_stage(_SHI_MOVES, _add_unmoves)
+_UNMOVE_GENERATORS[Piece.XIANG] = _unmove_xiang
+_UNMOVE_GENERATORS[Piece.CHE] = _unmove_slider
+_UNMOVE_GENERATORS[Piece.MA] = _unmove_ma
+_UNMOVE_GENERATORS[Piece.PAO] = _unmove_slider
+_UNMOVE_GENERATORS[Piece.BING] = _step_stage(_BING_UNMOVES, _add_unmoves)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+from array import array
+
+from .board import Board
+from .const import BOARD_SIZE, Side
+
+# 定长二进制局面编码：每个局面 46 字节 = 92 个半字节（高 4 位在前）
+#   第 0..89 个半字节：各格棋子代码的低 4 位（0 空，1..7 红方，9..15 黑方即 -7..-1 的补码）
+#   第 90 个半字节：走棋方（0 红，1 黑）；第 91 个：0（补齐）
+# 只记录盘面和走棋方（与 Zobrist 哈希覆盖的内容相同），不记录走子历史
+# 编码结果是 bytes，可直接做字典键/集合元素、写文件、在进程间传递
+# 批量编解码把所有局面拼成一段字节后用 bytes.translate、切片赋值和大整数位运算一次处理，
+# 不为每个格子创建 Python 对象
+
+PACKED_SIZE = 46
+_NIBBLES = 2 * PACKED_SIZE
+
+_TO_NIBBLE = bytes(b & 0x0F for b in range(256))        # int8 棋子代码（按无符号字节）-> 半字节
+_TO_CODE = bytes((n - 16) & 0xFF if n >= 8 else n for n in range(16)) + bytes(240)  # 半字节 -> int8
+_HIGH = bytes(b >> 4 for b in range(256))
+_LOW = bytes(b & 0x0F for b in range(256))
+_SHIFT = bytes((b << 4) & 0xFF for b in range(256))
+
+
+def _records(boards) -> bytearray:
+    """每个局面 92 字节：90 格的棋子代码 + 走棋方 + 补齐"""
+    buf = bytearray()
+    tail = (b"\x00\x00", b"\x01\x00")
+    for b in boards:
+        buf += array("b", b.squares).tobytes()
+        buf += tail[b.side_to_move == Side.BLACK]
+    return buf
+
+
+def pack_many(boards) -> bytes:
+    """批量编码，返回 len(boards) * PACKED_SIZE 字节"""
+    nibbles = _records(boards).translate(_TO_NIBBLE)
+    if not nibbles:
+        return b""
+    high = bytes(nibbles[0::2]).translate(_SHIFT)
+    low = bytes(nibbles[1::2])
+    # 高、低半字节各占一个字节的不同位，整段按大整数做一次或运算即可拼起来
+    n = len(high)
+    return (int.from_bytes(high) | int.from_bytes(low)).to_bytes(n)
+
+
+def pack(board: Board) -> bytes:
+    return pack_many((board,))
+
+
+def unpack_codes(data) -> memoryview:
+    """
+    批量解码为 int8 数组视图（格式 'b'），第 i 个局面占 [i * 92, i * 92 + 92)：
+    前 90 个是各格棋子代码，第 91 个是走棋方（0 红，1 黑）
+    """
+    data = bytes(data)
+    if len(data) % PACKED_SIZE:
+        raise ValueError(f"长度 {len(data)} 不是 {PACKED_SIZE} 的整数倍")
+    nibbles = bytearray(2 * len(data))
+    nibbles[0::2] = data.translate(_HIGH)
+    nibbles[1::2] = data.translate(_LOW)
+    if 8 in nibbles:  # -8 不是棋子代码
+        raise ValueError("非法的棋子代码")
+    return memoryview(nibbles.translate(_TO_CODE)).cast("b")
+
+
+def unpack_many(data) -> list[Board]:
+    codes = unpack_codes(data)
+    boards = []
+    for off in range(0, len(codes), _NIBBLES):
+        side = codes[off + BOARD_SIZE]
+        if side not in (0, 1) or codes[off + BOARD_SIZE + 1]:
+            raise ValueError(f"第 {off // _NIBBLES} 个局面的走棋方非法")
+        boards.append(Board(codes[off:off + BOARD_SIZE].tolist(), Side.BLACK if side else Side.RED))
+    return boards
+
+
+def unpack(data) -> Board:
+    if len(data) != PACKED_SIZE:
+        raise ValueError(f"单个局面应为 {PACKED_SIZE} 字节，实际 {len(data)}")
+    return unpack_many(data)[0]
@@ -0,0 +1,158 @@
+from __future__ import annotations
+from .const import Piece, BOARD_ROWS, BOARD_SIZE, i_to_rc
+
+# 子力价值、位置价值表，及由它们展平的 子力+位置 分值表 PST
+# Board 在 make / unmake 时据此增量维护局面分，所以放在 core（导入时即建好，与 ai 的导入顺序无关）；
+# ai_config 重新导出这两张表，估值调参仍在那里查看
+
+# =========================================================
+# 第一部分：棋子价值表 (Material Value)
+# =========================================================
+# 参考: ElephantEye 中的标准分值 + 象棋理论
+PIECE_PER_VALUE = {
+    Piece.SHUAI: 8888,   # 将帅：无法交换，用极大值表示游戏结束
+    Piece.CHE: 194,       # 车：最强棋子
+    Piece.PAO: 96,       # 炮：需要炮架才能发挥威力
+    Piece.MA: 85,        # 马：比车弱，受限于日字跳跃
+    Piece.XIANG: 20,      # 象/相：纯防御，不过河
+    Piece.SHI: 20,        # 士/仕：护卫将帅，限于九宫
+    Piece.BING: 7,       # 兵/卒：最弱单位
+    Piece.EMPTY: 0        # 空位
+}
+
+# ==========================================================
+# 第二部分：位置价值表 (Piece-Square Tables, PST)
+# ==========================================================
+# 编码思路：每个棋子在 10×9 棋盘的各位置有不同价值加成
+# 设计原则：
+#   - 都以红方视角编码（黑方镜像翻转）
+#   - 行序：0=黑底线，9=红底线
+#   - 列序：0=黑左，8=黑右（从黑方视角看）
+#
+# 参考引擎：Pikafish（NNUE神经网络）、ElephantEye（手工PST）
+# 数据来源：公开的象棋引擎配置和棋谱学习
+
+PIECE_VALUES_TABLE = {
+    Piece.BING: [
+        [ 9,  9,  9, 11, 13, 11,  9,  9,  9],
+		[19, 24, 34, 42, 44, 42, 34, 24, 19],
+		[19, 24, 32, 37, 37, 37, 32, 24, 19],
+		[19, 23, 27, 29, 30, 29, 27, 23, 19],
+		[14, 18, 20, 27, 29, 27, 20, 18, 14],
+
+		[ 7,  0, 13,  0, 16,  0, 13,  0,  7],
+		[ 7,  0,  7,  0, 15,  0,  7,  0,  7],
+		[ 0,  0,  0,  0,  0,  0,  0,  0,  0],
+		[ 0,  0,  0,  0,  0,  0,  0,  0,  0],
+		[ 0,  0,  0,  0,  0,  0,  0,  0,  0]
+    ],
+    Piece.MA: [
+        [90, 90, 90, 96, 90, 96, 90, 90, 90],
+		[90, 96,103, 97, 94, 97,103, 96, 90],
+		[92, 98, 99,103, 99,103, 99, 98, 92],
+		[93,108,100,107,100,107,100,108, 93],
+		[90,100, 99,103,104,103, 99,100, 90],
+
+		[90, 98,101,102,103,102,101, 98, 90],
+		[92, 94, 98, 95, 98, 95, 98, 94, 92],
+		[93, 92, 94, 95, 92, 95, 94, 92, 93],
+		[85, 90, 92, 93, 78, 93, 92, 90, 85],
+		[88, 85, 90, 88, 90, 88, 90, 85, 88]
+    ],
+    Piece.CHE: [
+        [206, 208, 207, 213, 214, 213, 207, 208, 206],
+		[206, 212, 209, 216, 233, 216, 209, 212, 206],
+		[206, 208, 207, 214, 216, 214, 207, 208, 206],
+		[206, 213, 213, 216, 216, 216, 213, 213, 206],
+		[208, 211, 211, 214, 215, 214, 211, 211, 208],
+
+		[208, 212, 212, 214, 215, 214, 212, 212, 208],
+		[204, 209, 204, 212, 214, 212, 204, 209, 204],
+		[198, 208, 204, 212, 212, 212, 204, 208, 198],
+		[200, 208, 206, 212, 200, 212, 206, 208, 200],
+		[194, 206, 204, 212, 200, 212, 204, 206, 194]
+    ],
+    Piece.SHI: [
+        [0, 0, 0,20, 0,20, 0, 0, 0],
+		[0, 0, 0, 0,23, 0, 0, 0, 0],
+		[0, 0, 0,20, 0,20, 0, 0, 0],
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+		[0, 0, 0,20, 0,20, 0, 0, 0],
+		[0, 0, 0, 0,23, 0, 0, 0, 0],
+		[0, 0, 0,20, 0,20, 0, 0, 0]
+    ],
+    Piece.PAO: [
+        [100, 100,  96, 91,  90, 91,  96, 100, 100],
+		[ 98,  98,  96, 92,  89, 92,  96,  98,  98],
+		[ 97,  97,  96, 91,  92, 91,  96,  97,  97],
+		[ 96,  99,  99, 98, 100, 98,  99,  99,  96],
+		[ 96,  96,  96, 96, 100, 96,  96,  96,  96],
+
+		[ 95,  96,  99, 96, 100, 96,  99,  96,  95],
+		[ 96,  96,  96, 96,  96, 96,  96,  96,  96],
+		[ 97,  96, 100, 99, 101, 99, 100,  96,  97],
+		[ 96,  97,  98, 98,  98, 98,  98,  97,  96],
+		[ 96,  96,  97, 99,  99, 99,  97,  96,  96]
+    ],
+    Piece.XIANG: [
+        [0, 0,20, 0, 0, 0,20, 0, 0],
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+		[0, 0, 0, 0,23, 0, 0, 0, 0],
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+		[0, 0,20, 0, 0, 0,20, 0, 0],
+
+		[0, 0,20, 0, 0, 0,20, 0, 0],
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+		[18,0, 0, 0,23, 0, 0, 0,18],
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+		[0, 0,20, 0, 0, 0,20, 0, 0]
+    ],
+    Piece.SHUAI: [
+        [0, 0, 0, 8888, 8888, 8888, 0, 0, 0],
+		[0, 0, 0, 8888, 8888, 8888, 0, 0, 0],
+		[0, 0, 0, 8888, 8888, 8888, 0, 0, 0],
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+		[0, 0, 0, 0, 0, 0, 0, 0, 0],
+		[0, 0, 0, 8888, 8888, 8888, 0, 0, 0],
+		[0, 0, 0, 8888, 8888, 8888, 0, 0, 0],
+		[0, 0, 0, 8888, 8888, 8888, 0, 0, 0]
+    ]
+}
+
+
+# 展平后的 子力+位置 分值表：PST[piece_code + 7][sq]
+# - 以红方视角计分：红子为正，黑子为负（黑方按行镜像查表）
+PST: list[list[int]] = [[0] * BOARD_SIZE for _ in range(15)]
+
+
+def _build_pst() -> None:
+    for piece_type in Piece:
+        if piece_type == Piece.EMPTY:
+            continue
+        base_value = PIECE_PER_VALUE.get(piece_type, 0)
+        table = PIECE_VALUES_TABLE.get(piece_type)
+        red = PST[piece_type + 7]
+        black = PST[-piece_type + 7]
+        for sq in range(BOARD_SIZE):
+            r, c = i_to_rc(sq)
+            red[sq] = base_value + (table[r][c] if table else 0)
+            black[sq] = -(base_value + (table[BOARD_ROWS - 1 - r][c] if table else 0))
+
+
+_build_pst()
+
+
+def calc_pst_score(board) -> int:
+    """全盘重新计算 子力+位置 分（慢，仅用于初始化和校验增量结果）"""
+    score = 0
+    for i, p in enumerate(board.squares):
+        if p != 0:
+            score += PST[p + 7][i]
+    return score
@@ -1,12 +1,24 @@
 from __future__ import annotations
 
 from .board import Board
-from .const import Side, Piece, i_to_rc, rc_to_i, side_of, type_of
+from .const import (
+    Side, Piece, i_to_rc, rc_to_i, side_of, type_of, BOARD_ROWS, BOARD_COLS, BOARD_SIZE,
+    MAILBOX_COLS, MAILBOX_OF, OFFBOARD, DELTA_N, DELTA_S, DELTA_W, DELTA_E,
+)
+
+
+# 马攻击 sq 的反向增量：(马所在格增量, 马腿格增量)，马腿在马一侧、与 sq 斜向相邻
+_HORSE_ATTACK_DELTAS = tuple(
+    (-(dr * MAILBOX_COLS + dc), -(dr * MAILBOX_COLS + dc) + lr * MAILBOX_COLS + lc)
+    for dr, dc, lr, lc in [(-2,-1,-1,0),(-2,1,-1,0),(2,-1,1,0),(2,1,1,0),
+                           (-1,-2,0,-1),(-1,2,0,1),(1,-2,0,-1),(1,2,0,1)]
+)
+_LINE_DELTAS = (DELTA_N, DELTA_S, DELTA_W, DELTA_E)
 
 def is_face_to_face(board: Board) -> bool:
     """将帅照面：同列无遮挡则为 True（非法/将军的一部分）。占位实现后面补。"""
-    SHUAI = board.find_piece(+Piece.SHUAI)
-    JIANG = board.find_piece(-Piece.SHUAI)
+    SHUAI = board.king_square(Side.RED)
+    JIANG = board.king_square(Side.BLACK)
     if SHUAI is None or JIANG is None:
         return False
     r_s, c_s = i_to_rc(SHUAI)
@@ -18,17 +30,67 @@ def is_face_to_face(board: Board) -> bool:
             return False
     return True
 
+def _king_attacked(mb: list[int], m: int, sq: int, by_side: Side, king: int) -> bool:
+    """
+    在 mailbox 上从将帅所在格 sq 反向查找车、炮、马、兵的攻击；king 非 0 时沿直线碰到的第一个子是它也算（将帅照面）
+    只对将帅所在格有效：士、象过不了河/出不了九宫，攻击不到对方将帅，这里不查，别的格子会漏判
+    """
+    che = by_side * Piece.CHE
+    pao = by_side * Piece.PAO
+    ma = by_side * Piece.MA
+    bing = by_side * Piece.BING
+
+    # 车/炮：沿四个方向，第一个子是车则被攻击；隔一个炮架的第二个子是炮则被攻击
+    # 边框哨兵非 0，走出棋盘时自然停下
+    for d in _LINE_DELTAS:
+        t = m + d
+        while mb[t] == 0:
+            t += d
+        p = mb[t]
+        if p == che or p == king:
+            return True
+        if p == OFFBOARD:
+            continue
+        t += d
+        while mb[t] == 0:
+            t += d
+        if mb[t] == pao:
+            return True
+
+    # 马：马腿（靠近马的一侧）不能被蹩
+    for hd, ld in _HORSE_ATTACK_DELTAS:
+        if mb[m + hd] == ma and mb[m + ld] == 0:
+            return True
+
+    # 兵：正前方来的兵（红兵向上走，所以攻击 sq 的红兵在 sq 下方一格），或过河后横向相邻的兵
+    if mb[m + by_side * MAILBOX_COLS] == bing:
+        return True
+    crossed = sq < 45 if by_side == Side.RED else sq >= 45
+    if crossed and (mb[m - 1] == bing or mb[m + 1] == bing):
+        return True
+    # 帅/将只能在本方九宫内走，够不到对方九宫，无需判断相邻，照面由 king 参数处理
+    return False
+
 def in_check(board: Board, side: Side) -> bool:
-    """side 方是否被将军。"""
+    """side 方是否被将军（含将帅照面）。"""
+    king = board.king_square(side)
+    if king is None:
+        return False
+    opponent_side = Side.RED if side == Side.BLACK else Side.BLACK
+    # 将帅照面：两王同列且中间无子，相当于被对方的王沿直线攻击（两王不可能同行）
+    return _king_attacked(board._mailbox, MAILBOX_OF[king], king, opponent_side, -side * Piece.SHUAI)
+
+def in_check_slow(board: Board, side: Side) -> bool:
+    """旧实现：生成对方全部伪合法走法看能否吃王（慢，仅用于校验 in_check）。"""
     from .movegen import gen_pseudo_legal_moves
     opponent_side = Side.RED if side == Side.BLACK else Side.BLACK
-    shuai_pos = board.find_piece(+Piece.SHUAI) if side == Side.RED else board.find_piece(-Piece.SHUAI)
+    shuai_pos = board.king_square(side)
     if shuai_pos is None:
         return False
     for mv in gen_pseudo_legal_moves(board, opponent_side):
         if mv.to == shuai_pos:
             return True
-    return False
+    return is_face_to_face(board)
 
 def is_checkmate(board: Board, side: Side, legal_moves_provider) -> bool:
     """side 方是否将死：被将军且无合法走法"""
@@ -0,0 +1,257 @@
+"""无界面引擎：通过标准输入/输出讲 UCCI 协议，供界面程序或脚本驱动（不导入 pygame）
+
+用法：python -m xiangqi.engine
+支持的指令：
+  ucci / uci                               握手，回复 id、option 和 ucciok（uci 时回复 uciok）
+  isready                                  回复 readyok
+  setoption <名称> <值>                     hashsize（MB）、usebook、ponder；也接受 UCI 的 name .. value .. 写法
+  position {startpos | fen <FEN>} [moves <走法> ...]
+  go [ponder] [depth D | nodes N | movetime T | infinite | time T [increment I] [movestogo M]]
+     T/I 单位毫秒；也接受 UCI 的 wtime/btime/winc/binc
+  ponderhit / stop                         后台思考猜中 / 立即停止并给出最佳走法
+  newgame / ucinewgame                     清空置换表和走法排序启发
+  quit                                     回复 bye 后退出
+搜索在后台线程进行，期间仍可读入 stop/ponderhit/isready；每完成一层输出
+  info depth D score S time T nodes N pv 走法
+结束时输出 bestmove 走法 [ponder 走法]，无棋可走时输出 nobestmove
+整个进程只有一个 SearchEngine，置换表在各次搜索之间保留
+"""
+from __future__ import annotations
+import sys
+import threading
+
+from .core.board import Board
+from .core.const import START_FEN, Side
+from .core.move import Move, parse_iccs, to_iccs
+from .core.movegen import validate_move
+from .core.rules import in_check
+from .ai.ai_config import OPENING_BOOK_PATH, TABLEBASE_DIR, TT_SIZE_MB, MAX_PLY
+from .ai.book import OpeningBook
+from .ai.limits import SearchLimits, allocate_time
+from .ai.search_v2 import SearchEngine
+from .ai.tablebase import Tablebase
+from .ai.tt import TranspositionTable
+
+ENGINE_NAME = "xiangqi"
+ENGINE_AUTHOR = "xiangqi contributors"
+
+
+def parse_go(tokens: list[str], side: Side) -> tuple[SearchLimits, bool, bool]:
+    """解析 go 指令的参数，返回 (搜索限制, 是否后台思考, 是否无限搜索)"""
+    ponder = "ponder" in tokens
+    infinite = "infinite" in tokens
+    values: dict[str, int] = {}
+    it = iter(t for t in tokens if t not in ("ponder", "infinite"))
+    for name in it:
+        try:
+            values[name] = int(next(it))
+        except (StopIteration, ValueError):
+            raise ValueError(f"go 参数非法: {name}") from None
+    # UCI 写法按走棋方取自己的时间
+    if side == Side.RED:
+        values.setdefault("time", values.get("wtime", -1))
+        values.setdefault("increment", values.get("winc", 0))
+    else:
+        values.setdefault("time", values.get("btime", -1))
+        values.setdefault("increment", values.get("binc", 0))
+
+    if values["time"] >= 0 and not infinite:
+        limits = allocate_time(values["time"] / 1000, values["increment"] / 1000, values.get("movestogo"))
+    else:
+        limits = SearchLimits()
+    if "depth" in values:
+        limits.depth = max(1, min(values["depth"], MAX_PLY))
+    if "nodes" in values:
+        limits.nodes = values["nodes"]
+    if "movetime" in values and not infinite:
+        limits.movetime = values["movetime"] / 1000
+    return limits, ponder, infinite
+
+
+def parse_position(tokens: list[str]) -> Board:
+    """解析 position 指令的参数；走法非法时抛出 ValueError"""
+    if "moves" in tokens:
+        i = tokens.index("moves")
+        tokens, moves = tokens[:i], tokens[i + 1:]
+    else:
+        moves = []
+    if tokens[:1] == ["startpos"]:
+        board = Board.from_fen(START_FEN)
+    elif tokens[:1] == ["fen"] and len(tokens) > 1:
+        board = Board.from_fen(" ".join(tokens[1:]))
+    else:
+        raise ValueError("position 需要 startpos 或 fen")
+    for text in moves:
+        side = board.side_to_move
+        try:
+            mv = validate_move(board, parse_iccs(text), side)
+        except ValueError:
+            mv = None
+        if mv is None:
+            raise ValueError(f"非法走法: {text}")
+        board.make_move(mv)
+        if in_check(board, side):
+            board.undo_move()
+            raise ValueError(f"走后被将军: {text}")
+    return board
+
+
+class UCCIEngine:
+    """协议处理：主线程读指令，搜索在后台线程，所有输出经 send() 加锁写出"""
+
+    def __init__(self, out=None):
+        self.out = out if out is not None else sys.stdout
+        self._out_lock = threading.Lock()
+        self.hash_mb = TT_SIZE_MB
+        book = OpeningBook(OPENING_BOOK_PATH) if OPENING_BOOK_PATH.exists() else None
+        tablebase = Tablebase(TABLEBASE_DIR) if TABLEBASE_DIR.is_dir() else None
+        self._book = book
+        self.engine = SearchEngine(self.hash_mb, book=book, tablebase=tablebase)
+        self.engine.log = lambda text: None  # 标准输出只用来讲协议
+        self.use_ponder = True
+        self.board = Board.from_fen(START_FEN)
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._release = threading.Event()  # 后台思考/无限搜索提前结束时，等 stop/ponderhit 再给出结果
+        self._hold = False
+
+    def send(self, line: str) -> None:
+        with self._out_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    # ---------- 指令 ----------
+
+    def handle(self, line: str) -> bool:
+        """处理一行指令，返回 False 表示退出"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        cmd, args = tokens[0], tokens[1:]
+        try:
+            if cmd in ("ucci", "uci"):
+                self.send(f"id name {ENGINE_NAME}")
+                self.send(f"id author {ENGINE_AUTHOR}")
+                self.send(f"option hashsize type spin min 1 max 1024 default {TT_SIZE_MB}")
+                self.send(f"option usebook type check default {'true' if self._book else 'false'}")
+                self.send("option ponder type check default true")
+                self.send("ucciok" if cmd == "ucci" else "uciok")
+            elif cmd == "isready":
+                self.send("readyok")
+            elif cmd == "setoption":
+                self.set_option(args)
+            elif cmd == "position":
+                self.wait()
+                self.board = parse_position(args)
+            elif cmd == "go":
+                self.go(args)
+            elif cmd == "ponderhit":
+                self.engine.ponderhit()
+                self._hold = False
+                self._release.set()
+            elif cmd == "stop":
+                self.stop()
+            elif cmd in ("newgame", "ucinewgame"):
+                self.wait()
+                self.engine.new_game()
+            elif cmd == "quit":
+                self.stop()
+                self.send("bye")
+                return False
+            else:
+                self.send(f"info string unknown command {cmd}")
+        except ValueError as e:
+            self.send(f"info string {e}")
+        return True
+
+    def set_option(self, args: list[str]) -> None:
+        if args[:1] == ["name"]:  # UCI：setoption name <名称> value <值>
+            i = args.index("value") if "value" in args else len(args)
+            args = ["".join(args[1:i]), *args[i + 1:]]
+        if len(args) < 2:
+            raise ValueError("setoption 需要名称和值")
+        name, value = args[0].lower(), args[1].lower()
+        self.wait()
+        if name in ("hashsize", "hash"):
+            self.hash_mb = max(1, int(value))
+            self.engine.tt = TranspositionTable(self.hash_mb)
+        elif name in ("usebook", "ownbook"):
+            self.engine.book = self._book if value == "true" else None
+        elif name == "ponder":
+            self.use_ponder = value == "true"
+        else:
+            raise ValueError(f"unknown option {args[0]}")
+
+    def go(self, args: list[str]) -> None:
+        self.wait()
+        limits, ponder, infinite = parse_go(args, self.board.side_to_move)
+        self._stop = threading.Event()
+        self._release = threading.Event()
+        self._hold = ponder or infinite
+        self._thread = threading.Thread(target=self._run, args=(self.board.copy(), limits, ponder, self._stop),
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止当前搜索，等它输出 bestmove"""
+        if self._thread is not None:
+            self._stop.set()
+            self._hold = False
+            self._release.set()
+            self._thread.join()
+            self._thread = None
+
+    def wait(self) -> None:
+        """等上一次（有限的）搜索结束；无限搜索和后台思考在这里被停止"""
+        if self._thread is None:
+            return
+        if self._hold:
+            self.stop()
+            return
+        self._thread.join()
+        self._thread = None
+
+    # ---------- 搜索线程 ----------
+
+    def _run(self, board: Board, limits: SearchLimits, ponder: bool, stop: threading.Event) -> None:
+        try:
+            line = self._think(board, limits, ponder, stop)
+        except Exception as e:  # 搜索线程出错也必须回一行，否则界面会一直等 bestmove
+            self.send(f"info string search failed: {e!r}")
+            line = "nobestmove"
+        if self._hold:  # 协议要求后台思考/无限搜索在收到 stop/ponderhit 之前不给出结果
+            self._release.wait()
+        self.send(line)
+
+    def _think(self, board: Board, limits: SearchLimits, ponder: bool, stop: threading.Event) -> str:
+        """搜索并返回 bestmove / nobestmove 那一行"""
+        best = self.engine.search(board, stop_event=stop, on_info=self._on_info, limits=limits, ponder=ponder)
+        if best is None:
+            return "nobestmove"
+        line = f"bestmove {to_iccs(best)}"
+        if self.use_ponder:
+            board.make_move(best)
+            reply = self.engine.ponder_move(board)
+            board.undo_move()
+            if reply is not None:
+                line += f" ponder {to_iccs(reply)}"
+        return line
+
+    def _on_info(self, info: dict) -> None:
+        move: Move | None = info["move"]
+        pv = f" pv {to_iccs(move)}" if move is not None else ""
+        self.send(f"info depth {info['depth']} score {int(info['score'])} time {int(info['time'] * 1000)} "
+                  f"nodes {info['nodes']}{pv}")
+
+
+def main() -> None:
+    engine = UCCIEngine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+    else:
+        engine.stop()
+
+
+if __name__ == "__main__":
+    main()
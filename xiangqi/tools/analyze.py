@@ -0,0 +1,197 @@
+"""批量局面分析：把 FEN 文件（或标准输入）流式地交给进程池搜索，结果写成 JSON Lines
+
+用法：python -m xiangqi.tools.analyze positions.fen --out results.jsonl [--depth N | --nodes N | --movetime MS]
+      cat positions.fen | python -m xiangqi.tools.analyze - --out - --unordered
+输入每行一个局面：FEN，或 "startpos"，后面都可以跟 "moves <走法> ..."；空行和 # 开头的行跳过
+输出每个局面一行：{"line": 输入行号, "fen", "bestmove", "score", "depth", "nodes", "time"}，
+局面非法时为 {"line", "fen", "error"}；无棋可走时 bestmove 为 null
+- 每个工作进程只建一个 SearchEngine，置换表在各局面之间保留（同一盘棋的相邻局面可以复用）
+- 同时在途（已读入未写出）的局面不超过 --window 个，内存占用与输入规模无关
+- 默认按输入顺序输出；--unordered 时谁先算完先写
+- --resume：输出文件已有的结果跳过不算，接着追加（中断时写了一半的末行会被截掉）
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+
+from ..ai.ai_config import MAX_PLY
+from ..ai.limits import SearchLimits
+from ..ai.search_v2 import SearchEngine
+from ..ai.tablebase import Tablebase
+from ..core.move import to_iccs
+from ..core.movegen import gen_legal_codes
+from ..engine import parse_position
+
+# ---------- 工作进程 ----------
+
+_engine: SearchEngine | None = None
+_limits = SearchLimits()
+
+
+def _init_worker(limits: SearchLimits, tt_size_mb: float, tablebase_dir: str | None) -> None:
+    global _engine, _limits
+    tablebase = Tablebase(tablebase_dir) if tablebase_dir else None
+    _engine = SearchEngine(tt_size_mb, tablebase=tablebase)
+    _engine.log = lambda text: None
+    _limits = limits
+
+
+def analyze_position(task: tuple[int, str]) -> dict:
+    line_no, text = task
+    result = {"line": line_no, "fen": text}
+    try:
+        tokens = text.split()
+        board = parse_position(tokens if tokens[0] == "startpos" else ["fen", *tokens])
+    except ValueError as e:
+        result["error"] = str(e)
+        return result
+    if not gen_legal_codes(board, board.side_to_move):  # 被将死或困毙：不搜索
+        result.update(bestmove=None, score=None, depth=0, nodes=0, time=0.0)
+        return result
+    info = {}
+    start = time.perf_counter()
+    best = _engine.search(board, limits=_limits, on_info=info.update)
+    result.update(bestmove=None if best is None else to_iccs(best), score=info.get("score"),
+                  depth=info.get("depth", 0), nodes=_engine.nodes_count + _engine.qnodes_count,
+                  time=round(time.perf_counter() - start, 3))
+    return result
+
+
+# ---------- 断点续算 ----------
+
+class _LineSet:
+    """已完成的行号（位图，每行 1 bit）"""
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def add(self, n: int) -> None:
+        i = n >> 3
+        if i >= len(self.bits):
+            self.bits.extend(bytes(i + 1 - len(self.bits)))
+        self.bits[i] |= 1 << (n & 7)
+
+    def __contains__(self, n: int) -> bool:
+        i = n >> 3
+        return i < len(self.bits) and bool(self.bits[i] >> (n & 7) & 1)
+
+
+def load_done(path: str) -> _LineSet:
+    """读出已有结果的行号；末尾不完整的一行截掉，之后可以直接追加"""
+    done = _LineSet()
+    with open(path, "r+b") as f:
+        good = 0
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(raw)["line"])
+            except (ValueError, KeyError):
+                break
+            good += len(raw)
+        f.truncate(good)
+    return done
+
+
+def iter_tasks(stream, skip: _LineSet | None = None):
+    """(行号, 局面文本)，行号从 1 开始，跳过空行、注释和已完成的行"""
+    for line_no, line in enumerate(stream, 1):
+        text = line.strip()
+        if not text or text.startswith("#") or (skip is not None and line_no in skip):
+            continue
+        yield line_no, text
+
+
+# ---------- 主流程 ----------
+
+def run(tasks, out, limits: SearchLimits, workers: int = 0, window: int = 0, ordered: bool = True,
+        tt_size_mb: float = 16, tablebase_dir: str | None = None) -> int:
+    """分析 tasks 中的所有局面，结果逐行写到 out，返回写出的行数"""
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 4
+    done: queue.Queue = queue.Queue()  # 结果回调（进程池的结果线程）-> 主线程
+    buffered: dict[int, dict] = {}     # 按顺序输出时，已算完但前面还有没算完的
+    order: list[int] = []              # 按顺序输出时，在途局面的提交顺序（长度不超过 window）
+    in_flight = written = 0
+    tasks = iter(tasks)
+    exhausted = False
+
+    def write(rec: dict) -> None:
+        out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        out.flush()
+
+    with mp.Pool(workers, _init_worker, (limits, tt_size_mb, tablebase_dir)) as pool:
+        while True:
+            while not exhausted and in_flight < window:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                    break
+                pool.apply_async(analyze_position, (task,), callback=done.put,
+                                 error_callback=lambda e, n=task[0], t=task[1]: done.put(
+                                     {"line": n, "fen": t, "error": repr(e)}))
+                if ordered:
+                    order.append(task[0])
+                in_flight += 1
+            if in_flight == 0:
+                break
+            rec = done.get()
+            if not ordered:
+                write(rec)
+                in_flight -= 1
+                written += 1
+                continue
+            buffered[rec["line"]] = rec
+            head = 0
+            while head < len(order) and order[head] in buffered:
+                write(buffered.pop(order[head]))
+                head += 1
+            del order[:head]
+            in_flight -= head
+            written += head
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="批量分析局面，输出 JSON Lines")
+    parser.add_argument("input", help="局面文件（每行一个 FEN），- 为标准输入")
+    parser.add_argument("--out", default="-", help="输出文件，- 为标准输出")
+    parser.add_argument("--depth", type=int, default=None, help="每个局面的搜索深度（默认 5，有其他限制时不限）")
+    parser.add_argument("--nodes", type=int, default=None, help="每个局面的节点预算")
+    parser.add_argument("--movetime", type=int, default=None, help="每个局面的时间（毫秒）")
+    parser.add_argument("--workers", type=int, default=0, help="进程数（默认 CPU 数）")
+    parser.add_argument("--window", type=int, default=0, help="最多同时在途的局面数（默认进程数的 4 倍）")
+    parser.add_argument("--unordered", action="store_true", help="按完成顺序输出")
+    parser.add_argument("--resume", action="store_true", help="跳过输出文件中已有的局面，追加写入")
+    parser.add_argument("--hash", type=float, default=16, help="每个进程的置换表大小（MB）")
+    parser.add_argument("--tablebase", default=None, help="残局库目录")
+    args = parser.parse_args(argv)
+
+    if args.depth is None:
+        args.depth = 5 if args.nodes is None and args.movetime is None else MAX_PLY
+    limits = SearchLimits(depth=args.depth, nodes=args.nodes,
+                          movetime=None if args.movetime is None else args.movetime / 1000)
+    skip = None
+    if args.resume and args.out != "-" and os.path.exists(args.out):
+        skip = load_done(args.out)
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.out == "-" else open(args.out, "a" if args.resume else "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        n = run(iter_tasks(src, skip), out, limits, args.workers, args.window, not args.unordered,
+                args.hash, args.tablebase)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"{n} positions in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""走法生成基准：在固定随机局面集合上测量每个节点的走法生成耗时
+
+用法：python -m xiangqi.tools.bench_movegen [--positions N] [--repeat N]
+"""
+from __future__ import annotations
+import argparse
+import random
+import time
+
+from ..core.board import Board
+from ..core.const import Piece
+from ..core import movegen
+from ..core.movegen import gen_pseudo_legal_moves, gen_legal_moves, gen_pseudo_legal_codes, gen_legal_codes
+
+
+def sample_positions(count: int, seed: int = 2024, max_plies: int = 80) -> list[Board]:
+    """用固定种子的随机对局采样局面（同一参数每次得到同一组局面）"""
+    rng = random.Random(seed)
+    boards: list[Board] = []
+    while len(boards) < count:
+        b = Board.initial()
+        for _ in range(rng.randrange(max_plies)):
+            moves = gen_legal_moves(b, b.side_to_move)
+            if not moves:
+                break
+            moves.sort(key=lambda m: (m.frm, m.to))
+            b.make_move(rng.choice(moves))
+        boards.append(b)
+    return boards
+
+
+def bench(boards: list[Board], fn, repeat: int) -> tuple[float, int]:
+    """返回 (每个节点平均微秒, 总走法数)"""
+    total_moves = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for b in boards:
+            total_moves += len(fn(b, b.side_to_move))
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(boards)) * 1e6, total_moves
+
+
+def bench_by_piece(boards: list[Board], repeat: int) -> dict[str, float]:
+    """按棋子类型分别计时各 _gen_* 生成函数（整数编码），返回每次调用平均微秒"""
+    result = {}
+    for piece_type in Piece:
+        if piece_type == Piece.EMPTY:
+            continue
+        fn = getattr(movegen, f"_gen_{piece_type.name.lower()}")
+        jobs = [(b, pos, b.side_to_move) for b in boards
+                for pos, p in b.iter_pieces(b.side_to_move) if abs(p) == piece_type]
+        moves: list[int] = []
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for b, pos, side in jobs:
+                moves.clear()
+                fn(b, pos, side, moves)
+        elapsed = time.perf_counter() - start
+        result[piece_type.name] = elapsed / max(1, repeat * len(jobs)) * 1e6
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="走法生成基准测试")
+    parser.add_argument("--positions", type=int, default=200, help="采样局面数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    parser.add_argument("--seed", type=int, default=2024, help="随机种子")
+    args = parser.parse_args(argv)
+
+    boards = sample_positions(args.positions, args.seed)
+    # *-codes 为搜索用的整数编码路径，另外两项含转换成 Move 的开销
+    for name, fn in [("pseudo-codes", gen_pseudo_legal_codes), ("legal-codes", gen_legal_codes),
+                     ("pseudo-legal", gen_pseudo_legal_moves), ("legal", gen_legal_moves)]:
+        us, moves = bench(boards, fn, args.repeat)
+        print(f"{name:>12}: {us:8.1f} us/node | {moves // args.repeat} moves / {len(boards)} positions")
+    for name, us in bench_by_piece(boards, args.repeat * 20).items():
+        print(f"{name:>12}: {us:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
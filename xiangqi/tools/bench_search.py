@@ -0,0 +1,71 @@
+"""搜索基准：在固定局面集合上做定深搜索，统计节点数和耗时
+
+用法：python -m xiangqi.tools.bench_search [--depth N] [--positions N]
+      python -m xiangqi.tools.bench_search --time 2 [--no-null] [--no-lmr] [--no-pvs] [--no-aspiration]
+      python -m xiangqi.tools.bench_search --nodes 20000
+用于比较走法排序、剪枝等改动前后的节点数（同样的局面和深度，节点越少越好）；
+--time 模式下每个局面限时迭代加深，统计平均完成深度；
+--nodes 模式下每个局面固定节点预算（结果完全确定），统计每步耗时和平均完成深度
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import time
+
+from ..ai.ai_config import SearchOptions, MAX_PLY
+from ..ai.limits import SearchLimits
+from ..ai.search_v2 import SearchEngine
+from .bench_movegen import sample_positions
+
+
+def run(depth: int, positions: int, seed: int, options: SearchOptions | None = None,
+        time_limit: float | None = None, node_limit: int | None = None) -> dict[str, float]:
+    boards = sample_positions(positions, seed, max_plies=40)
+    nodes = qnodes = depths = 0
+    limits = SearchLimits(depth=depth, nodes=node_limit, movetime=time_limit)
+    start = time.perf_counter()
+    for b in boards:
+        engine = SearchEngine(options=options)
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.search(b, limits=limits)
+        nodes += engine.nodes_count
+        qnodes += engine.qnodes_count
+        depths += engine.completed_depth
+    elapsed = time.perf_counter() - start
+    return {
+        "positions": len(boards),
+        "nodes": nodes,
+        "qnodes": qnodes,
+        "time": elapsed,
+        "nps": (nodes + qnodes) / elapsed if elapsed else 0.0,
+        "avg_depth": depths / len(boards),
+        "time_per_move": elapsed / len(boards),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="搜索基准测试")
+    parser.add_argument("--depth", type=int, default=None, help="搜索深度（默认 4；--time 模式下默认不限）")
+    parser.add_argument("--positions", type=int, default=12, help="局面数")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子")
+    parser.add_argument("--time", type=float, default=None, help="每个局面的限时（秒），此时 --depth 为深度上限")
+    parser.add_argument("--nodes", type=int, default=None, help="每个局面的节点预算，此时 --depth 为深度上限")
+    parser.add_argument("--no-null", action="store_true", help="关闭空着剪枝")
+    parser.add_argument("--no-lmr", action="store_true", help="关闭后期走法缩减")
+    parser.add_argument("--no-pvs", action="store_true", help="关闭主要变例搜索")
+    parser.add_argument("--no-aspiration", action="store_true", help="关闭渴望窗口")
+    args = parser.parse_args(argv)
+
+    options = SearchOptions(null_move=not args.no_null, lmr=not args.no_lmr,
+                            pvs=not args.no_pvs, aspiration=not args.no_aspiration)
+    if args.time is None and args.nodes is None:
+        r = run(args.depth or 4, args.positions, args.seed, options)
+    else:
+        r = run(args.depth or MAX_PLY, args.positions, args.seed, options, args.time, args.nodes)
+    print(f"depth {r['avg_depth']:.2f} | {r['positions']} positions | nodes {r['nodes']} + {r['qnodes']}q | "
+          f"{r['time']:.2f}s ({r['time_per_move']:.3f}s/move) | {r['nps']:.0f} nps")
+
+
+if __name__ == "__main__":
+    main()
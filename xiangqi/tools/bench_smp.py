@@ -0,0 +1,53 @@
+"""并行搜索扩展性基准：同样的局面和深度，比较不同进程数的耗时
+
+用法：python -m xiangqi.tools.bench_smp [--workers 1,2,4] [--depth N] [--positions N]
+每个进程数只启动一次辅助进程（启动耗时不计入），每个局面前清空共享置换表再做定深搜索，报告总耗时、节点数、
+每秒节点数，以及相对单进程的加速比（time-to-depth）
+"""
+from __future__ import annotations
+import argparse
+import os
+import time
+
+from ..ai.smp import ParallelSearch
+from .bench_movegen import sample_positions
+
+
+def run(workers: int, depth: int, positions: int, seed: int) -> dict[str, float]:
+    boards = sample_positions(positions, seed, max_plies=40)
+    nodes = 0
+    elapsed = 0.0
+    with ParallelSearch(workers) as ps:
+        ps.log = lambda text: None
+        ps.time_limit = float("inf")
+        for b in boards:
+            ps.tt.clear()
+            start = time.perf_counter()
+            ps.search(b, max_depth=depth)
+            elapsed += time.perf_counter() - start
+            nodes += ps.nodes_count
+    return {"workers": workers, "nodes": nodes, "time": elapsed, "nps": nodes / elapsed if elapsed else 0.0}
+
+
+def main(argv: list[str] | None = None) -> None:
+    cpus = os.cpu_count() or 1
+    default_workers = ",".join(str(n) for n in (1, 2, 4, 8, 16) if n <= max(cpus, 1))
+    parser = argparse.ArgumentParser(description="并行搜索扩展性基准")
+    parser.add_argument("--workers", default=default_workers, help="逗号分隔的进程数列表（默认不超过 CPU 数）")
+    parser.add_argument("--depth", type=int, default=5, help="搜索深度")
+    parser.add_argument("--positions", type=int, default=6, help="局面数")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子")
+    args = parser.parse_args(argv)
+
+    print(f"CPU: {cpus}")
+    base = None
+    for n in (int(w) for w in args.workers.split(",")):
+        r = run(n, args.depth, args.positions, args.seed)
+        if base is None:
+            base = r["time"]
+        print(f"{n:>3} workers | {r['time']:.2f}s | nodes {r['nodes']} | {r['nps']:.0f} nps | "
+              f"speedup {base / r['time']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""开局库生成：把一个目录下的棋谱流式地转换成开局库文件（格式见 ai/book.py）
+
+用法：python -m xiangqi.tools.build_book <棋谱目录> <输出文件> [--plies N] [--min-games N]
+棋谱格式：目录下（含子目录）所有 .txt 文件，每行一局，空格分隔的 ICCS 走法，
+可选以对局结果结尾（1-0 红胜 / 0-1 黑胜 / 1/2-1/2 和 / * 未知）；空行和 # 开头的行忽略
+只统计每局前 --plies 步。统计量超过 --chunk 条时先排序写入临时文件，最后多路归并，
+内存占用与棋谱总量无关
+"""
+from __future__ import annotations
+import argparse
+import heapq
+import os
+import tempfile
+from pathlib import Path
+
+from ..ai.book import BOOK_MAGIC, BOOK_VERSION, HEADER, RECORD, RECORD_BYTES, WEIGHT_MAX, GAMES_MAX
+from ..ai.tt import encode_move
+from ..core.board import Board
+from ..core.const import Side
+from ..core.move import parse_iccs
+from ..core.movegen import validate_move
+from ..core.rules import in_check
+
+# 对局结果 -> 红方得分（胜 2、和 1、负 0），None 表示未知（权重只计走过的 1 分）
+RESULTS = {"1-0": 2, "0-1": 0, "1/2-1/2": 1, "*": None}
+
+
+def iter_games(root: str | os.PathLike):
+    """逐行读出 (走法列表, 红方得分)"""
+    for path in sorted(Path(root).rglob("*.txt")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                tokens = line.split()
+                if not tokens or tokens[0].startswith("#"):
+                    continue
+                red_score = None
+                if tokens[-1] in RESULTS:
+                    red_score = RESULTS[tokens.pop()]
+                yield tokens, red_score
+
+
+def game_entries(moves: list[str], red_score: int | None, plies: int):
+    """按棋谱走子，产生 (局面哈希, 走法编码, 权重)；遇到非法走法就停止这一局
+    权重为走过的 1 分加上结果得分（见 ai/book.py），没有结果的棋谱也能按局数选"""
+    board = Board.initial()
+    for text in moves[:plies]:
+        side = board.side_to_move
+        try:
+            mv = validate_move(board, parse_iccs(text), side)
+        except ValueError:
+            return
+        if mv is None:
+            return
+        key = board.zobrist_key
+        board.make_move(mv)
+        if in_check(board, side):
+            return
+        if red_score is None:
+            weight = 1
+        else:
+            weight = 1 + (red_score if side == Side.RED else 2 - red_score)
+        yield key, encode_move(mv.frm, mv.to), weight
+
+
+def _write_run(counts: dict[tuple[int, int], list[int]], tmpdir: str) -> str:
+    fd, path = tempfile.mkstemp(dir=tmpdir, suffix=".run")
+    with os.fdopen(fd, "wb") as f:
+        for (key, move_code), (weight, games) in sorted(counts.items()):
+            f.write(RECORD.pack(key, move_code, min(weight, WEIGHT_MAX), min(games, GAMES_MAX)))
+    return path
+
+
+def _read_run(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(RECORD_BYTES * 4096):
+            yield from RECORD.iter_unpack(chunk)
+
+
+def build(root: str | os.PathLike, out: str | os.PathLike, plies: int = 20, min_games: int = 1,
+          chunk: int = 1_000_000) -> dict[str, int]:
+    games = skipped = records = 0
+    runs: list[str] = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        counts: dict[tuple[int, int], list[int]] = {}
+        for moves, red_score in iter_games(root):
+            games += 1
+            n = 0
+            for key, move_code, weight in game_entries(moves, red_score, plies):
+                n += 1
+                c = counts.get((key, move_code))
+                if c is None:
+                    counts[(key, move_code)] = [weight, 1]
+                else:
+                    c[0] += weight
+                    c[1] += 1
+            if n < min(len(moves), plies):
+                skipped += 1
+            if len(counts) >= chunk:
+                runs.append(_write_run(counts, tmpdir))
+                counts = {}
+        if counts:
+            runs.append(_write_run(counts, tmpdir))
+
+        # 多路归并各个有序临时文件，合并相同 (局面, 走法) 的统计
+        tmp_out = str(out) + ".tmp"
+        with open(tmp_out, "wb") as f:
+            f.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, 0))
+            cur = None
+            for key, move_code, weight, n in heapq.merge(*(_read_run(p) for p in runs)):
+                if cur is not None and cur[0] == key and cur[1] == move_code:
+                    cur[2] += weight
+                    cur[3] += n
+                    continue
+                if cur is not None and cur[3] >= min_games:
+                    f.write(RECORD.pack(cur[0], cur[1], min(cur[2], WEIGHT_MAX), min(cur[3], GAMES_MAX)))
+                    records += 1
+                cur = [key, move_code, weight, n]
+            if cur is not None and cur[3] >= min_games:
+                f.write(RECORD.pack(cur[0], cur[1], min(cur[2], WEIGHT_MAX), min(cur[3], GAMES_MAX)))
+                records += 1
+            f.seek(0)
+            f.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, records))
+        os.replace(tmp_out, out)
+    return {"games": games, "skipped": skipped, "records": records}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="由棋谱生成开局库")
+    parser.add_argument("games", help="棋谱目录")
+    parser.add_argument("out", help="输出的开局库文件")
+    parser.add_argument("--plies", type=int, default=20, help="每局只统计前 N 步")
+    parser.add_argument("--min-games", type=int, default=1, help="出现少于 N 局的走法不收录")
+    parser.add_argument("--chunk", type=int, default=1_000_000, help="内存中最多累计的条目数")
+    args = parser.parse_args(argv)
+    r = build(args.games, args.out, args.plies, args.min_games, args.chunk)
+    print(f"{r['games']} games ({r['skipped']} with illegal moves) -> {r['records']} records")
+    if not r["records"]:
+        print("警告：没有收录任何走法，生成的开局库无法加载（检查棋谱目录和 --min-games）")
+
+
+if __name__ == "__main__":
+    main()
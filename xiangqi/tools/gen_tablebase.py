@@ -0,0 +1,201 @@
+"""残局库生成：对指定子力组合做逆向分析（retrograde analysis），写出杀棋步数表（格式见 ai/tablebase.py）
+
+用法：python -m xiangqi.tools.gen_tablebase <输出目录> KR-K KR-KA KR-KB KNP-K ...
+吃子后子力变少的局面查更小的表，这些表会先递归生成（输出目录里已有的直接加载）
+算法：
+1. 正向扫一遍所有局面：无效局面（不走棋方被将军、子重叠）标记掉；无子可走的判负（第 0 层）；
+   吃子走法直接查小表；记下每个局面不吃子走法的个数
+2. 从第 0 层开始逐层逆推：第 n 层局面的前驱（用 gen_unmoves 逆向走一步得到）中，
+   能走到"对方必负"局面的是第 n+1 层的胜局；所有不吃子走法都走到"对方必胜"局面、
+   且吃子走法也都是对方胜的，是负局，步数取最长的那条
+3. 一直推到没有新局面，剩下没定的都是和棋
+"""
+from __future__ import annotations
+import argparse
+import time
+from array import array
+from pathlib import Path
+
+from ..ai.tablebase import TB_SUFFIX, Layout, Tablebase, canonical, write_table
+from ..core.board import Board
+from ..core.const import Side
+from ..core.move import Move, MOVE_CAPTURED_MASK
+from ..core.movegen import gen_legal_codes, gen_unmoves
+from ..core.rules import in_check
+
+_UNKNOWN, _DONE, _INVALID = 0, 1, 2
+
+
+def sub_signatures(signature: str) -> list[str]:
+    """吃掉一个子（不含将帅）后的子力组合（规范方向，去重）"""
+    red, black = signature.split("-")
+    subs = set()
+    for i in range(1, len(red)):
+        subs.add(canonical(f"{red[:i] + red[i + 1:]}-{black}")[0])
+    for i in range(1, len(black)):
+        subs.add(canonical(f"{red}-{black[:i] + black[i + 1:]}")[0])
+    return sorted(subs)
+
+
+class _Placer:
+    """按局面编号摆棋，复用同一个 Board"""
+
+    def __init__(self, layout: Layout):
+        self.layout = layout
+        self.board = Board()
+        self._placed: list[int] = []
+        self._codes = [code for code, _, _ in layout.slots]
+        self._same_as_prev = [i > 0 and self._codes[i] == self._codes[i - 1] for i in range(layout.n_pieces)]
+
+    def place(self, idx: int) -> bool:
+        """摆出局面，子重叠或同类子没按升序排列时返回 False（不摆）"""
+        sqs, side = self.layout.decode(idx)
+        for i in range(1, len(sqs)):
+            if self._same_as_prev[i] and sqs[i] <= sqs[i - 1]:
+                return False
+        if len(set(sqs)) != len(sqs):
+            return False
+        squares = self.board.squares
+        for sq in self._placed:
+            squares[sq] = 0
+        for sq, code in zip(sqs, self._codes):
+            squares[sq] = code
+        self._placed = sqs
+        self.board.side_to_move = side
+        self.board.move_codes.clear()
+        self.board.refresh()
+        return True
+
+
+def generate_table(layout: Layout, tb: Tablebase, log=print) -> array:
+    n = layout.size
+    values = array("h", bytes(2 * n))
+    state = bytearray(n)
+    remaining = array("H", bytes(2 * n))  # 还没定的不吃子走法个数
+    cap_loss = array("h", [-1]) * n       # 吃子走法中对方胜的最长步数；-2 表示有吃子走法能和或胜（不会输）
+    pending: dict[int, list[tuple[int, int]]] = {}  # 层数 -> [(局面, 库值)]
+    placer = _Placer(layout)
+    board = placer.board
+    start = time.perf_counter()
+
+    # 1. 正向初始化
+    frontier: list[int] = []
+    for idx in range(n):
+        if not placer.place(idx):
+            state[idx] = _INVALID
+            continue
+        side = board.side_to_move
+        if in_check(board, Side(-side)):
+            state[idx] = _INVALID
+            continue
+        moves = gen_legal_codes(board, side)
+        if not moves:
+            values[idx] = -1
+            state[idx] = _DONE
+            frontier.append(idx)
+            continue
+        quiet = 0
+        best_win = None
+        loss = -1
+        for code in moves:
+            if not code & MOVE_CAPTURED_MASK:
+                quiet += 1
+                continue
+            board.make(code)
+            v = tb.probe(board)
+            board.unmake()
+            if v < 0:      # 吃子后对方 -v-1 步被杀：本方 -v 步杀
+                if best_win is None or -v < best_win:
+                    best_win = -v
+            elif v == 0:
+                loss = -2
+            elif loss != -2:
+                loss = max(loss, v - 1)
+        remaining[idx] = quiet
+        if best_win is not None:
+            cap_loss[idx] = -2
+            pending.setdefault(best_win, []).append((idx, best_win + 1))
+        else:
+            cap_loss[idx] = loss
+            if quiet == 0 and loss >= 0:
+                pending.setdefault(loss + 1, []).append((idx, -(loss + 2)))
+    log(f"  init {time.perf_counter() - start:.1f}s")
+
+    # 2. 逐层逆推
+    level = 0
+    while frontier or any(k > level for k in pending):
+        nxt: list[int] = []
+        for q in frontier:
+            placer.place(q)
+            q_val = values[q]
+            mover = Side(-board.side_to_move)  # 走到 q 的一方
+            for um in gen_unmoves(board, mover):
+                board.make_move(Move(um.to, um.frm, um.moved_piece))
+                if in_check(board, Side(-mover)):  # 上一个局面里对方被将军，无效
+                    board.undo_move()
+                    continue
+                p = layout.encode(board)
+                board.undo_move()
+                if p is None or state[p] != _UNKNOWN:  # 兵退到了不可能出现的格子
+                    continue
+                if q_val < 0:
+                    values[p] = level + 2
+                    state[p] = _DONE
+                    nxt.append(p)
+                else:
+                    remaining[p] -= 1
+                    if remaining[p] == 0 and cap_loss[p] != -2:
+                        depth = max(level, cap_loss[p]) + 1
+                        if depth == level + 1:
+                            values[p] = -(depth + 1)
+                            state[p] = _DONE
+                            nxt.append(p)
+                        else:
+                            pending.setdefault(depth, []).append((p, -(depth + 1)))
+        level += 1
+        for p, v in pending.pop(level, ()):
+            if state[p] == _UNKNOWN:
+                values[p] = v
+                state[p] = _DONE
+                nxt.append(p)
+        frontier = nxt
+
+    wins = sum(1 for v in values if v > 0)
+    losses = sum(1 for v in values if v < 0)
+    valid = n - state.count(_INVALID)
+    longest = max(map(abs, values)) - 1 if wins or losses else 0
+    log(f"  {layout.signature}: {valid} positions | win {wins} | loss {losses} | draw {valid - wins - losses} | "
+        f"longest {longest} plies | {time.perf_counter() - start:.1f}s")
+    return values
+
+
+def generate(signature: str, out_dir: str | Path, tb: Tablebase | None = None, log=print) -> Tablebase:
+    """生成 signature 及其依赖的小表，写到 out_dir，返回包含这些表的 Tablebase"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if tb is None:
+        tb = Tablebase(out_dir)
+    layout = Layout(canonical(signature)[0])
+    if layout.signature in tb:
+        return tb
+    for sub in sub_signatures(layout.signature):
+        generate(sub, out_dir, tb, log)
+    log(f"generating {layout.signature} ({layout.size} indices)")
+    values = generate_table(layout, tb, log)
+    write_table(out_dir / f"{layout.signature}{TB_SUFFIX}", layout, values)
+    tb.add(layout, values)
+    return tb
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="逆向分析生成残局库")
+    parser.add_argument("out", help="输出目录")
+    parser.add_argument("signatures", nargs="+", help="子力组合，如 KR-K KR-KA KNP-K")
+    args = parser.parse_args(argv)
+    tb = None
+    for sig in args.signatures:
+        tb = generate(sig, args.out, tb)
+
+
+if __name__ == "__main__":
+    main()
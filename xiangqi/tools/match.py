@@ -0,0 +1,315 @@
+"""自对弈比赛：两个引擎配置在进程池里对下大量棋局，用序贯概率比检验（SPRT）尽早得出结论
+
+用法：python -m xiangqi.tools.match --test "lmr=false" --base "" --nodes 20000 --out games.jsonl
+      python -m xiangqi.tools.match --test "" --base "ucci:python -m xiangqi.engine" --movetime 100
+引擎配置：
+  - 逗号分隔的 SearchOptions 字段覆盖（如 "lmr=false,null_move_reduction=3"，空串为默认），在工作进程内直接搜索
+  - "ucci:<命令行>" 启动外部 UCCI 引擎，每个工作进程一个、整场比赛保持运行。
+    比较改过的 eval.py/search_v2.py 与改动前的版本：把旧版本检出到另一个目录（git worktree），
+    用 "ucci:env PYTHONPATH=<旧版本目录> python -m xiangqi.engine" 作为 --base
+开局：--openings 文件每行一个 FEN（# 开头为注释），每个开局红黑互换各下一局；不给则都从初始局面开始
+（固定节点数时搜索结果完全确定，同一开局的对局会完全重复，需要足够多的开局）
+裁决：无子可走判负；同一局面第三次出现时，循环内一方每步都将军判其负（长将），否则判和；
+双方都没有进攻子力（车马炮兵）判和；超过 --max-plies 判和
+每局结果写一行 JSON 到 --out（边下边写），SPRT 接受/拒绝 H1（test 比 base 强 elo1 以上）或下满 --games 局时停止
+固定时间（--movetime）时工作进程数不应超过 CPU 核数，否则各引擎分到的算力不一致；固定节点数不受影响
+"""
+from __future__ import annotations
+import argparse
+import dataclasses
+import json
+import math
+import multiprocessing as mp
+import os
+import shlex
+import subprocess
+import time
+from collections import Counter
+
+from ..ai.ai_config import SearchOptions, MAX_PLY
+from ..ai.limits import SearchLimits
+from ..ai.search_v2 import SearchEngine
+from ..core.board import Board
+from ..core.const import START_FEN, Piece, Side
+from ..core.move import parse_iccs, to_iccs
+from ..core.movegen import gen_legal_codes, validate_move
+from ..core.rules import in_check
+
+_ATTACKERS = (Piece.CHE, Piece.MA, Piece.PAO, Piece.BING)
+
+
+# ---------- 引擎 ----------
+
+def parse_options(spec: str) -> SearchOptions:
+    """"lmr=false,null_move_reduction=3" -> SearchOptions"""
+    fields = {f.name: f for f in dataclasses.fields(SearchOptions)}
+    values = {}
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        name, _, text = item.partition("=")
+        if name not in fields:
+            raise ValueError(f"未知的搜索选项: {name}")
+        if fields[name].type in (bool, "bool"):
+            values[name] = text.lower() in ("1", "true", "yes", "on")
+        else:
+            values[name] = int(text)
+    return SearchOptions(**values)
+
+
+class LocalPlayer:
+    """同一进程内的 SearchEngine（不用开局库，每局开始清空置换表和走法排序启发）"""
+
+    def __init__(self, options: SearchOptions, tt_size_mb: float):
+        self.engine = SearchEngine(tt_size_mb, options=options)
+        self.engine.log = lambda text: None
+        self.engine.book_rng = None
+
+    def new_game(self) -> None:
+        self.engine.new_game()
+
+    def best_move(self, board: Board, start_fen: str, moves: list[str], limits: SearchLimits) -> str | None:
+        mv = self.engine.search(board.copy(), limits=limits)
+        return None if mv is None else to_iccs(mv)
+
+    def close(self) -> None:
+        pass
+
+
+class UCCIPlayer:
+    """外部 UCCI 引擎进程"""
+
+    def __init__(self, command: str):
+        self.proc = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     text=True, bufsize=1)
+        self._send("ucci")
+        self._read_until("ucciok")
+
+    def _send(self, line: str) -> None:
+        self.proc.stdin.write(line + "\n")
+        self.proc.stdin.flush()
+
+    def _read_until(self, prefix: str | tuple[str, ...]) -> str:
+        for line in self.proc.stdout:
+            if line.startswith(prefix):
+                return line.strip()
+        raise RuntimeError(f"引擎退出（等待 {prefix} 时）")
+
+    def new_game(self) -> None:
+        self._send("newgame")
+
+    def best_move(self, board: Board, start_fen: str, moves: list[str], limits: SearchLimits) -> str | None:
+        self._send(f"position fen {start_fen}" + (" moves " + " ".join(moves) if moves else ""))
+        go = "go"
+        if limits.depth < MAX_PLY:
+            go += f" depth {limits.depth}"
+        if limits.nodes is not None:
+            go += f" nodes {limits.nodes}"
+        if limits.movetime is not None:
+            go += f" movetime {int(limits.movetime * 1000)}"
+        self._send(go)
+        tokens = self._read_until(("bestmove", "nobestmove")).split()
+        return tokens[1] if tokens[0] == "bestmove" and len(tokens) > 1 else None
+
+    def close(self) -> None:
+        try:
+            self._send("quit")
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+
+
+def make_player(spec: str, tt_size_mb: float):
+    if spec.startswith("ucci:"):
+        return UCCIPlayer(spec[len("ucci:"):])
+    return LocalPlayer(parse_options(spec), tt_size_mb)
+
+
+# ---------- 对局 ----------
+
+def _no_attackers(board: Board) -> bool:
+    return not any(abs(board.squares[sq]) in _ATTACKERS for side in Side for sq, _ in board.iter_pieces(side))
+
+
+def play_game(red, black, start_fen: str, limits: SearchLimits, max_plies: int) -> tuple[str, str, list[str]]:
+    """下一局，返回 (结果 1-0/0-1/1/2-1/2, 裁决原因, 走法列表)"""
+    board = Board.from_fen(start_fen)
+    moves: list[str] = []
+    keys = [board.zobrist_key]
+    gave_check = [False]  # 第 i 个元素：第 i 步走完后对方是否被将军
+    players = {Side.RED: red, Side.BLACK: black}
+    for player in players.values():
+        player.new_game()
+    while True:
+        side = board.side_to_move
+        win, loss = ("1-0", "0-1") if side == Side.RED else ("0-1", "1-0")
+        if not gen_legal_codes(board, side):
+            return loss, "mate", moves
+        if len(moves) >= max_plies:
+            return "1/2-1/2", "max plies", moves
+        if _no_attackers(board):
+            return "1/2-1/2", "material", moves
+
+        text = players[side].best_move(board, start_fen, moves, limits)
+        try:
+            mv = validate_move(board, parse_iccs(text), side) if text else None
+        except ValueError:
+            mv = None
+        if mv is None:
+            return loss, "illegal move", moves
+        board.make_move(mv)
+        if in_check(board, side):
+            return loss, "illegal move", moves
+        moves.append(to_iccs(mv))
+        keys.append(board.zobrist_key)
+        gave_check.append(in_check(board, Side(-side)))
+
+        # 第三次出现同一局面：看上一次出现以来的循环里谁一直在将军
+        if keys.count(keys[-1]) >= 3:
+            prev = len(keys) - 2 - keys[-2::-1].index(keys[-1])
+            mover_checks = all(gave_check[i] for i in range(len(keys) - 1, prev, -2))
+            other_checks = all(gave_check[i] for i in range(len(keys) - 2, prev, -2))
+            if mover_checks and not other_checks:
+                return loss, "perpetual check", moves
+            if other_checks and not mover_checks:
+                return win, "perpetual check", moves
+            return "1/2-1/2", "repetition", moves
+
+
+# 工作进程内的两个引擎（进程池初始化时创建，整场比赛复用）
+_players: dict[str, object] = {}
+_config: dict = {}
+
+
+def _init_worker(test_spec: str, base_spec: str, tt_size_mb: float, limits: SearchLimits, max_plies: int) -> None:
+    _players["test"] = make_player(test_spec, tt_size_mb)
+    _players["base"] = make_player(base_spec, tt_size_mb)
+    _config.update(limits=limits, max_plies=max_plies)
+
+
+def _play_task(task: tuple[int, int, str, bool]) -> dict:
+    game, opening, fen, test_is_red = task
+    red, black = ("test", "base") if test_is_red else ("base", "test")
+    start = time.perf_counter()
+    result, reason, moves = play_game(_players[red], _players[black], fen, _config["limits"], _config["max_plies"])
+    return {"game": game, "opening": opening, "red": red, "black": black, "result": result, "reason": reason,
+            "plies": len(moves), "time": round(time.perf_counter() - start, 2), "moves": " ".join(moves)}
+
+
+# ---------- 统计 ----------
+
+def _expected_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    """三项分布的 SPRT 对数似然比（正态近似，同 fishtest 的 logistic elo 模型）"""
+    n = wins + draws + losses
+    if n == 0 or wins + losses == 0:
+        return 0.0
+    score = (wins + draws / 2) / n
+    var = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    if var <= 0:
+        return 0.0
+    s0, s1 = _expected_score(elo0), _expected_score(elo1)
+    return n * (s1 - s0) * (2 * score - s0 - s1) / (2 * var)
+
+
+def elo_estimate(wins: int, draws: int, losses: int) -> tuple[float, float]:
+    """(elo 差, 95% 误差范围)"""
+    n = wins + draws + losses
+    if n == 0:
+        return 0.0, 0.0
+    score = min(max((wins + draws / 2) / n, 1e-6), 1 - 1e-6)
+    var = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    elo = -400 * math.log10(1 / score - 1)
+    margin = 1.96 * math.sqrt(var / n) * 400 / math.log(10) / (score * (1 - score))
+    return elo, margin
+
+
+def load_openings(path: str | None) -> list[str]:
+    if path is None:
+        return [START_FEN]
+    fens = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                Board.from_fen(line)  # 尽早发现格式错误
+                fens.append(line)
+    if not fens:
+        raise ValueError(f"开局文件中没有局面: {path}")
+    return fens
+
+
+def run_match(test: str, base: str, out: str, games: int = 1000, openings: str | None = None,
+              limits: SearchLimits | None = None, workers: int = 0, tt_size_mb: float = 4,
+              max_plies: int = 300, elo0: float = 0.0, elo1: float = 10.0,
+              alpha: float = 0.05, beta: float = 0.05, log=print) -> dict:
+    limits = limits if limits is not None else SearchLimits(nodes=20000)
+    fens = load_openings(openings)
+    lower, upper = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+    tasks = [(g, (g // 2) % len(fens), fens[(g // 2) % len(fens)], g % 2 == 0) for g in range(games)]
+    score = Counter()  # 以 test 为视角的胜/和/负
+    reasons = Counter()
+    llr, verdict = 0.0, None
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with open(out, "w", encoding="utf-8") as f, \
+            mp.Pool(workers, _init_worker, (test, base, tt_size_mb, limits, max_plies)) as pool:
+        for rec in pool.imap_unordered(_play_task, tasks):
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+            if rec["result"] == "1/2-1/2":
+                score["draw"] += 1
+            elif (rec["result"] == "1-0") == (rec["red"] == "test"):
+                score["win"] += 1
+            else:
+                score["loss"] += 1
+            reasons[rec["reason"]] += 1
+            w, d, l = score["win"], score["draw"], score["loss"]
+            llr = sprt_llr(w, d, l, elo0, elo1)
+            elo, margin = elo_estimate(w, d, l)
+            log(f"game {w + d + l}/{games} | +{w} ={d} -{l} | elo {elo:+.1f} ±{margin:.1f} | "
+                f"LLR {llr:.2f} [{lower:.2f}, {upper:.2f}]")
+            if llr >= upper or llr <= lower:
+                verdict = "H1" if llr >= upper else "H0"
+                pool.terminate()
+                break
+    w, d, l = score["win"], score["draw"], score["loss"]
+    elo, margin = elo_estimate(w, d, l)
+    return {"wins": w, "draws": d, "losses": l, "elo": elo, "margin": margin, "llr": llr, "verdict": verdict,
+            "reasons": dict(reasons), "time": time.perf_counter() - start}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="两个引擎配置的自对弈比赛（SPRT 提前停止）")
+    parser.add_argument("--test", default="", help="被测引擎配置（SearchOptions 覆盖或 ucci:<命令行>）")
+    parser.add_argument("--base", default="", help="基准引擎配置")
+    parser.add_argument("--out", default="match.jsonl", help="逐局结果输出文件（JSON Lines）")
+    parser.add_argument("--games", type=int, default=1000, help="最多对局数")
+    parser.add_argument("--openings", default=None, help="开局文件（每行一个 FEN）")
+    parser.add_argument("--nodes", type=int, default=None, help="每步节点数（默认 20000）")
+    parser.add_argument("--movetime", type=int, default=None, help="每步时间（毫秒）")
+    parser.add_argument("--depth", type=int, default=MAX_PLY, help="每步深度上限")
+    parser.add_argument("--workers", type=int, default=0, help="进程数（默认 CPU 数）")
+    parser.add_argument("--hash", type=float, default=4, help="本地引擎的置换表大小（MB）")
+    parser.add_argument("--max-plies", type=int, default=300, help="超过此步数判和")
+    parser.add_argument("--elo0", type=float, default=0.0, help="SPRT H0 的 elo 差")
+    parser.add_argument("--elo1", type=float, default=10.0, help="SPRT H1 的 elo 差")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    nodes = args.nodes if args.nodes is not None or args.movetime is not None else 20000
+    limits = SearchLimits(depth=args.depth, nodes=nodes,
+                          movetime=None if args.movetime is None else args.movetime / 1000)
+    r = run_match(args.test, args.base, args.out, args.games, args.openings, limits, args.workers, args.hash,
+                  args.max_plies, args.elo0, args.elo1, args.alpha, args.beta)
+    verdict = {"H1": f"H1 accepted (test >= base + {args.elo1})",
+               "H0": f"H0 accepted (test <= base + {args.elo0})"}.get(r["verdict"], "inconclusive")
+    print(f"+{r['wins']} ={r['draws']} -{r['losses']} | elo {r['elo']:+.1f} ±{r['margin']:.1f} | "
+          f"LLR {r['llr']:.2f} | {verdict} | {r['time']:.1f}s")
+    print("reasons: " + ", ".join(f"{k} {v}" for k, v in sorted(r["reasons"].items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""perft：统计从某局面出发、走 depth 步的所有合法走法序列数，用于验证走法生成的正确性和测速
+
+用法：
+    python -m xiangqi.tools.perft                       # 初始局面 perft(3)
+    python -m xiangqi.tools.perft --depth 4 --jobs 8    # 根节点走法分给进程池并行统计
+    python -m xiangqi.tools.perft --moves "h2e2 h9g7" --divide
+    python -m xiangqi.tools.perft --suite               # 跑内置参考局面，与已知节点数比对
+    python -m xiangqi.tools.perft --incheck 200         # 随机对局中比对 in_check 与旧实现 in_check_slow
+"""
+from __future__ import annotations
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ..core.board import Board
+from ..core.move import Move, parse_iccs, to_iccs
+from ..core.const import Side
+from ..core.movegen import gen_legal_codes, gen_legal_moves, gen_pseudo_legal_codes, validate_move
+from ..core.rules import in_check, in_check_slow
+
+# 参考局面：(名称, 从初始局面起的 ICCS 走法序列, {深度: 节点数})
+# 初始局面的数值为公认结果；其余局面的数值由最初逐格扫描的走法生成实现独立算出
+REFERENCE_SUITE: list[tuple[str, str, dict[int, int]]] = [
+    ("initial", "", {1: 44, 2: 1920, 3: 79666, 4: 3290240}),
+    ("opening", "h2e2 h9g7", {1: 35, 2: 1419, 3: 51045}),
+    ("p12", "b2b5 h7g7 h2b2 a6a5 b2b7 g7e7 b5b3 i9i7 a0a1 d9e8 a1i1 i7i9", {1: 38, 2: 1003, 3: 39406}),
+    ("p50", "b2f2 a6a5 h0i2 b7f7 i2h0 b9a7 a0a1 f7d7 f2f4 i6i5 g3g4 g9e7 i3i4 d7d3 h2f2 a9a8 f4a4 a8e8 "
+            "f2f4 h7h6 g0i2 h6h5 a1a0 d3a3 f4e4 c6c5 a4c4 h5d5 e4f4 d5d1 b0a2 a7c8 h0g2 e7g5 i2g0 a3b3 "
+            "g0i2 d1i1 g2h0 c8b6 c4e4 h9i7 f4f3 i1h1 d0e1 b3b2 f3f5 a5a4 e1d0 b2b4", {1: 30, 2: 1283, 3: 40158}),
+    ("p70", "b2e2 h9g7 b0c2 h7h5 e2e6 b7a7 c2e1 h5a5 c0e2 i6i5 e3e4 a5a4 a0a1 g6g5 h2h6 g7e6 h6g6 e6d8 "
+            "i3i4 d8f7 g6g7 a4c4 e2c0 a7g7 e1d3 c4a4 a1i1 a4c4 i1h1 e9e8 e4e5 b9a7 h1h2 c4d4 g3g4 c9e7 "
+            "a3a4 i9i8 g0e2 d4d7 i4i5 i8i5 h0f1 g7g6 i0i3 a6a5 h2h6 i5i7 h6h2 d7d8 e0e1 i7h7 e5d5 g6i6 "
+            "e1d1 d8d7 c0a2 d7d6 h2g2 i6i9 d5d6 f7e5 i3g3 a5a4 f1h2 e5f7 d3e5 h7h5 d1e1 i9i8", {1: 31, 2: 1200, 3: 37435}),
+    ("p90", "b2b5 i9i7 h0g2 g9e7 h2h3 e7g5 f0e1 h7c7 g0i2 e9e8 c0e2 i7i8 b0c2 c7c8 b5c5 c8a8 g2h0 a8a3 "
+            "e2g4 h9f8 c5b5 a3a2 e3e4 e8e9 b5b1 e9e8 i3i4 b7b6 h0g2 b6b5 a0b0 a2a5 g2i1 i8i7 b1c1 b5b8 "
+            "h3i3 i7a7 g4e2 b8b2 e2c4 b2b4 i1g2 b4b5 b0b1 a7d7 e1f2 d7b7 i2g0 b7i7 c1f1 g5e7 g3g4 b5b4 "
+            "f2e1 a5e5 b1d1 e5d5 e1f0 d5c5 g2h4 b4b0 c2b0 e6e5 d1e1 c5b5 e1e3 b5b2 f0e1 i6i5 e0f0 g6g5 "
+            "i0h0 c9a7 e3d3 c6c5 b0a2 i7f7 d3d6 f7f3 f1f2 f8h7 h4g2 c5c4 h0i0 f3g3 d6d2 b9d8 f2f1 b2b0", {1: 1, 2: 32, 3: 1345}),
+    ("p110", "g0e2 b7b3 h2h6 b3b8 h0g2 i9i7 e2g4 a9a7 h6h4 h7c7 b2b7 c7d7 h4h0 b8h8 b0a2 g9e7 h0h3 d7d8 "
+             "d0e1 e6e5 i0g0 d8d7 b7b6 a7a8 e1d0 h8g8 g0i0 h9f8 a3a4 b9c7 b6b1 g8g4 a0b0 f9e8 b1b7 g6g5 "
+             "b0a0 d7d5 b7b8 f8h9 i0i1 d5d2 i1f1 c7b9 f0e1 d2d5 c0e2 g4h4 f1f2 d5d2 f2f4 e8f7 f4c4 d2d3 "
+             "b8e8 d3d7 e8d8 i6i5 c4b4 h4c4 e2g0 d7d4 d8c8 c4c5 g0i2 i7i9 b4b8 c5c8 g2i1 d4b4 e1d2 e7g9 "
+             "e0f0 c8e8 f0e0 b4g4 e0e1 g4e4 e1d1 a8a9 h3h4 e8h8 e3e4 i9i6 h4h9 g9e7 b8h8 a9a8 a2b0 e5e4 "
+             "h9g9 i6i8 a4a5 e4e3 d1e1 i8i6 h8h4 i6g6 h4h1 i5i4 g3g4 e7c5 e1d1 g6g9 b0a2 g9i9 h1h3 i4i3 "
+             "g4g5 i9i5", {1: 31, 2: 961, 3: 29874}),
+]
+
+
+def play_moves(board: Board, moves: str) -> Board:
+    """在 board 上依次走 ICCS 走法序列（空格分隔），非法走法抛 ValueError"""
+    for text in moves.split():
+        side = board.side_to_move
+        mv = validate_move(board, parse_iccs(text), side)
+        if mv is None:
+            raise ValueError(f"非法走法: {text}")
+        board.make_move(mv)
+        if in_check(board, side):
+            board.undo_move()
+            raise ValueError(f"走后被将军: {text}")
+    return board
+
+
+def perft(board: Board, depth: int) -> int:
+    if depth <= 0:
+        return 1
+    moves = gen_legal_codes(board, board.side_to_move)  # 与搜索相同，走整数编码的路径
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for code in moves:
+        board.make(code)
+        nodes += perft(board, depth - 1)
+        board.unmake()
+    return nodes
+
+
+def _perft_after(args: tuple[Board, Move, int]) -> int:
+    board, mv, depth = args
+    board.make_move(mv)
+    return perft(board, depth - 1)
+
+
+def divide(board: Board, depth: int, jobs: int = 1) -> dict[str, int]:
+    """按根节点走法分别统计 perft(depth)，jobs > 1 时分给进程池"""
+    moves = gen_legal_moves(board, board.side_to_move)
+    if jobs > 1 and depth > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            counts = list(pool.map(_perft_after, [(board, mv, depth) for mv in moves]))
+    else:
+        counts = []
+        for mv in moves:
+            board.make_move(mv)
+            counts.append(perft(board, depth - 1))
+            board.undo_move()
+    return {to_iccs(mv): n for mv, n in zip(moves, counts)}
+
+
+def _timed(board: Board, depth: int, jobs: int) -> tuple[int, float]:
+    start = time.perf_counter()
+    nodes = sum(divide(board, depth, jobs).values()) if jobs > 1 else perft(board, depth)
+    return nodes, time.perf_counter() - start
+
+
+def run_suite(max_depth: int, jobs: int = 1) -> bool:
+    ok = True
+    for name, moves, expected in REFERENCE_SUITE:
+        board = play_moves(Board.initial(), moves)
+        for depth in sorted(d for d in expected if d <= max_depth):
+            nodes, elapsed = _timed(board, depth, jobs)
+            status = "ok" if nodes == expected[depth] else f"FAIL (expected {expected[depth]})"
+            ok &= nodes == expected[depth]
+            print(f"{name:>8} depth {depth}: {nodes:>10} {status} | {elapsed:.2f}s | "
+                  f"{nodes / elapsed if elapsed else 0:.0f} nodes/s")
+    return ok
+
+
+def verify_in_check(games: int, seed: int = 2024, max_plies: int = 120) -> tuple[int, list[str]]:
+    """
+    随机对局中比对 in_check 与 in_check_slow，返回 (比对的局面数, 不一致局面的 FEN)
+    每个局面把走棋方的全部伪合法走法（含送将的）都试走一遍，双方各比对一次，
+    这样被将军、照面的局面也能覆盖到
+    """
+    rng = random.Random(seed)
+    checked = 0
+    mismatches: list[str] = []
+    for _ in range(games):
+        board = Board.initial()
+        for _ in range(max_plies):
+            for code in gen_pseudo_legal_codes(board, board.side_to_move):
+                board.make(code)
+                for side in (Side.RED, Side.BLACK):
+                    if in_check(board, side) != in_check_slow(board, side):
+                        mismatches.append(f"{board.to_fen()} ({side.name})")
+                board.unmake()
+                checked += 1
+            moves = gen_legal_codes(board, board.side_to_move)
+            if not moves:
+                break
+            board.make(rng.choice(moves))
+    return checked, mismatches
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="走法生成 perft 校验与测速")
+    parser.add_argument("--depth", type=int, default=3, help="深度（--suite 时为最大深度）")
+    parser.add_argument("--moves", default="", help="从初始局面起的 ICCS 走法序列，空格分隔")
+    parser.add_argument("--divide", action="store_true", help="按根节点走法分别输出")
+    parser.add_argument("--suite", action="store_true", help="运行内置参考局面")
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数（按根节点走法拆分）")
+    parser.add_argument("--incheck", type=int, default=0, metavar="GAMES",
+                        help="用 GAMES 盘随机对局比对 in_check 与 in_check_slow")
+    parser.add_argument("--seed", type=int, default=2024, help="--incheck 的随机种子")
+    args = parser.parse_args(argv)
+
+    if args.incheck:
+        start = time.perf_counter()
+        checked, mismatches = verify_in_check(args.incheck, args.seed)
+        for text in mismatches:
+            print(f"MISMATCH {text}")
+        print(f"in_check: {checked} positions, {len(mismatches)} mismatches | {time.perf_counter() - start:.2f}s")
+        sys.exit(1 if mismatches else 0)
+
+    if args.suite:
+        sys.exit(0 if run_suite(args.depth, args.jobs) else 1)
+
+    board = play_moves(Board.initial(), args.moves)
+    if args.divide:
+        start = time.perf_counter()
+        counts = divide(board, args.depth, args.jobs)
+        elapsed = time.perf_counter() - start
+        for text, n in counts.items():
+            print(f"{text}: {n}")
+        nodes = sum(counts.values())
+    else:
+        nodes, elapsed = _timed(board, args.depth, args.jobs)
+    print(f"perft({args.depth}) = {nodes} | {elapsed:.2f}s | {nodes / elapsed if elapsed else 0:.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,78 @@
 from ..core.board import Board
 from .scenes import Scene
 import pygame
+import time
+from pathlib import Path
 from ..core.const import Side, rc_to_i, side_of, i_to_rc
 from ..core.movegen import gen_legal_moves
 from ..ai.search_v2 import SearchEngine
+from ..ai.worker import SearchWorker
+from ..ai.book import OpeningBook
+from ..ai.tablebase import Tablebase
+from ..ai.ai_config import OPENING_BOOK_PATH, TABLEBASE_DIR
 from ..ai.search import find_best_move
-from ..core.rules import is_checkmate
+from ..core.rules import is_checkmate, in_check
+from ..core.movegen import validate_move
 
 class PlayScene(Scene):
+    ai_depth = 3       # AI 搜索深度
+    ponder = True      # 玩家思考时 AI 在后台预先搜索
+
     def on_enter(self, **kwards):
         self.board = Board.initial() # 初始化棋盘一次即可
         self.selected = None
         self.cand_moves = []
-        self.search_engine = SearchEngine()
+        book = OpeningBook(OPENING_BOOK_PATH) if OPENING_BOOK_PATH.exists() else None
+        tablebase = Tablebase(TABLEBASE_DIR) if TABLEBASE_DIR.is_dir() else None
+        self.search_engine = SearchEngine(book=book, tablebase=tablebase)
+        self.search_worker = SearchWorker(self.search_engine)  # AI 在后台线程思考，界面保持刷新
+        self.ai_request_time = 0.0  # 玩家走完、轮到 AI 的时刻，用于统计 AI 应着用时
+        self.ponder_hit = False
         self.selected_sound = pygame.mixer.Sound('xiangqi/assets/audio/select.wav')
         self.move_sound = pygame.mixer.Sound('xiangqi/assets/audio/click.wav')
         self.checkmate_sound = pygame.mixer.Sound('xiangqi/assets/audio/checkmate.wav')
+        font_path = Path(__file__).parent.parent / 'assets' / 'fonts' / 'NotoSerifSC-Regular.otf'
+        self.font = pygame.font.Font(str(font_path), 20)
+
+    def on_exit(self):
+        self.search_worker.cancel()
+
+    def update(self, dt):
+        # 后台搜索完成：在真实棋盘上校验后再走（防止思考期间棋盘被改动）
+        if self.search_worker.done:
+            ai_move = self.search_worker.take_result()
+            if ai_move is not None and self.board.side_to_move == Side.BLACK:
+                ai_move = validate_move(self.board, ai_move, Side.BLACK)
+                if ai_move is not None and self._leaves_king_in_check(ai_move, Side.BLACK):
+                    ai_move = None
+                if ai_move is not None:
+                    self.board.make_move(ai_move)
+                    self.move_sound.play()
+                    # print(f"AI made move: {ai_move}")
+                    print(f"AI 用时 {time.perf_counter() - self.ai_request_time:.2f}s"
+                          + ("（后台思考命中）" if self.ponder_hit else ""))
+                    self.selected = None
+                    self.cand_moves = []
+                    self.start_pondering()
+
+    def _leaves_king_in_check(self, move, side):
+        """validate_move 只查伪合法，这里再确认走完不会送将"""
+        self.board.make_move(move)
+        checked = in_check(self.board, side)
+        self.board.undo_move()
+        return checked
+
+    def start_pondering(self):
+        """AI 走完后，在玩家思考期间搜索玩家最可能的应着之后的局面；猜不出应着就搜当前局面预热置换表"""
+        if not self.ponder or not gen_legal_moves(self.board, self.board.side_to_move):
+            return
+        ponder_move = self.search_engine.ponder_move(self.board)
+        self.search_worker.ponder(self.board, self.ai_depth, ponder_move)
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            if self.search_worker.thinking:  # AI 思考时不响应落子
+                return
             rc = self.pixel_to_rc(event.pos)
             self.selected_sound.play()
             if rc is None:
@@ -46,13 +100,13 @@ class PlayScene(Scene):
                         black_moves = gen_legal_moves(self.board, Side.BLACK)
                         if black_moves:
                             # ai_move = find_best_move(self.board, max_depth=4)
-                            ai_move = self.search_engine.search(self.board, max_depth=3)
-                            if ai_move is not None:
-                                self.board.make_move(ai_move)
-                                # print(f"AI made move: {ai_move}")
-                                self.selected = None
-                                self.cand_moves = []
+                            self.ai_request_time = time.perf_counter()
+                            # 猜中玩家走法时后台思考直接转为正式搜索，否则取消后重新搜（置换表保留）
+                            self.ponder_hit = self.search_worker.ponder_hit(move)
+                            if not self.ponder_hit:
+                                self.search_worker.start(self.board, max_depth=self.ai_depth)
                         else:
+                            self.search_worker.cancel()
                             print("Black has no legal moves. Game over.")
                     return
 
@@ -70,6 +124,7 @@ class PlayScene(Scene):
                 return
 
         if event.type == pygame.KEYDOWN and event.key == pygame.K_z:
+            self.search_worker.cancel()  # 悔棋时放弃正在进行的思考
             if self.board.move_stack:
                 self.board.undo_move()
                 self.selected = None
@@ -137,6 +192,7 @@ class PlayScene(Scene):
 
         self.draw_pieces(screen)
         self.draw_check(screen)
+        self.draw_thinking(screen)
 
     def draw_pieces(self, screen):
         piece_size = int(min(self.dx, self.dy) * 0.9)
@@ -217,6 +273,17 @@ class PlayScene(Scene):
                 else:
                     pygame.draw.circle(screen, (255, 0, 0), (x, y), int(min(self.dx, self.dy) * 0.4), 5)
 
+    def draw_thinking(self, screen):
+        """AI 思考中：显示已完成的深度和分数"""
+        if not self.search_worker.thinking:
+            return
+        info = self.search_worker.info
+        text = "AI 思考中..."
+        if info is not None:
+            text += f" 深度 {info['depth']} 分数 {info['score']}"
+        surf = self.font.render(text, True, (255, 255, 255))
+        screen.blit(surf, (self.grid_rect.left, max(0, self.grid_rect.top - surf.get_height() - 40)))
+
     def pixel_to_rc(self, pos):
         """将屏幕像素坐标转换为棋盘行列号（row, col），若点击区域不在棋盘内则返回 None"""
         x, y = pos